@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Sala, Reserva
+from django.contrib.postgres.search import SearchRank
+from django.db.models import F, Q
+from .models import CustomUser, Sala, Reserva, OcupacaoDiaria, TarifaSala
+from .services import BuscaService
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -11,13 +15,43 @@ class CustomUserAdmin(UserAdmin):
         ('Informações Adicionais', {'fields': ('cpf', 'celular', 'foto_url', 'email')}),
     )
 
+class TarifaSalaInline(admin.TabularInline):
+    model = TarifaSala
+    extra = 0
+
+class BuscaChangeList(ChangeList):
+    """Com busca e sem coluna escolhida para ordenar, lista por relevância."""
+    def get_ordering(self, request, queryset):
+        if 'relevancia' in queryset.query.annotations and ORDER_VAR not in self.params:
+            return ['-relevancia', '-pk']
+        return super().get_ordering(request, queryset)
+
 @admin.register(Sala)
 class SalaAdmin(admin.ModelAdmin):
+    inlines = [TarifaSalaInline]
     list_display = ('nome', 'dono', 'cidade', 'preco_por_hora', 'disponivel')
     search_fields = ('nome', 'cidade')
     list_filter = ('disponivel', 'estado')
 
+    def get_changelist(self, request, **kwargs):
+        return BuscaChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # Busca textual indexada, mais o ILIKE padrão para termos parciais ("Audit" acha "Auditório"),
+        # que entram por último (relevância 0)
+        if not search_term.strip():
+            return queryset, False
+        parciais, duplicados = super().get_search_results(request, queryset, search_term)
+        consulta = BuscaService.consulta(search_term)
+        encontradas = queryset.filter(Q(busca=consulta) | Q(pk__in=parciais.values('pk')))
+        return encontradas.annotate(relevancia=SearchRank(F('busca'), consulta)), duplicados
+
 @admin.register(Reserva)
 class ReservaAdmin(admin.ModelAdmin):
     list_display = ('id', 'sala', 'solicitante', 'status', 'data_inicio', 'valor_total')
-    list_filter = ('status', 'forma_pagamento')
\ No newline at end of file
+    list_filter = ('status', 'forma_pagamento')
+
+@admin.register(OcupacaoDiaria)
+class OcupacaoDiariaAdmin(admin.ModelAdmin):
+    list_display = ('sala', 'dia', 'total_reservas', 'qtd_aprovada', 'qtd_concluida', 'tempo_reservado')
+    list_filter = ('dia',)
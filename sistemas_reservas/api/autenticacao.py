@@ -0,0 +1,31 @@
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from api.services import AutenticacaoService
+
+
+class UsuarioDoToken(TokenUser):
+    """
+    Usuário montado só com as claims do token (id, username, is_staff), sem ir
+    ao banco. Serve para filtros e checagens por id; quem precisa gravar o
+    usuário numa FK usa AutenticacaoService.usuario(request.user).
+    """
+    @cached_property
+    def id(self):
+        return int(self.token[jwt_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+
+class JWTSemConsulta(JWTStatelessUserAuthentication):
+    """JWT sem o SELECT em usuarios por requisição; recusa tokens revogados."""
+
+    def get_user(self, validated_token):
+        if AutenticacaoService.revogado(validated_token):
+            raise InvalidToken(_("Token revogado."))
+        return UsuarioDoToken(validated_token)
@@ -0,0 +1,31 @@
+from .cenarios import CENARIOS, Contexto, Requisicao
+from .medicao import medir, percentil
+
+
+def executar_cenarios(nomes, iteracoes, aquecimento, host='localhost'):
+    """Mede os cenários na ordem pedida e desfaz o que eles gravaram. Retorna {nome: métricas}."""
+    contexto = Contexto(host)
+    resultados = {}
+    try:
+        for nome in nomes:
+            cenario = CENARIOS[nome]
+            cenario.preparar(contexto, iteracoes + aquecimento)
+            resultados[nome] = medir(cenario, contexto, iteracoes, aquecimento)
+    finally:
+        contexto.limpar()
+    return resultados
+
+
+def comparar(anterior, atual):
+    """Variação percentual de p50/p95/vazão e diferença de consultas entre dois resultados JSON."""
+    diferencas = {}
+    for nome, metricas in atual['cenarios'].items():
+        antes = anterior.get('cenarios', {}).get(nome)
+        if not antes:
+            continue
+        diferencas[nome] = {
+            chave: round((metricas[chave] - antes[chave]) * 100 / antes[chave], 1) if antes[chave] else None
+            for chave in ('p50_ms', 'p95_ms', 'requisicoes_por_segundo')
+        }
+        diferencas[nome]['consultas_por_requisicao'] = round(metricas['consultas_por_requisicao'] - antes['consultas_por_requisicao'], 2)
+    return diferencas
@@ -0,0 +1,181 @@
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from api.models import CustomUser, Sala, Reserva
+from api.services import ReservaService
+
+
+@dataclass
+class Requisicao:
+    metodo: str
+    url: str
+    dados: object = None
+    status_esperado: int = 200
+    extras: dict = field(default_factory=dict)
+
+
+class Contexto:
+    """
+    Usuários, sala e clientes autenticados (JWT) usados pelos cenários. Tudo o
+    que os cenários gravam fica em horários livres depois da última reserva da
+    sala e é apagado em `limpar`.
+    """
+    def __init__(self, host='localhost'):
+        self.host = host
+        self.dono = CustomUser.objects.annotate(n=Count('salas')).filter(n__gt=0).order_by('-n', 'id').first()
+        if self.dono is None:
+            raise ValueError("Base sem salas: rode popular_banco antes.")
+        self.sala = Sala.objects.filter(dono=self.dono).annotate(n=Count('reservas_recebidas')).order_by('-n', 'id').first()
+        self.solicitante = (
+            CustomUser.objects.exclude(pk=self.dono.pk)
+            .annotate(n=Count('minhas_reservas')).order_by('-n', 'id').first()
+        ) or self.dono
+
+        ultima = Reserva.objects.filter(sala=self.sala).aggregate(fim=Max('data_fim'))['fim'] or timezone.now()
+        self.inicio_livre = timezone.make_aware(datetime.combine(timezone.localdate(ultima) + timedelta(days=1), time(0)))
+        self._proximo = self.inicio_livre
+        self._clientes = {}
+
+    def proximo_horario(self):
+        """Um intervalo de 1h ainda livre na sala, diferente a cada chamada."""
+        inicio = self._proximo
+        self._proximo += timedelta(hours=1)
+        return inicio, self._proximo
+
+    def cliente(self, papel):
+        """APIClient anônimo (papel None) ou autenticado como 'dono'/'solicitante'."""
+        if papel not in self._clientes:
+            cliente = APIClient(SERVER_NAME=self.host)
+            if papel:
+                token = RefreshToken.for_user(getattr(self, papel)).access_token
+                cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self._clientes[papel] = cliente
+        return self._clientes[papel]
+
+    def limpar(self):
+        Reserva.objects.filter(sala=self.sala, data_inicio__gte=self.inicio_livre).delete()
+
+
+class Cenario:
+    nome = None
+    usuario = 'solicitante'
+
+    def preparar(self, contexto, total):
+        """Cria o que as `total` requisições (aquecimento + medidas) vão precisar."""
+
+    def antes(self, contexto):
+        """Executado antes de cada requisição medida, fora do cronômetro."""
+
+    def requisicao(self, contexto, i):
+        raise NotImplementedError
+
+
+class SalasLista(Cenario):
+    """Catálogo público com o cache vazio: mede o caminho até o banco."""
+    nome = 'salas_lista'
+    usuario = None
+
+    def antes(self, contexto):
+        cache.clear()
+
+    def requisicao(self, contexto, i):
+        return Requisicao('get', reverse('sala-list'))
+
+
+class SalasListaCache(Cenario):
+    """Catálogo público servido do cache (o aquecimento o preenche)."""
+    nome = 'salas_lista_cache'
+    usuario = None
+
+    def requisicao(self, contexto, i):
+        return Requisicao('get', reverse('sala-list'))
+
+
+class ReservasLista(Cenario):
+    """Primeira página de reservas do dono com mais salas."""
+    nome = 'reservas_lista'
+    usuario = 'dono'
+
+    def requisicao(self, contexto, i):
+        return Requisicao('get', reverse('reserva-list'))
+
+
+class ReservaCriar(Cenario):
+    """Criação de reserva (validação, disponibilidade, tarifa e INSERT)."""
+    nome = 'reserva_criar'
+
+    def requisicao(self, contexto, i):
+        inicio, fim = contexto.proximo_horario()
+        dados = {'sala': contexto.sala.id, 'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat(), 'forma_pagamento': 'PIX'}
+        return Requisicao('post', reverse('reserva-list'), dados, 201, {'format': 'json'})
+
+
+class _AcaoEmPendentes(Cenario):
+    """Base das ações: cada requisição age sobre uma reserva pendente diferente."""
+    def preparar(self, contexto, total):
+        novas = []
+        for _ in range(total):
+            inicio, fim = contexto.proximo_horario()
+            novas.append(Reserva(
+                sala=contexto.sala, solicitante=contexto.solicitante, data_inicio=inicio, data_fim=fim,
+                forma_pagamento='PIX', valor_total=contexto.sala.preco_por_hora,
+            ))
+        self.ids = [r.id for r in Reserva.objects.bulk_create(novas)]
+        ReservaService.invalidar_caches(contexto.sala.id)
+
+
+class ReservaResponder(_AcaoEmPendentes):
+    nome = 'reserva_responder'
+    usuario = 'dono'
+
+    def requisicao(self, contexto, i):
+        return Requisicao('post', reverse('reserva-responder', args=[self.ids[i]]), {'acao': 'APROVAR'})
+
+
+class ReservaCancelar(_AcaoEmPendentes):
+    nome = 'reserva_cancelar'
+
+    def requisicao(self, contexto, i):
+        return Requisicao('post', reverse('reserva-cancelar', args=[self.ids[i]]))
+
+
+ENVELOPE = """<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:tns="sistemas.reservas.soap">
+   <soapenv:Body>{corpo}</soapenv:Body>
+</soapenv:Envelope>"""
+
+
+class SoapRelatorio(Cenario):
+    """Relatório SOAP das 100 reservas mais recentes da sala, via app spyne."""
+    nome = 'soap_relatorio'
+    usuario = None
+
+    def requisicao(self, contexto, i):
+        corpo = (
+            f"<tns:gerar_relatorio_reservas><tns:sala_id>{contexto.sala.id}</tns:sala_id>"
+            "<tns:limite>100</tns:limite><tns:ordenacao>RECENTES</tns:ordenacao></tns:gerar_relatorio_reservas>"
+        )
+        return Requisicao('post', reverse('soap_service'), ENVELOPE.format(corpo=corpo), 200, {'content_type': 'text/xml'})
+
+
+class SoapResumo(Cenario):
+    """Resumo SOAP diário da sala nos últimos 30 dias."""
+    nome = 'soap_resumo'
+    usuario = None
+
+    def requisicao(self, contexto, i):
+        corpo = f"<tns:gerar_resumo_sala><tns:sala_id>{contexto.sala.id}</tns:sala_id></tns:gerar_resumo_sala>"
+        return Requisicao('post', reverse('soap_service'), ENVELOPE.format(corpo=corpo), 200, {'content_type': 'text/xml'})
+
+
+CENARIOS = {
+    cenario.nome: cenario
+    for cenario in (
+        SalasLista(), SalasListaCache(), ReservasLista(), ReservaCriar(),
+        ReservaResponder(), ReservaCancelar(), SoapRelatorio(), SoapResumo(),
+    )
+}
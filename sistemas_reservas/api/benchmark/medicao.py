@@ -0,0 +1,54 @@
+import math
+import time
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def percentil(valores, p):
+    """Percentil pelo método nearest-rank sobre uma lista já ordenada."""
+    if not valores:
+        return 0.0
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+def executar(cliente, requisicao):
+    """Dispara uma Requisicao e devolve a resposta com o corpo já consumido (inclusive streaming)."""
+    resposta = getattr(cliente, requisicao.metodo)(requisicao.url, requisicao.dados, **requisicao.extras)
+    if getattr(resposta, 'streaming', False):
+        b''.join(resposta.streaming_content)
+    if resposta.status_code != requisicao.status_esperado:
+        raise AssertionError(f"{requisicao.metodo.upper()} {requisicao.url}: status {resposta.status_code}, esperado {requisicao.status_esperado}")
+    return resposta
+
+
+def medir(cenario, contexto, iteracoes, aquecimento):
+    """
+    Roda o cenário `aquecimento` vezes sem medir e depois `iteracoes` vezes,
+    cronometrando cada requisição e contando as consultas SQL que ela fez.
+    """
+    for i in range(aquecimento):
+        executar(contexto.cliente(cenario.usuario), cenario.requisicao(contexto, i))
+
+    latencias, consultas = [], []
+    for i in range(aquecimento, aquecimento + iteracoes):
+        cenario.antes(contexto)
+        requisicao = cenario.requisicao(contexto, i)
+        cliente = contexto.cliente(cenario.usuario)
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            executar(cliente, requisicao)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(len(capturadas))
+
+    latencias.sort()
+    return {
+        'iteracoes': iteracoes,
+        'p50_ms': round(percentil(latencias, 50), 3),
+        'p95_ms': round(percentil(latencias, 95), 3),
+        'media_ms': round(sum(latencias) / len(latencias), 3),
+        'max_ms': round(latencias[-1], 3),
+        # Vazão serial: só o tempo dentro das requisições, sem a preparação entre elas
+        'requisicoes_por_segundo': round(iteracoes * 1000 / sum(latencias), 2),
+        'consultas_por_requisicao': round(sum(consultas) / len(consultas), 2),
+        'consultas_max': max(consultas),
+    }
@@ -0,0 +1,28 @@
+import django_filters
+from api.models import Sala
+
+
+class OrdenacaoEstavel(django_filters.OrderingFilter):
+    """OrderingFilter que desempata por id, para a paginação não repetir nem pular salas."""
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value:
+            qs = qs.order_by(*qs.query.order_by, 'id')
+        return qs
+
+
+class SalaFilter(django_filters.FilterSet):
+    """
+    Filtros da descoberta de salas. Faixas de capacidade e preço dentro de uma cidade
+    usam os índices (cidade, disponivel, preco_por_hora) e (cidade, capacidade).
+    """
+    dono = django_filters.NumberFilter(field_name='dono_id')
+    capacidade_min = django_filters.NumberFilter(field_name='capacidade', lookup_expr='gte')
+    capacidade_max = django_filters.NumberFilter(field_name='capacidade', lookup_expr='lte')
+    preco_min = django_filters.NumberFilter(field_name='preco_por_hora', lookup_expr='gte')
+    preco_max = django_filters.NumberFilter(field_name='preco_por_hora', lookup_expr='lte')
+    ordenar = OrdenacaoEstavel(fields=(('preco_por_hora', 'preco'), ('capacidade', 'capacidade')))
+
+    class Meta:
+        model = Sala
+        fields = ['dono', 'disponivel', 'cidade', 'estado', 'bairro']
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from api.services import OcupacaoService
+
+class Command(BaseCommand):
+    help = 'Atualiza incrementalmente o rollup diário de ocupação/receita (tabela ocupacao_diaria).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help='Descarta o rollup e reconstrói todos os dias.')
+
+    def handle(self, *args, **options):
+        modo = 'completa' if options['completo'] else 'incremental'
+        self.stdout.write(f'📊 Atualização {modo} do rollup de ocupação...')
+        total = OcupacaoService.atualizar(completo=options['completo'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} dia(s) de sala reagregado(s).'))
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from api.benchmark import CENARIOS, executar_cenarios, comparar
+from api.models import CustomUser, Sala, Reserva
+import django
+import json
+import subprocess
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede os endpoints mais usados (salas, reservas, criação, responder/cancelar e SOAP) em processo, '
+        'reportando p50/p95, vazão e consultas por requisição. Por padrão cria um banco de teste e o popula '
+        'com popular_banco; use --banco-atual para medir a base configurada.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=50)
+        parser.add_argument('--salas-por-usuario', type=int, default=5)
+        parser.add_argument('--reservas', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--iteracoes', type=int, default=50, help='Requisições medidas por cenário.')
+        parser.add_argument('--aquecimento', type=int, default=5, help='Requisições descartadas antes de medir.')
+        parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+        parser.add_argument('--saida', help='Arquivo JSON com os resultados (para comparar entre execuções).')
+        parser.add_argument('--comparar', help='JSON de uma execução anterior para mostrar a variação.')
+        parser.add_argument('--banco-atual', action='store_true', help='Mede a base configurada, sem criar nem popular banco de teste.')
+        parser.add_argument('--manter-banco', action='store_true', help='Reaproveita o banco de teste entre execuções (não o apaga no fim).')
+
+    def handle(self, *args, **options):
+        nome_original = connection.settings_dict['NAME']
+        if not options['banco_atual']:
+            self.stdout.write('🧪 Criando banco de teste...')
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['manter_banco'], serialize=False)
+            if not (options['manter_banco'] and Reserva.objects.exists()):
+                call_command(
+                    'popular_banco', usuarios=options['usuarios'], salas_por_usuario=options['salas_por_usuario'],
+                    reservas=options['reservas'], seed=options['seed'], stdout=self.stdout,
+                )
+
+        try:
+            self.stdout.write(f"⏱️  Medindo {len(options['cenarios'])} cenário(s), {options['iteracoes']} requisições cada...")
+            try:
+                cenarios = executar_cenarios(options['cenarios'], options['iteracoes'], options['aquecimento'], self.host())
+            except (ValueError, AssertionError) as erro:
+                raise CommandError(str(erro))
+            resultado = {'meta': self.meta(options), 'cenarios': cenarios}
+        finally:
+            if not options['banco_atual']:
+                connection.creation.destroy_test_db(nome_original, verbosity=0, keepdb=options['manter_banco'])
+
+        self.imprimir(cenarios)
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                json.dump(resultado, arquivo, indent=2, sort_keys=True, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"💾 Resultados gravados em {options['saida']}"))
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as arquivo:
+                anterior = json.load(arquivo)
+            self.stdout.write('📈 Variação em relação à execução anterior (%):')
+            for nome, diferenca in comparar(anterior, resultado).items():
+                self.stdout.write(f"  {nome:<20} p50 {diferenca['p50_ms']:+}  p95 {diferenca['p95_ms']:+}  "
+                                  f"req/s {diferenca['requisicoes_por_segundo']:+}  consultas {diferenca['consultas_por_requisicao']:+}")
+
+    def host(self):
+        # Com DEBUG e ALLOWED_HOSTS vazio o Django só aceita localhost
+        return next((h for h in settings.ALLOWED_HOSTS if h not in ('*',) and not h.startswith('.')), 'localhost')
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'data': timezone.now().isoformat(),
+            'commit': commit,
+            'django': django.get_version(),
+            'debug': settings.DEBUG,
+            'iteracoes': options['iteracoes'],
+            'aquecimento': options['aquecimento'],
+            'base': {
+                'usuarios': CustomUser.objects.count(),
+                'salas': Sala.objects.count(),
+                'reservas': Reserva.objects.count(),
+            },
+        }
+
+    def imprimir(self, cenarios):
+        self.stdout.write(f"{'cenário':<20} {'p50 ms':>9} {'p95 ms':>9} {'req/s':>8} {'consultas':>10}")
+        for nome, m in cenarios.items():
+            self.stdout.write(f"{nome:<20} {m['p50_ms']:>9.2f} {m['p95_ms']:>9.2f} {m['requisicoes_por_segundo']:>8.1f} {m['consultas_por_requisicao']:>10.2f}")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from api.services import CicloDeVidaService
+
+class Command(BaseCommand):
+    help = (
+        'Conclui reservas aprovadas que já terminaram e rejeita pendentes cujo início já passou, '
+        'em lotes (pensado para rodar periodicamente via cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=CicloDeVidaService.TAMANHO_LOTE, help='Reservas atualizadas por transação.')
+        parser.add_argument('--completa', action='store_true', help='Ignora a última varredura e percorre todas as reservas vencidas.')
+
+    def handle(self, *args, **options):
+        anterior = CicloDeVidaService.ultima_varredura()
+        self.stdout.write(f"🧹 Encerrando reservas vencidas (última varredura: {anterior or 'nunca'})...")
+        resultado = CicloDeVidaService.varrer(tamanho_lote=options['lote'], completa=options['completa'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {resultado['concluidas']} reserva(s) concluída(s), {resultado['expiradas']} pendente(s) expirada(s)."
+        ))
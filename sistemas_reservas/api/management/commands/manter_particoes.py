@@ -0,0 +1,29 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.services import ParticionamentoService
+
+class Command(BaseCommand):
+    help = (
+        'Cria as partições mensais de reservas dos próximos meses e move para reservas_arquivo '
+        'as mais antigas que a retenção (pensado para rodar periodicamente via cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses-futuros', type=int, default=3, help='Quantos meses à frente devem ter partição.')
+        parser.add_argument('--retencao-meses', type=int, default=24, help='Meses mantidos em reservas (0 desliga o arquivamento).')
+
+    def handle(self, *args, **options):
+        if not ParticionamentoService.particionada():
+            raise CommandError('A tabela reservas não está particionada (rode as migrações).')
+
+        criadas = ParticionamentoService.garantir_futuras(options['meses_futuros'])
+        self.stdout.write(f"🗂️  {len(criadas)} partição(ões) criada(s){': ' + ', '.join(criadas) if criadas else '.'}")
+
+        if options['retencao_meses'] > 0:
+            limite = ParticionamentoService.mes(timezone.now())
+            for _ in range(options['retencao_meses']):
+                limite = ParticionamentoService.mes(limite - timedelta(days=1))
+            movidas, linhas = ParticionamentoService.arquivar(limite)
+            self.stdout.write(f"📦 {len(movidas)} partição(ões) e {linhas} reserva(s) da partição padrão arquivadas (antes de {limite:%Y-%m}).")
+        self.stdout.write(self.style.SUCCESS('✅ Partições em dia.'))
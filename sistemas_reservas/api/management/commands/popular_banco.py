@@ -1,140 +1,189 @@
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.models import Max, prefetch_related_objects
 from django.utils import timezone
-from api.models import CustomUser, Sala, Reserva
-from datetime import timedelta
+from api.models import CustomUser, Sala, Reserva, OcupacaoDiaria, TarifaSala, PontoDeControle
+from api.services import TarifaService, CatalogoCache, ParticionamentoService
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 import random
+import time as relogio
+
+# USUÁRIOS (os primeiros mantêm os nomes de sempre; os demais ganham um número)
+USUARIOS_MODELO = [
+    {'user': 'ana_silva', 'cpf': '111.111.111-11', 'bairro_pref': 'Ponta Negra', 'nome': 'Ana Paula Silva'},
+    {'user': 'bruno_costa', 'cpf': '222.222.222-22', 'bairro_pref': 'Tirol', 'nome': 'Bruno Henrique Costa'},
+    {'user': 'carla_dias', 'cpf': '333.333.333-33', 'bairro_pref': 'Petrópolis', 'nome': 'Carla Beatriz Dias'},
+    {'user': 'daniel_souza', 'cpf': '444.444.444-44', 'bairro_pref': 'Lagoa Nova', 'nome': 'Daniel Souza Andrade'},
+]
+
+# TIPOS DE SALA REALISTAS
+TIPOS_SALA = [
+    ("Auditório Atlântico", 120, Decimal('450.00'), "Auditório equipado com projetor 4K e acústica aprimorada."),
+    ("Sala de Reunião Oceano", 12, Decimal('95.00'), "Sala moderna com TV 55'' e videoconferência."),
+    ("Espaço Coworking Dunas", 25, Decimal('160.00'), "Ambiente colaborativo ideal para freelancers e pequenas equipes."),
+    ("Estúdio Criativo Potiguar", 6, Decimal('220.00'), "Estúdio ideal para gravações, podcasts e fotografia."),
+    ("Salão de Eventos Brisa Norte", 180, Decimal('980.00'), "Salão amplo para festas, palestras e workshops."),
+    ("Sala de Treinamento Horizon", 35, Decimal('130.00'), "Espaço para capacitações equipado com quadro digital."),
+]
+
+# RUAS REALISTAS
+RUAS_POR_BAIRRO = {
+    "Ponta Negra": ["Engenheiro Roberto Freire", "Rua das Conchas", "Av. Praia de Ponta Negra"],
+    "Tirol": ["Av. Hermes da Fonseca", "Rua Ceará-Mirim", "Rua Alberto Maranhão"],
+    "Petrópolis": ["Av. Afonso Pena", "Rua Trairi", "Av. Hermes da Fonseca"],
+    "Lagoa Nova": ["Av. Capitão-Mor Gouveia", "Rua Jaguarari", "Rua São José"],
+}
+
+# Reservas entre 8h e 22h; as passadas já foram resolvidas, as futuras ainda não
+ABERTURA, FECHAMENTO = 8, 22
+STATUS_PASSADAS = (['CONCLUIDA', 'CANCELADA', 'REJEITADA'], [75, 15, 10])
+STATUS_FUTURAS = (['PENDENTE_APROVACAO', 'APROVADA', 'CANCELADA'], [40, 50, 10])
 
-class Command(BaseCommand):
-    help = 'Popula o banco com dados realistas de usuários, salas e reservas em Natal/RN.'
 
-    def handle(self, *args, **kwargs):
+class Command(BaseCommand):
+    help = 'Popula o banco com dados realistas de usuários, salas e reservas em Natal/RN (em qualquer escala).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=4, help='Quantidade de usuários (donos/solicitantes).')
+        parser.add_argument('--salas-por-usuario', type=int, default=6, help='Salas criadas para cada usuário.')
+        parser.add_argument('--reservas', type=int, default=18, help='Total de reservas, distribuídas entre as salas novas.')
+        parser.add_argument('--seed', type=int, default=None, help='Semente para gerar sempre os mesmos dados.')
+        parser.add_argument('--sem-limpar', action='store_true', help='Acrescenta aos dados existentes em vez de apagar a base.')
+        parser.add_argument('--lote', type=int, default=5000, help='Tamanho dos lotes de bulk_create.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        lote = options['lote']
+        comeco = relogio.monotonic()
         self.stdout.write('🌎 Populando dados mais reais em Natal/RN...')
 
-        # LIMPEZA
-        Reserva.objects.all().delete()
-        Sala.objects.all().delete()
-        CustomUser.objects.all().delete()
-        self.stdout.write('🧹 Base limpa!')
+        # LIMPEZA (TRUNCATE: não carrega as linhas nem dispara sinais, viável com milhões de reservas)
+        if not options['sem_limpar']:
+            tabelas = [m._meta.db_table for m in (Reserva, OcupacaoDiaria, TarifaSala, PontoDeControle, Sala, CustomUser)]
+            if ParticionamentoService.particionada():
+                tabelas.append(ParticionamentoService.ARQUIVO)
+            with connection.cursor() as cursor:
+                cursor.execute(f"TRUNCATE {', '.join(map(connection.ops.quote_name, tabelas))} RESTART IDENTITY CASCADE")
+            self.stdout.write('🧹 Base limpa!')
 
         # SUPERUSUÁRIO
-        admin = CustomUser.objects.create_superuser(
-            username='mario',
-            email='mario@natal.com',
-            password='123',
-            cpf='000.000.000-00',
-            celular='84999990000'
-        )
-        self.stdout.write(f'👑 Superusuário criado: {admin.username}')
-
-        # USUÁRIOS
-        usuarios_data = [
-            {
-                'user': 'ana_silva',
-                'cpf': '111.111.111-11',
-                'bairro_pref': 'Ponta Negra',
-                'nome': 'Ana Paula Silva'
-            },
-            {
-                'user': 'bruno_costa',
-                'cpf': '222.222.222-22',
-                'bairro_pref': 'Tirol',
-                'nome': 'Bruno Henrique Costa'
-            },
-            {
-                'user': 'carla_dias',
-                'cpf': '333.333.333-33',
-                'bairro_pref': 'Petrópolis',
-                'nome': 'Carla Beatriz Dias'
-            },
-            {
-                'user': 'daniel_souza',
-                'cpf': '444.444.444-44',
-                'bairro_pref': 'Lagoa Nova',
-                'nome': 'Daniel Souza Andrade'
-            },
-        ]
-
-        # TIPOS DE SALA REALISTAS
-        tipos_sala = [
-            ("Auditório Atlântico", 120, 450.00, "Auditório equipado com projetor 4K e acústica aprimorada."),
-            ("Sala de Reunião Oceano", 12, 95.00, "Sala moderna com TV 55'' e videoconferência."),
-            ("Espaço Coworking Dunas", 25, 160.00, "Ambiente colaborativo ideal para freelancers e pequenas equipes."),
-            ("Estúdio Criativo Potiguar", 6, 220.00, "Estúdio ideal para gravações, podcasts e fotografia."),
-            ("Salão de Eventos Brisa Norte", 180, 980.00, "Salão amplo para festas, palestras e workshops."),
-            ("Sala de Treinamento Horizon", 35, 130.00, "Espaço para capacitações equipado com quadro digital."),
-        ]
-
-        # RUAS REALISTAS
-        ruas_por_bairro = {
-            "Ponta Negra": ["Engenheiro Roberto Freire", "Rua das Conchas", "Av. Praia de Ponta Negra"],
-            "Tirol": ["Av. Hermes da Fonseca", "Rua Ceará-Mirim", "Rua Alberto Maranhão"],
-            "Petrópolis": ["Av. Afonso Pena", "Rua Trairi", "Av. Hermes da Fonseca"],
-            "Lagoa Nova": ["Av. Capitão-Mor Gouveia", "Rua Jaguarari", "Rua São José"],
-        }
-
-        usuarios_objs = []
-
-        # CRIAÇÃO DE USUÁRIOS + SALAS
-        for i, u_data in enumerate(usuarios_data):
-
-            user = CustomUser.objects.create_user(
-                username=u_data['user'],
-                email=f"{u_data['user']}@email.com",
+        admin = CustomUser.objects.filter(username='mario').first()
+        if not admin:
+            admin = CustomUser.objects.create_superuser(
+                username='mario',
+                email='mario@natal.com',
                 password='123',
-                cpf=u_data['cpf'],
-                celular=f"8498{random.randint(1000000,9999999)}",
-                foto_url=f"https://i.pravatar.cc/150?img={i+10}"
+                cpf='000.000.000-00',
+                celular='84999990000'
+            )
+            self.stdout.write(f'👑 Superusuário criado: {admin.username}')
+
+        # USUÁRIOS + SALAS
+        senha = make_password('123')  # um único hash para todos: o PBKDF2 é o gargalo de create_user
+        usuarios = CustomUser.objects.bulk_create(self.gerar_usuarios(options['usuarios'], senha, rng), batch_size=lote)
+        self.stdout.write(f'👤 {len(usuarios)} usuários criados.')
+
+        salas = Sala.objects.bulk_create(self.gerar_salas(usuarios, options['salas_por_usuario'], rng), batch_size=lote)
+        prefetch_related_objects(salas, 'tarifas')
+        self.stdout.write(f'🏢 {len(salas)} salas criadas.')
+
+        # RESERVAS
+        total = 0
+        if salas and options['reservas']:
+            solicitantes = [u.id for u in usuarios] or [admin.id]
+            pendentes = []
+            for reserva in self.gerar_reservas(salas, solicitantes, options['reservas'], rng):
+                pendentes.append(reserva)
+                if len(pendentes) >= lote:
+                    total += len(Reserva.objects.bulk_create(pendentes))
+                    pendentes = []
+                    self.stdout.write(f'📅 {total} reservas...')
+            total += len(Reserva.objects.bulk_create(pendentes))
+
+        CatalogoCache.invalidar()
+        duracao = relogio.monotonic() - comeco
+        self.stdout.write(self.style.SUCCESS(f"✅ Base populada com dados mais reais! ({total} reservas em {duracao:.1f}s)"))
+
+    def gerar_usuarios(self, quantidade, senha, rng):
+        # Com --sem-limpar a numeração passa do maior id, para não colidir em username/cpf/email
+        inicio = 0
+        if CustomUser.objects.exclude(username='mario').exists():
+            inicio = CustomUser.objects.aggregate(maior=Max('id'))['maior'] + len(USUARIOS_MODELO)
+        for i in range(quantidade):
+            numero = inicio + i
+            modelo = USUARIOS_MODELO[numero % len(USUARIOS_MODELO)]
+            if numero < len(USUARIOS_MODELO):
+                username, cpf = modelo['user'], modelo['cpf']
+            else:
+                username = f"{modelo['user']}_{numero}"
+                digitos = f"{10 ** 10 + numero:011d}"
+                cpf = f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+            primeiro, _, sobrenome = modelo['nome'].partition(' ')
+            usuario = CustomUser(
+                username=username,
+                email=f"{username}@email.com",
+                password=senha,
+                first_name=primeiro,
+                last_name=sobrenome,
+                cpf=cpf,
+                celular=f"8498{rng.randint(1000000, 9999999)}",
+                foto_url=f"https://i.pravatar.cc/150?img={numero % 70 + 1}"
             )
-            usuarios_objs.append(user)
-
-            # 6 salas por usuário
-            for j in range(6):
-                modelo = tipos_sala[j]
-
-                rua_escolhida = random.choice(ruas_por_bairro[u_data['bairro_pref']])
-                numero = random.randint(100, 3500)
-
-                Sala.objects.create(
-                    dono=user,
-                    nome=f"{modelo[0]} - Unidade {j+1}",
-                    descricao=f"{modelo[3]} Localizado no bairro {u_data['bairro_pref']}.",
-                    capacidade=modelo[1],
-                    preco_por_hora=modelo[2],
-                    rua=rua_escolhida,
-                    numero=str(numero),
-                    bairro=u_data['bairro_pref'],
+            usuario._bairro_pref = modelo['bairro_pref']
+            yield usuario
+
+    def gerar_salas(self, usuarios, por_usuario, rng):
+        for usuario in usuarios:
+            bairro = usuario._bairro_pref
+            for j in range(por_usuario):
+                nome, capacidade, preco, descricao = TIPOS_SALA[j % len(TIPOS_SALA)]
+                yield Sala(
+                    dono=usuario,
+                    nome=f"{nome} - Unidade {j+1}",
+                    descricao=f"{descricao} Localizado no bairro {bairro}.",
+                    capacidade=capacidade,
+                    preco_por_hora=preco,
+                    rua=rng.choice(RUAS_POR_BAIRRO[bairro]),
+                    numero=str(rng.randint(100, 3500)),
+                    bairro=bairro,
                     cidade="Natal",
                     estado="RN",
-                    cep=f"59{random.randint(100,999)}-{random.randint(100,999)}",
+                    cep=f"59{rng.randint(100,999)}-{rng.randint(100,999)}",
                     disponivel=True
                 )
 
-            self.stdout.write(f"👤 Usuário {user.username} criado com 6 salas realistas em {u_data['bairro_pref']}.")
-
-        # RESERVAS REALISTAS
-        hoje = timezone.now()
-        salas = list(Sala.objects.all())
-
-        for _ in range(18):
-            sala_alvo = random.choice(salas)
-            usuario = random.choice([u for u in usuarios_objs if u != sala_alvo.dono])
-
-            dias = random.randint(-15, 15)
-            inicio = hoje + timedelta(days=dias, hours=random.randint(8, 19))
-            fim = inicio + timedelta(hours=random.choice([1, 2, 3, 4]))
-
-            status = random.choice(['PENDENTE_APROVACAO', 'APROVADA', 'CONCLUIDA', 'CANCELADA'])
-
-            reserva = Reserva(
-                solicitante=usuario,
-                sala=sala_alvo,
-                data_inicio=inicio,
-                data_fim=fim,
-                forma_pagamento=random.choice(['PIX', 'CARTAO', 'DINHEIRO']),
-                status=status
-            )
-
-            reserva.calcular_valor_total()
-            reserva.save()
-
-        self.stdout.write(self.style.SUCCESS("✅ Base populada com dados mais reais!"))
+    def gerar_reservas(self, salas, solicitantes, total, rng):
+        """
+        Reparte `total` entre as salas e, em cada uma, encadeia reservas de 1 a 4h
+        em horário comercial, sem sobreposição, com cerca de metade no passado.
+        """
+        agora = timezone.now()
+        pagamentos = [codigo for codigo, _ in Reserva.PAGAMENTO_CHOICES]
+        for k, sala in enumerate(salas):
+            quantidade = total // len(salas) + (1 if k < total % len(salas) else 0)
+            # ~3 reservas por dia: começa no passado o suficiente para metade já ter acontecido
+            dia = timezone.localdate(agora) - timedelta(days=quantidade // 6)
+            cursor = timezone.make_aware(datetime.combine(dia, time(ABERTURA)))
+            clientes = [s for s in solicitantes if s != sala.dono_id] or solicitantes
+
+            for _ in range(quantidade):
+                cursor += timedelta(hours=rng.choice([0, 0, 1, 2]))
+                horas = rng.choice([1, 2, 3, 4])
+                if timezone.localtime(cursor).hour + horas > FECHAMENTO:
+                    dia = timezone.localtime(cursor).date() + timedelta(days=1)
+                    cursor = timezone.make_aware(datetime.combine(dia, time(ABERTURA + rng.choice([0, 0, 1, 2]))))
+                inicio, fim = cursor, cursor + timedelta(hours=horas)
+                cursor = fim
+
+                opcoes, pesos = STATUS_PASSADAS if fim < agora else STATUS_FUTURAS
+                yield Reserva(
+                    solicitante_id=rng.choice(clientes),
+                    sala=sala,
+                    data_inicio=inicio,
+                    data_fim=fim,
+                    forma_pagamento=rng.choice(pagamentos),
+                    status=rng.choices(opcoes, pesos)[0],
+                    valor_total=TarifaService.valor(sala, inicio, fim),
+                )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:42
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['PENDENTE_APROVACAO', 'APROVADA'])), expressions=[(models.Func(models.F('sala'), models.F('sala'), models.Value('[]'), function='int8range', output_field=django.contrib.postgres.fields.ranges.BigIntegerRangeField()), '&&'), (models.Func(models.F('data_inicio'), models.F('data_fim'), function='tstzrange', output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField()), '&&')], name='reservas_sem_sobreposicao'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_reserva_sem_sobreposicao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['solicitante', '-criado_em'], name='reservas_solicitante_criado'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['sala', '-criado_em'], name='reservas_sala_criado'),
+        ),
+    ]
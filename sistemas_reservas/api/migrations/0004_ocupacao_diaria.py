@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:11
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_reserva_indices_visibilidade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PontoDeControle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=50, unique=True)),
+                ('marca', models.DateTimeField(blank=True, null=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'pontos_de_controle',
+            },
+        ),
+        migrations.CreateModel(
+            name='OcupacaoDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('total_reservas', models.PositiveIntegerField(default=0)),
+                ('qtd_pendente_aprovacao', models.PositiveIntegerField(default=0)),
+                ('qtd_aprovada', models.PositiveIntegerField(default=0)),
+                ('qtd_rejeitada', models.PositiveIntegerField(default=0)),
+                ('qtd_cancelada', models.PositiveIntegerField(default=0)),
+                ('qtd_concluida', models.PositiveIntegerField(default=0)),
+                ('receita_pix', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('receita_cartao_credito', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('receita_cartao_debito', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('receita_boleto', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('receita_dinheiro', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('tempo_reservado', models.DurationField(default=datetime.timedelta)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('sala', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ocupacao_diaria', to='api.sala')),
+            ],
+            options={
+                'db_table': 'ocupacao_diaria',
+                'ordering': ['sala', 'dia'],
+                'constraints': [models.UniqueConstraint(fields=('sala', 'dia'), name='ocupacao_diaria_sala_dia')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:17
+
+import datetime
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_ocupacao_diaria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarifaSala',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia_semana', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Segunda'), (1, 'Terça'), (2, 'Quarta'), (3, 'Quinta'), (4, 'Sexta'), (5, 'Sábado'), (6, 'Domingo')], help_text='Vazio = todos os dias', null=True)),
+                ('hora_inicio', models.TimeField(default=datetime.time(0, 0))),
+                ('hora_fim', models.TimeField(default=datetime.time(0, 0))),
+                ('multiplicador', models.DecimalField(decimal_places=2, default=Decimal('1.00'), max_digits=5)),
+                ('sala', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarifas', to='api.sala')),
+            ],
+            options={
+                'db_table': 'tarifas_sala',
+                'ordering': ['sala', 'dia_semana', 'hora_inicio'],
+                'constraints': [models.CheckConstraint(condition=models.Q(('hora_inicio__lt', models.F('hora_fim')), ('hora_fim', datetime.time(0, 0)), _connector='OR'), name='tarifas_sala_faixa_valida'), models.CheckConstraint(condition=models.Q(('multiplicador__gt', 0)), name='tarifas_sala_multiplicador_positivo')],
+            },
+        ),
+    ]
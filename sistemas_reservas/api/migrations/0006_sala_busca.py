@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:37
+
+import api.models.busca
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_tarifa_sala'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sala',
+            name='busca',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector(api.models.busca.SemAcentos('nome'), config='portuguese', weight='A'), '||', django.contrib.postgres.search.SearchVector(api.models.busca.SemAcentos('bairro'), config='portuguese', weight='B'), django.contrib.postgres.search.SearchConfig('portuguese')), '||', django.contrib.postgres.search.SearchVector(api.models.busca.SemAcentos('cidade'), config='portuguese', weight='B'), django.contrib.postgres.search.SearchConfig('portuguese')), '||', django.contrib.postgres.search.SearchVector(api.models.busca.SemAcentos('descricao'), config='portuguese', weight='C'), django.contrib.postgres.search.SearchConfig('portuguese')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='sala',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busca'], name='salas_busca_gin'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_sala_busca'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sala',
+            index=models.Index(fields=['cidade', 'disponivel', 'preco_por_hora'], name='salas_cidade_disp_preco'),
+        ),
+        migrations.AddIndex(
+            model_name='sala',
+            index=models.Index(fields=['cidade', 'capacidade'], name='salas_cidade_capacidade'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_sala_indices_descoberta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('status__in', ['PENDENTE_APROVACAO', 'APROVADA'])), fields=['sala', 'data_inicio', 'data_fim'], name='reservas_ativas_periodo'),
+        ),
+    ]
@@ -0,0 +1,140 @@
+"""
+Converte `reservas` em tabela particionada por faixa mensal de `data_inicio`.
+
+O PostgreSQL 16 não aceita exclusion constraint em tabela particionada (e uma por
+partição não enxergaria reservas que atravessam a virada do mês), então a regra
+`reservas_sem_sobreposicao` passa a ser um trigger que levanta exclusion_violation
+com o mesmo nome de constraint: ReservaService.proteger_sobreposicao segue igual.
+A chave primária vira (id, data_inicio), como exige o particionamento; o id continua
+vindo da mesma identidade e o ORM não percebe a diferença.
+
+Cria também `reservas_arquivo`, para onde o comando manter_particoes move as
+partições antigas. A conversão copia as linhas: em bases grandes, rode em janela
+de manutenção.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from django.db import migrations
+
+MESES_FUTUROS = 3
+
+EXCLUSAO = (
+    "EXCLUDE USING gist (int8range(sala_id, sala_id, '[]'::text) WITH &&, tstzrange(data_inicio, data_fim) WITH &&) "
+    "WHERE ((status)::text = ANY ((ARRAY['PENDENTE_APROVACAO'::character varying, 'APROVADA'::character varying])::text[]))"
+)
+
+TRIGGER = """
+CREATE FUNCTION reservas_sem_sobreposicao() RETURNS trigger AS $$
+BEGIN
+    IF NEW.status IN ('PENDENTE_APROVACAO', 'APROVADA') THEN
+        -- Serializa as escritas da sala: a checagem abaixo vê o que as anteriores gravaram
+        PERFORM pg_advisory_xact_lock(hashtext('reservas_sem_sobreposicao'), NEW.sala_id::integer);
+        IF EXISTS (
+            SELECT 1 FROM reservas r
+            WHERE r.sala_id = NEW.sala_id AND r.id <> NEW.id
+              AND r.status IN ('PENDENTE_APROVACAO', 'APROVADA')
+              AND r.data_inicio < NEW.data_fim AND r.data_fim > NEW.data_inicio
+        ) THEN
+            RAISE EXCEPTION 'conflicting key value violates exclusion constraint "reservas_sem_sobreposicao"'
+                USING ERRCODE = 'exclusion_violation', CONSTRAINT = 'reservas_sem_sobreposicao', TABLE = 'reservas';
+        END IF;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER reservas_sem_sobreposicao
+    BEFORE INSERT OR UPDATE OF sala_id, data_inicio, data_fim, status ON reservas
+    FOR EACH ROW EXECUTE FUNCTION reservas_sem_sobreposicao();
+"""
+
+
+def _mes(data):
+    return data.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _proximo_mes(mes):
+    return (mes + timedelta(days=32)).replace(day=1)
+
+
+def _definicoes(cursor):
+    """Índices (menos PK e exclusion) e FKs de reservas_legado, já apontando para `reservas`."""
+    cursor.execute("""
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = 'reservas_legado'::regclass AND NOT i.indisprimary
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.contype = 'x')
+    """)
+    indices = [re.sub(r' ON (ONLY )?\S+ USING ', ' ON reservas USING ', linha[0]) for linha in cursor.fetchall()]
+    cursor.execute("SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = 'reservas_legado'::regclass AND contype = 'f'")
+    chaves = [f'ALTER TABLE reservas ADD CONSTRAINT {nome} {definicao}' for nome, definicao in cursor.fetchall()]
+    return indices + chaves
+
+
+def _recriar(cursor, particionada):
+    cursor.execute('ALTER TABLE reservas RENAME TO reservas_legado')
+    definicoes = _definicoes(cursor)
+    cursor.execute(
+        'CREATE TABLE reservas (LIKE reservas_legado INCLUDING DEFAULTS INCLUDING IDENTITY)'
+        + (' PARTITION BY RANGE (data_inicio)' if particionada else '')
+    )
+
+    if particionada:
+        cursor.execute('SELECT MIN(data_inicio) FROM reservas_legado')
+        mes = _mes(cursor.fetchone()[0] or datetime.now(timezone.utc))
+        fim = _mes(datetime.now(timezone.utc))
+        for _ in range(MESES_FUTUROS + 1):
+            fim = _proximo_mes(fim)
+        while mes < fim:
+            cursor.execute(
+                f'CREATE TABLE reservas_p{mes:%Y_%m} PARTITION OF reservas FOR VALUES FROM (%s) TO (%s)',
+                [mes, _proximo_mes(mes)],
+            )
+            mes = _proximo_mes(mes)
+        cursor.execute('CREATE TABLE reservas_padrao PARTITION OF reservas DEFAULT')
+        cursor.execute('INSERT INTO reservas SELECT * FROM reservas_legado')
+    else:
+        cursor.execute('INSERT INTO reservas SELECT * FROM reservas_legado')
+        cursor.execute('INSERT INTO reservas SELECT * FROM reservas_arquivo')
+        cursor.execute('DROP TABLE reservas_arquivo')
+
+    cursor.execute('DROP TABLE reservas_legado')
+    if not particionada:
+        cursor.execute('DROP FUNCTION reservas_sem_sobreposicao()')
+    cursor.execute("SELECT pg_get_serial_sequence('reservas', 'id')")
+    sequencia = cursor.fetchone()[0]
+    cursor.execute(f'ALTER SEQUENCE {sequencia} RENAME TO reservas_id_seq')
+    cursor.execute("SELECT setval('reservas_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM reservas")
+
+    if particionada:
+        cursor.execute('ALTER TABLE reservas ADD CONSTRAINT reservas_pkey PRIMARY KEY (id, data_inicio)')
+        cursor.execute(TRIGGER)
+        cursor.execute('CREATE TABLE reservas_arquivo (LIKE reservas INCLUDING DEFAULTS) PARTITION BY RANGE (data_inicio)')
+        cursor.execute('CREATE TABLE reservas_arquivo_padrao PARTITION OF reservas_arquivo DEFAULT')
+    else:
+        cursor.execute('ALTER TABLE reservas ADD CONSTRAINT reservas_pkey PRIMARY KEY (id)')
+        cursor.execute(f'ALTER TABLE reservas ADD CONSTRAINT reservas_sem_sobreposicao {EXCLUSAO}')
+    for definicao in definicoes:
+        cursor.execute(definicao)
+
+
+def particionar(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        _recriar(cursor, particionada=True)
+
+
+def desfazer(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        _recriar(cursor, particionada=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_reserva_indice_ativas'),
+    ]
+
+    # O estado dos modelos não muda: o ExclusionConstraint continua em Reserva.Meta
+    # para a validação do Django, mas no banco a regra agora é o trigger.
+    operations = [
+        migrations.RunPython(particionar, desfazer),
+    ]
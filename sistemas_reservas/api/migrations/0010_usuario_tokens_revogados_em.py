@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_reservas_particionadas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='tokens_revogados_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
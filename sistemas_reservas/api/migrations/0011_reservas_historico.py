@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+COLUNAS = 'id, solicitante_id, sala_id, data_inicio, data_fim, valor_total, forma_pagamento, status, criado_em, atualizada_em'
+
+VIEW = f"""
+CREATE VIEW reservas_historico AS
+    SELECT {COLUNAS}, false AS arquivada FROM reservas
+    UNION ALL
+    SELECT {COLUNAS}, true AS arquivada FROM reservas_arquivo
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_usuario_tokens_revogados_em'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(VIEW, 'DROP VIEW reservas_historico'),
+        migrations.CreateModel(
+            name='ReservaHistorico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_inicio', models.DateTimeField()),
+                ('data_fim', models.DateTimeField()),
+                ('valor_total', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('forma_pagamento', models.CharField(choices=[('PIX', 'Pix'), ('CARTAO_CREDITO', 'Cartão de Crédito'), ('CARTAO_DEBITO', 'Cartão de Débito'), ('BOLETO', 'Boleto'), ('DINHEIRO', 'Dinheiro no Local')], max_length=20)),
+                ('status', models.CharField(choices=[('PENDENTE_APROVACAO', 'Aguardando Aprovação do Dono'), ('APROVADA', 'Aprovada'), ('REJEITADA', 'Rejeitada'), ('CANCELADA', 'Cancelada pelo Solicitante'), ('CONCLUIDA', 'Concluída')], max_length=20)),
+                ('criado_em', models.DateTimeField()),
+                ('atualizada_em', models.DateTimeField()),
+                ('arquivada', models.BooleanField()),
+                ('sala', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.sala')),
+                ('solicitante', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reservas_historico',
+                'managed': False,
+            },
+        ),
+    ]
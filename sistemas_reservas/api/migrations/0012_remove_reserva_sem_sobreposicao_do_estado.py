@@ -0,0 +1,21 @@
+"""
+Tira `reservas_sem_sobreposicao` do estado dos modelos. Desde a 0009 a regra é um
+trigger no banco, não mais uma constraint de `reservas`: deixá-la no estado faria
+uma mudança futura gerar um DROP CONSTRAINT que falha. O banco não é alterado.
+"""
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_reservas_historico'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveConstraint(model_name='reserva', name='reservas_sem_sobreposicao'),
+            ],
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_remove_reserva_sem_sobreposicao_do_estado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
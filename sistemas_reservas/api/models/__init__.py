@@ -1,3 +1,7 @@
 from .user import CustomUser
 from .sala import Sala
-from .reserva import Reserva
\ No newline at end of file
+from .reserva import Reserva
+from .reserva_historico import ReservaHistorico
+from .ocupacao_diaria import OcupacaoDiaria
+from .ponto_de_controle import PontoDeControle
+from .tarifa_sala import TarifaSala
@@ -0,0 +1,36 @@
+from django.contrib.postgres.search import SearchVector
+from django.db import models
+from django.db.models.functions import Lower
+
+# Configuração de busca textual do Postgres (stemming em português)
+CONFIG_BUSCA = 'portuguese'
+
+# Sem a extensão unaccent, os acentos são removidos com translate(), que é IMMUTABLE
+# e pode entrar numa coluna gerada. A mesma tabela é aplicada ao texto digitado.
+# As maiúsculas acentuadas entram porque lower() não as converte em bancos com locale C.
+ACENTUADAS = 'áàâãäéèêëíìîïóòôõöúùûüçñÁÀÂÃÄÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇÑ'
+SEM_ACENTO = 'aaaaaeeeeiiiiooooouuuucn' * 2
+TABELA_SEM_ACENTO = str.maketrans(ACENTUADAS, SEM_ACENTO)
+
+
+class SemAcentos(models.Func):
+    """translate(lower(texto), acentuadas, sem acento)."""
+    function = 'translate'
+    output_field = models.TextField()
+
+    def __init__(self, expressao, **extra):
+        super().__init__(Lower(expressao), models.Value(ACENTUADAS), models.Value(SEM_ACENTO), **extra)
+
+
+def sem_acentos(texto):
+    """Mesma normalização de SemAcentos, feita em Python (para o termo buscado)."""
+    return texto.lower().translate(TABELA_SEM_ACENTO)
+
+
+def vetor_de_busca(pesos):
+    """tsvector ponderado ({campo: peso 'A'..'D'}) sobre os campos sem acento."""
+    vetores = [SearchVector(SemAcentos(campo), config=CONFIG_BUSCA, weight=peso) for campo, peso in pesos.items()]
+    vetor = vetores[0]
+    for outro in vetores[1:]:
+        vetor = vetor + outro
+    return vetor
@@ -0,0 +1,38 @@
+from datetime import timedelta
+from django.db import models
+from .sala import Sala
+
+class OcupacaoDiaria(models.Model):
+    """
+    Rollup diário das reservas de cada sala (pelo dia de início da reserva),
+    mantido pelo comando `atualizar_ocupacao`. Evita varrer `reservas` nos relatórios.
+    """
+    sala = models.ForeignKey(Sala, on_delete=models.CASCADE, related_name='ocupacao_diaria')
+    dia = models.DateField()
+
+    total_reservas = models.PositiveIntegerField(default=0)
+    qtd_pendente_aprovacao = models.PositiveIntegerField(default=0)
+    qtd_aprovada = models.PositiveIntegerField(default=0)
+    qtd_rejeitada = models.PositiveIntegerField(default=0)
+    qtd_cancelada = models.PositiveIntegerField(default=0)
+    qtd_concluida = models.PositiveIntegerField(default=0)
+
+    # Receita e tempo consideram só reservas confirmadas (APROVADA/CONCLUIDA)
+    receita_pix = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    receita_cartao_credito = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    receita_cartao_debito = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    receita_boleto = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    receita_dinheiro = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    tempo_reservado = models.DurationField(default=timedelta)
+
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ocupacao_diaria"
+        ordering = ['sala', 'dia']
+        constraints = [
+            models.UniqueConstraint(fields=['sala', 'dia'], name='ocupacao_diaria_sala_dia'),
+        ]
+
+    def __str__(self):
+        return f"{self.sala_id} - {self.dia}"
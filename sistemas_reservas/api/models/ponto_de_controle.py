@@ -0,0 +1,13 @@
+from django.db import models
+
+class PontoDeControle(models.Model):
+    """Marca d'água persistente de rotinas incrementais (ex.: rollup de ocupação)."""
+    nome = models.CharField(max_length=50, unique=True)
+    marca = models.DateTimeField(null=True, blank=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "pontos_de_controle"
+
+    def __str__(self):
+        return f"{self.nome}: {self.marca}"
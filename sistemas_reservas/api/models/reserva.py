@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from .sala import Sala
 
 class Reserva(models.Model):
@@ -32,15 +33,45 @@ class Reserva(models.Model):
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizada_em = models.DateTimeField(auto_now=True)
 
+    STATUS_ATIVOS = ['PENDENTE_APROVACAO', 'APROVADA']
+    STATUS_CONFIRMADOS = ['APROVADA', 'CONCLUIDA']
+
     class Meta:
         ordering = ['-criado_em']
         db_table = "reservas"
-        
+        indexes = [
+            # Um índice por lado da visibilidade de ReservaViewSet, já na ordem padrão (-criado_em).
+            models.Index(fields=['solicitante', '-criado_em'], name='reservas_solicitante_criado'),
+            models.Index(fields=['sala', '-criado_em'], name='reservas_sala_criado'),
+            # Só o conjunto ativo, que a checagem de conflitos consulta; o encerramento periódico o mantém pequeno.
+            models.Index(
+                fields=['sala', 'data_inicio', 'data_fim'], name='reservas_ativas_periodo',
+                condition=models.Q(status__in=['PENDENTE_APROVACAO', 'APROVADA']),
+            ),
+        ]
+        # A regra "sem reservas ativas sobrepostas na mesma sala" vive no banco: foi uma
+        # ExclusionConstraint (0002) e, com a tabela particionada, é um trigger de mesmo
+        # nome (0009). Saiu do estado dos modelos na 0012; clean() valida do lado do Django.
+
+    def clean(self):
+        super().clean()
+        if self.status not in self.STATUS_ATIVOS or not (self.sala_id and self.data_inicio and self.data_fim):
+            return
+        sobrepostas = Reserva.objects.filter(
+            sala_id=self.sala_id, status__in=self.STATUS_ATIVOS,
+            data_inicio__lt=self.data_fim, data_fim__gt=self.data_inicio,
+        ).exclude(pk=self.pk)
+        if sobrepostas.exists():
+            raise ValidationError("Já existe uma reserva ativa neste horário para a sala.")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        reserva = super().from_db(db, field_names, values)
+        # Guarda a sala e o início lidos do banco para saber de qual (sala, dia) a reserva saiu se mudarem
+        carregados = dict(zip(field_names, values))
+        reserva._sala_id_carregada = carregados.get('sala_id')
+        reserva._data_inicio_carregada = carregados.get('data_inicio')
+        return reserva
+
     def __str__(self):
         return f"Reserva {self.id} - {self.sala.nome} ({self.status})"
-    
-    def calcular_valor_total(self):
-        if self.data_inicio and self.data_fim and self.sala.preco_por_hora:
-            diff = self.data_fim - self.data_inicio
-            horas = diff.total_seconds() / 3600
-            self.valor_total = round(float(self.sala.preco_por_hora) * horas, 2)
\ No newline at end of file
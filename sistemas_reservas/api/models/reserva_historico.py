@@ -0,0 +1,32 @@
+from django.db import models
+from django.conf import settings
+from .reserva import Reserva
+from .sala import Sala
+
+class ReservaHistorico(models.Model):
+    """
+    Somente leitura: a view `reservas_historico` junta `reservas` e `reservas_arquivo`
+    (migração 0011), para relatórios e rollup enxergarem também os meses arquivados.
+    Filtros por `data_inicio` continuam descartando partições nos dois lados.
+    O arquivo não tem FKs, então sala e solicitante podem não existir mais.
+    """
+    solicitante = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    sala = models.ForeignKey(Sala, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+
+    data_inicio = models.DateTimeField()
+    data_fim = models.DateTimeField()
+
+    valor_total = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    forma_pagamento = models.CharField(max_length=20, choices=Reserva.PAGAMENTO_CHOICES)
+    status = models.CharField(max_length=20, choices=Reserva.STATUS_CHOICES)
+
+    criado_em = models.DateTimeField()
+    atualizada_em = models.DateTimeField()
+    arquivada = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = "reservas_historico"
+
+    def __str__(self):
+        return f"Reserva {self.id} ({self.status})"
@@ -1,5 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from .busca import vetor_de_busca
 
 class Sala(models.Model):
     dono = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='salas')
@@ -20,10 +23,24 @@ class Sala(models.Model):
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
+    # Documento da busca textual (?q=), calculado pelo próprio Postgres a cada INSERT/UPDATE
+    PESOS_BUSCA = {'nome': 'A', 'bairro': 'B', 'cidade': 'B', 'descricao': 'C'}
+    busca = models.GeneratedField(
+        expression=vetor_de_busca(PESOS_BUSCA),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
     class Meta:
         verbose_name = "Sala"
         verbose_name_plural = "Salas"
         db_table = "salas"
+        indexes = [
+            GinIndex(fields=['busca'], name='salas_busca_gin'),
+            # Faixas de preço/capacidade dentro de uma cidade viram range scans
+            models.Index(fields=['cidade', 'disponivel', 'preco_por_hora'], name='salas_cidade_disp_preco'),
+            models.Index(fields=['cidade', 'capacidade'], name='salas_cidade_capacidade'),
+        ]
 
     def __str__(self):
         return f"{self.nome} ({self.cidade}/{self.estado})"
\ No newline at end of file
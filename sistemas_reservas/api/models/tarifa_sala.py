@@ -0,0 +1,44 @@
+from datetime import time
+from decimal import Decimal
+from django.db import models
+from .sala import Sala
+
+class TarifaSala(models.Model):
+    """
+    Multiplicador do preço por hora de uma sala numa faixa de horário
+    [hora_inicio, hora_fim), em todos os dias ou num dia da semana específico.
+    `hora_fim` 00:00 significa até o fim do dia. Se várias faixas se aplicam,
+    vale o maior multiplicador.
+    """
+    DIAS_SEMANA = [
+        (0, 'Segunda'), (1, 'Terça'), (2, 'Quarta'), (3, 'Quinta'),
+        (4, 'Sexta'), (5, 'Sábado'), (6, 'Domingo'),
+    ]
+
+    sala = models.ForeignKey(Sala, on_delete=models.CASCADE, related_name='tarifas')
+    dia_semana = models.PositiveSmallIntegerField(choices=DIAS_SEMANA, null=True, blank=True, help_text="Vazio = todos os dias")
+    hora_inicio = models.TimeField(default=time(0))
+    hora_fim = models.TimeField(default=time(0))
+    multiplicador = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('1.00'))
+
+    class Meta:
+        db_table = "tarifas_sala"
+        ordering = ['sala', 'dia_semana', 'hora_inicio']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(hora_inicio__lt=models.F('hora_fim')) | models.Q(hora_fim=time(0)),
+                name='tarifas_sala_faixa_valida',
+            ),
+            models.CheckConstraint(condition=models.Q(multiplicador__gt=0), name='tarifas_sala_multiplicador_positivo'),
+        ]
+
+    def __str__(self):
+        dia = self.get_dia_semana_display() if self.dia_semana is not None else 'Todos os dias'
+        return f"{self.sala_id} - {dia} {self.hora_inicio:%H:%M}-{self.hora_fim:%H:%M} x{self.multiplicador}"
+
+    def aplica_em(self, data_hora_local):
+        """Se a faixa vale para o instante (já no fuso local)."""
+        if self.dia_semana is not None and self.dia_semana != data_hora_local.weekday():
+            return False
+        hora = data_hora_local.time()
+        return self.hora_inicio <= hora and (self.hora_fim == time(0) or hora < self.hora_fim)
@@ -8,8 +8,20 @@ class CustomUser(AbstractUser):
     
     email = models.EmailField(unique=True)
 
+    # Tokens JWT emitidos antes deste instante são recusados (ver AutenticacaoService)
+    tokens_revogados_em = models.DateTimeField(blank=True, null=True)
+    # Entra no ETag das respostas que exibem o username (salas, reservas)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
     class Meta:
         db_table = "usuarios"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        usuario = super().from_db(db, field_names, values)
+        # Guarda o is_staff lido do banco para revogar os tokens se ele mudar
+        usuario._is_staff_carregado = dict(zip(field_names, values)).get('is_staff')
+        return usuario
+
     def __str__(self):
         return self.username
\ No newline at end of file
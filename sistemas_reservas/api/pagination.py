@@ -0,0 +1,66 @@
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class PaginacaoComCursorOpcional(BasePagination):
+    """
+    Mantém a paginação por número de página (com `count`) como padrão e troca para
+    paginação por cursor (keyset) quando a requisição traz `?paginacao=cursor` ou `?cursor=`.
+    No modo cursor não há OFFSET nem COUNT(*): a página N custa o mesmo que a primeira.
+    """
+    ordering = ('-id',)
+
+    def __init__(self):
+        self.por_pagina = PageNumberPagination()
+        self.por_cursor = CursorPagination()
+        self.por_cursor.ordering = self.ordering
+        self.atual = self.por_pagina
+
+    def usa_cursor(self, request):
+        params = request.query_params
+        return params.get('paginacao') == 'cursor' or self.por_cursor.cursor_query_param in params
+
+    def ordenacao_cursor(self, request):
+        """Ordem do keyset; o CursorPagination reordena o queryset com ela."""
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.atual = self.por_cursor if self.usa_cursor(request) else self.por_pagina
+        if self.atual is self.por_cursor:
+            self.por_cursor.ordering = self.ordenacao_cursor(request)
+        pagina = self.atual.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.atual.display_page_controls
+        return pagina
+
+    def get_paginated_response(self, data):
+        return self.atual.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.por_pagina.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.atual.to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return self.por_pagina.get_schema_operation_parameters(view) + self.por_cursor.get_schema_operation_parameters(view)
+
+
+class PaginacaoReservas(PaginacaoComCursorOpcional):
+    ordering = ('-criado_em', '-id')
+
+
+class PaginacaoSalas(PaginacaoComCursorOpcional):
+    """
+    No modo cursor segue o `?ordenar=` do SalaFilter, com o id de desempate.
+    A relevância de `?q=` não serve de chave (float); SalaViewSet recusa q + cursor.
+    """
+    ordering = ('id',)
+    CAMPOS_ORDENAR = {'preco': 'preco_por_hora', 'capacidade': 'capacidade'}
+
+    def ordenacao_cursor(self, request):
+        campos = []
+        for valor in request.query_params.get('ordenar', '').split(','):
+            valor = valor.strip()
+            campo = self.CAMPOS_ORDENAR.get(valor.lstrip('-'))
+            if campo:
+                campos.append(('-' if valor.startswith('-') else '') + campo)
+        return (*campos, 'id') if campos else self.ordering
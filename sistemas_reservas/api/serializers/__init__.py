@@ -1,3 +1,7 @@
 from .user_serializer import UserSerializer
 from .sala_serializer import SalaSerializer
-from .reserva_serializer import ReservaSerializer
\ No newline at end of file
+from .reserva_serializer import ReservaSerializer
+from .reserva_serie_serializer import ReservaSerieSerializer
+from .cotacao_serializer import CotacaoSerializer
+from .resposta_lote_serializer import RespostaLoteSerializer
+from .token_serializer import TokenComDadosSerializer, RenovacaoTokenSerializer
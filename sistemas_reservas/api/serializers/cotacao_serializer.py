@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from api.services import TarifaService
+
+class ItemCotacaoSerializer(serializers.Serializer):
+    """Um intervalo a cotar. A sala é só o id: a existência é checada no lote inteiro."""
+    sala = serializers.IntegerField(min_value=1)
+    data_inicio = serializers.DateTimeField()
+    data_fim = serializers.DateTimeField()
+
+    def validate(self, data):
+        if data['data_inicio'] >= data['data_fim']:
+            raise serializers.ValidationError("Data de início deve ser anterior ao fim.")
+        return data
+
+class CotacaoSerializer(serializers.Serializer):
+    itens = ItemCotacaoSerializer(many=True, allow_empty=False, max_length=TarifaService.MAX_ITENS)
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from api.models import Reserva
-from api.services import ReservaService
+from api.services import ReservaService, ConflitoDeHorario
+
+MENSAGEM_INDISPONIVEL = "Sala indisponível para este horário."
 
 class ReservaSerializer(serializers.ModelSerializer):
     sala_nome = serializers.CharField(source='sala.nome', read_only=True)
@@ -12,13 +14,32 @@ class ReservaSerializer(serializers.ModelSerializer):
         read_only_fields = ('solicitante', 'status', 'valor_total', 'criado_em', 'atualizada_em')
 
     def validate(self, data):
-        if data['data_inicio'] >= data['data_fim']:
+        # Num PATCH, o que não veio continua como está na reserva
+        inicio = data.get('data_inicio') or self.instance.data_inicio
+        fim = data.get('data_fim') or self.instance.data_fim
+        if inicio >= fim:
             raise serializers.ValidationError("Data de início deve ser anterior ao fim.")
-            
+        if self.instance and not {'sala', 'data_inicio', 'data_fim'} & set(data):
+            return data
+
         sala = data.get('sala') or self.instance.sala
         reserva_id = self.instance.id if self.instance else None
 
-        if not ReservaService.verificar_disponibilidade(sala, data['data_inicio'], data['data_fim'], reserva_id):
-            raise serializers.ValidationError("Sala indisponível para este horário.")
+        if not ReservaService.verificar_disponibilidade(sala, inicio, fim, reserva_id):
+            raise serializers.ValidationError(MENSAGEM_INDISPONIVEL)
+
+        return data
+
+    def create(self, validated_data):
+        try:
+            with ReservaService.proteger_sobreposicao():
+                return super().create(validated_data)
+        except ConflitoDeHorario:
+            raise serializers.ValidationError(MENSAGEM_INDISPONIVEL)
 
-        return data
\ No newline at end of file
+    def update(self, instance, validated_data):
+        try:
+            with ReservaService.proteger_sobreposicao():
+                return super().update(instance, validated_data)
+        except ConflitoDeHorario:
+            raise serializers.ValidationError(MENSAGEM_INDISPONIVEL)
@@ -0,0 +1,45 @@
+from datetime import timedelta
+from rest_framework import serializers
+from api.models import Sala, Reserva
+
+class ReservaSerieSerializer(serializers.Serializer):
+    """Entrada de uma série recorrente: a primeira ocorrência + regra de repetição."""
+    MAX_OCORRENCIAS = 366
+    PASSOS = {'DIARIA': timedelta(days=1), 'SEMANAL': timedelta(weeks=1)}
+
+    sala = serializers.PrimaryKeyRelatedField(queryset=Sala.objects.all())
+    data_inicio = serializers.DateTimeField()
+    data_fim = serializers.DateTimeField()
+    forma_pagamento = serializers.ChoiceField(choices=Reserva.PAGAMENTO_CHOICES)
+    frequencia = serializers.ChoiceField(choices=list(PASSOS))
+    intervalo = serializers.IntegerField(min_value=1, default=1)
+    quantidade = serializers.IntegerField(min_value=1, max_value=MAX_OCORRENCIAS, required=False)
+    ate = serializers.DateTimeField(required=False)
+    pular_conflitos = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['data_inicio'] >= data['data_fim']:
+            raise serializers.ValidationError("Data de início deve ser anterior ao fim.")
+        if ('quantidade' in data) == ('ate' in data):
+            raise serializers.ValidationError("Informe 'quantidade' ou 'ate' (apenas um deles).")
+
+        passo = self.PASSOS[data['frequencia']] * data['intervalo']
+        duracao = data['data_fim'] - data['data_inicio']
+        if duracao > passo:
+            raise serializers.ValidationError("As ocorrências da série não podem se sobrepor.")
+
+        ocorrencias = []
+        inicio = data['data_inicio']
+        while len(ocorrencias) < data.get('quantidade', self.MAX_OCORRENCIAS + 1):
+            if 'ate' in data and inicio > data['ate']:
+                break
+            ocorrencias.append((inicio, inicio + duracao))
+            inicio += passo
+
+        if not ocorrencias:
+            raise serializers.ValidationError("A série não tem nenhuma ocorrência.")
+        if len(ocorrencias) > self.MAX_OCORRENCIAS:
+            raise serializers.ValidationError(f"A série pode ter no máximo {self.MAX_OCORRENCIAS} ocorrências.")
+
+        data['ocorrencias'] = ocorrencias
+        return data
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+from api.services import ReservaService
+
+class DecisaoSerializer(serializers.Serializer):
+    """Uma decisão do dono; a ação aceita maiúsculas ou minúsculas, como em /responder/."""
+    ACOES = ['APROVAR', 'REJEITAR']
+
+    id = serializers.IntegerField(min_value=1)
+    acao = serializers.CharField()
+
+    def validate_acao(self, valor):
+        valor = valor.upper()
+        if valor not in self.ACOES:
+            raise serializers.ValidationError("Ação inválida.")
+        return valor
+
+class RespostaLoteSerializer(serializers.Serializer):
+    decisoes = DecisaoSerializer(many=True, allow_empty=False, max_length=ReservaService.MAX_DECISOES)
+
+    def validate_decisoes(self, decisoes):
+        ids = [d['id'] for d in decisoes]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Cada reserva pode aparecer uma única vez.")
+        return {d['id']: d['acao'] for d in decisoes}
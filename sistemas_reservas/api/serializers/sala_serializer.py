@@ -6,5 +6,5 @@ class SalaSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Sala
-        fields = '__all__'
+        exclude = ('busca',)
         read_only_fields = ('dono', 'criado_em', 'atualizado_em')
\ No newline at end of file
@@ -0,0 +1,42 @@
+import time
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from api.services import AutenticacaoService
+
+class TokenComDadosSerializer(TokenObtainPairSerializer):
+    """Inclui no token as claims que a autenticação sem consulta e a revogação usam (o access herda do refresh)."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        cls.copiar_claims(token, user)
+        token['emitido_em'] = time.time()
+        AutenticacaoService.lembrar(user)
+        return token
+
+    @staticmethod
+    def copiar_claims(token, user):
+        token['username'] = user.username
+        token['is_staff'] = user.is_staff
+
+class RenovacaoTokenSerializer(TokenRefreshSerializer):
+    """
+    Não renova refresh tokens revogados, de usuário inativo ou apagado, e monta
+    as claims do access novo a partir da linha atual do usuário, não do refresh.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        usuario = get_user_model().objects.filter(pk=refresh.get(jwt_settings.USER_ID_CLAIM)).first()
+        if refresh.get('emitido_em', refresh.get('iat', 0)) < AutenticacaoService.marca(usuario):
+            raise InvalidToken("Token revogado.")
+        AutenticacaoService.lembrar(usuario)
+
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        TokenComDadosSerializer.copiar_claims(access, usuario)
+        data['access'] = str(access)
+        return data
@@ -1 +1,13 @@
-from .reserva_service import ReservaService
\ No newline at end of file
+from .tarifa_service import TarifaService
+from .reserva_service import ReservaService, ConflitoDeHorario
+from .indice_disponibilidade import IndiceDisponibilidade, indice_disponibilidade
+from .agenda_service import AgendaService
+from .catalogo_cache import CatalogoCache
+from .relatorio_service import RelatorioService
+from .exportacao_service import ExportacaoService
+from .ocupacao_service import OcupacaoService
+from .busca_service import BuscaService
+from .ciclo_vida_service import CicloDeVidaService
+from .particionamento_service import ParticionamentoService
+from .autenticacao_service import AutenticacaoService
+from .painel_service import PainelService
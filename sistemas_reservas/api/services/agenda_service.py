@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from api.models import Reserva
+
+
+class AgendaService:
+    """
+    Monta a ocupação de uma sala como um bitmap por dia: cada bit é um slot
+    de `granularidade` minutos (o primeiro slot é o bit mais significativo),
+    serializado em hexadecimal. Os dias ficam em cache por sala, com uma versão
+    que é incrementada a cada alteração de reserva da sala.
+    """
+    GRANULARIDADES = {'5m': 5, '15m': 15, '30m': 30, '1h': 60}
+    TEMPO_CACHE = 60 * 60
+
+    @staticmethod
+    def _chave_versao(sala_id):
+        return f'agenda:versao:{sala_id}'
+
+    @staticmethod
+    def _versao(sala_id):
+        chave = AgendaService._chave_versao(sala_id)
+        # Nunca reinicia em 1: se a versão sumir do cache, entradas antigas não voltam a valer.
+        cache.add(chave, time.time_ns(), None)
+        return cache.get(chave)
+
+    @staticmethod
+    def invalidar(sala_id):
+        try:
+            cache.incr(AgendaService._chave_versao(sala_id))
+        except ValueError:
+            pass
+
+    @staticmethod
+    def montar(sala_id, de, ate, granularidade='15m'):
+        """Retorna {data: bitmap_hex} de `de` até `ate` (inclusive)."""
+        minutos = AgendaService.GRANULARIDADES[granularidade]
+        versao = AgendaService._versao(sala_id)
+        dias = [de + timedelta(days=n) for n in range((ate - de).days + 1)]
+        chaves = {dia: f'agenda:{sala_id}:{versao}:{granularidade}:{dia.isoformat()}' for dia in dias}
+
+        em_cache = cache.get_many(chaves.values())
+        agenda = {dia: em_cache[chave] for dia, chave in chaves.items() if chave in em_cache}
+        faltando = [dia for dia in dias if dia not in agenda]
+
+        if faltando:
+            calculados = AgendaService._calcular(sala_id, faltando[0], faltando[-1], minutos)
+            novos = {dia: calculados[dia] for dia in faltando}
+            cache.set_many({chaves[dia]: bitmap for dia, bitmap in novos.items()}, AgendaService.TEMPO_CACHE)
+            agenda.update(novos)
+
+        return {dia.isoformat(): agenda[dia] for dia in dias}
+
+    @staticmethod
+    def _inicio_do_dia(dia):
+        return timezone.make_aware(datetime.combine(dia, datetime.min.time()))
+
+    @staticmethod
+    def _calcular(sala_id, de, ate, minutos):
+        """Calcula os bitmaps de um intervalo de dias com uma única consulta por faixa."""
+        slots = 24 * 60 // minutos
+        passo = timedelta(minutes=minutos)
+        inicio_periodo = AgendaService._inicio_do_dia(de)
+        fim_periodo = AgendaService._inicio_do_dia(ate + timedelta(days=1))
+
+        mascaras = {de + timedelta(days=n): 0 for n in range((ate - de).days + 1)}
+        reservas = Reserva.objects.filter(
+            sala_id=sala_id,
+            status__in=Reserva.STATUS_ATIVOS,
+            data_inicio__lt=fim_periodo,
+            data_fim__gt=inicio_periodo,
+        ).values_list('data_inicio', 'data_fim')
+
+        for data_inicio, data_fim in reservas:
+            dia = max(timezone.localtime(data_inicio).date(), de)
+            while dia <= ate:
+                inicio_dia = AgendaService._inicio_do_dia(dia)
+                if inicio_dia >= data_fim:
+                    break
+                primeiro = max(0, (data_inicio - inicio_dia) // passo)
+                ultimo = min(slots, -((inicio_dia - data_fim) // passo))
+                if ultimo > primeiro:
+                    mascaras[dia] |= ((1 << (ultimo - primeiro)) - 1) << (slots - ultimo)
+                dia += timedelta(days=1)
+
+        return {dia: format(mascara, f'0{slots // 4}x') for dia, mascara in mascaras.items()}
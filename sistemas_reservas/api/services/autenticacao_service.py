@@ -0,0 +1,108 @@
+import math
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+class AutenticacaoService:
+    """
+    Apoio à autenticação JWT sem consulta (api.autenticacao): guarda por pouco
+    tempo a linha completa do usuário, para as escritas que precisam dela, e a
+    marca de revogação. A marca fica no banco (`usuarios.tokens_revogados_em`),
+    então vale para todos os processos e sobrevive a reinícios; o cache só evita
+    lê-la a cada requisição, por AUTENTICACAO_CACHE_REVOGACAO segundos. Uma
+    revogação invalida os tokens emitidos antes dela (claim `emitido_em`, com
+    fração de segundo, copiada do refresh para os access derivados dele); usuário
+    inativo ou apagado tem todos os tokens recusados.
+    """
+    CHAVE_USUARIO = 'auth:usuario:{}'
+    CHAVE_REVOGACAO = 'auth:revogado:{}'
+
+    @staticmethod
+    def usuario(usuario):
+        """
+        CustomUser do usuário autenticado (instância do modelo ou usuário do token),
+        lido do cache quando AUTENTICACAO_CACHE_USUARIO > 0. Usuário apagado vira 401.
+        """
+        modelo = get_user_model()
+        if isinstance(usuario, modelo):
+            return usuario
+        tempo = getattr(settings, 'AUTENTICACAO_CACHE_USUARIO', 0)
+        chave = AutenticacaoService.CHAVE_USUARIO.format(usuario.pk)
+        completo = cache.get(chave) if tempo else None
+        if completo is None:
+            try:
+                completo = modelo.objects.get(pk=usuario.pk)
+            except modelo.DoesNotExist:
+                raise AuthenticationFailed("Usuário não encontrado.", code='user_not_found')
+            if tempo:
+                cache.set(chave, completo, tempo)
+        return completo
+
+    @staticmethod
+    def esquecer(usuario_id):
+        cache.delete_many([
+            AutenticacaoService.CHAVE_USUARIO.format(usuario_id),
+            AutenticacaoService.CHAVE_REVOGACAO.format(usuario_id),
+        ])
+
+    @staticmethod
+    def revogar(usuario):
+        """Recusa, daqui em diante, os tokens do usuário emitidos até agora."""
+        usuario.tokens_revogados_em = timezone.now()
+        get_user_model().objects.filter(pk=usuario.pk).update(tokens_revogados_em=usuario.tokens_revogados_em)
+        AutenticacaoService.esquecer(usuario.pk)
+
+    @staticmethod
+    def marca(usuario):
+        """Instante (epoch) antes do qual os tokens do usuário não valem; infinito se inativo ou apagado."""
+        if usuario is None or not usuario.is_active:
+            return math.inf
+        return usuario.tokens_revogados_em.timestamp() if usuario.tokens_revogados_em else 0
+
+    @staticmethod
+    def lembrar(usuario):
+        """Guarda a marca de quem acabou de ser lido do banco (login, renovação), poupando a consulta seguinte."""
+        tempo = AutenticacaoService._tempo_cache()
+        if tempo:
+            cache.set(AutenticacaoService.CHAVE_REVOGACAO.format(usuario.pk), AutenticacaoService.marca(usuario), tempo)
+
+    @staticmethod
+    def _consulta(usuario_id):
+        return get_user_model().objects.filter(pk=usuario_id).only('is_active', 'tokens_revogados_em')
+
+    @staticmethod
+    def _tempo_cache():
+        return getattr(settings, 'AUTENTICACAO_CACHE_REVOGACAO', 0)
+
+    @staticmethod
+    def _emitido_em(token):
+        return token.get('emitido_em', token.get('iat', 0))
+
+    @staticmethod
+    def revogado(token):
+        usuario_id = token.get(jwt_settings.USER_ID_CLAIM)
+        chave = AutenticacaoService.CHAVE_REVOGACAO.format(usuario_id)
+        tempo = AutenticacaoService._tempo_cache()
+        marca = cache.get(chave) if tempo else None
+        if marca is None:
+            marca = AutenticacaoService.marca(AutenticacaoService._consulta(usuario_id).first())
+            if tempo:
+                cache.set(chave, marca, tempo)
+        return AutenticacaoService._emitido_em(token) < marca
+
+    @staticmethod
+    async def arevogado(token):
+        """revogado() para as views assíncronas, sem bloquear o event loop."""
+        usuario_id = token.get(jwt_settings.USER_ID_CLAIM)
+        chave = AutenticacaoService.CHAVE_REVOGACAO.format(usuario_id)
+        tempo = AutenticacaoService._tempo_cache()
+        marca = await cache.aget(chave) if tempo else None
+        if marca is None:
+            marca = AutenticacaoService.marca(await AutenticacaoService._consulta(usuario_id).afirst())
+            if tempo:
+                await cache.aset(chave, marca, tempo)
+        return AutenticacaoService._emitido_em(token) < marca
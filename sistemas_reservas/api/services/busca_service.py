@@ -0,0 +1,23 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+from api.models.busca import CONFIG_BUSCA, sem_acentos
+
+
+class BuscaService:
+    """Busca textual de salas sobre a coluna gerada `Sala.busca` (índice GIN)."""
+    TAMANHO_MAXIMO = 200
+
+    @staticmethod
+    def consulta(texto):
+        """Termo do usuário (sintaxe de buscador: aspas, OR, -palavra) sem acentos, como o documento."""
+        return SearchQuery(sem_acentos(texto), config=CONFIG_BUSCA, search_type='websearch')
+
+    @staticmethod
+    def buscar_salas(salas, texto):
+        """Restringe às salas que casam com o texto, das mais relevantes (ts_rank) para as menos."""
+        consulta = BuscaService.consulta(texto)
+        return (
+            salas.filter(busca=consulta)
+            .annotate(relevancia=SearchRank(F('busca'), consulta))
+            .order_by('-relevancia', 'id')
+        )
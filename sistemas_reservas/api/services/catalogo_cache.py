@@ -0,0 +1,105 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+
+class CatalogoCache:
+    """
+    Cache das respostas públicas de salas (listagem e detalhe) no cache do Django.
+    As chaves levam uma versão global que é incrementada sempre que uma sala muda,
+    então uma página velha nunca é servida. Só entram requisições cujos parâmetros
+    estão em PARAMETROS; qualquer outro (ex.: `minhas`) desvia do cache.
+    Os métodos com prefixo `a` são as versões para as views assíncronas, com as
+    chamadas async do cache (aget, aadd, aset), que não bloqueiam o event loop.
+    """
+    PARAMETROS = {
+        'cidade', 'estado', 'bairro', 'disponivel', 'dono', 'q',
+        'capacidade_min', 'capacidade_max', 'preco_min', 'preco_max', 'ordenar',
+        'page', 'paginacao', 'cursor',
+    }
+    CHAVE_VERSAO = 'catalogo:versao'
+    CHAVE_ACERTOS = 'catalogo:acertos'
+    CHAVE_FALHAS = 'catalogo:falhas'
+
+    @staticmethod
+    def _versao():
+        cache.add(CatalogoCache.CHAVE_VERSAO, time.time_ns(), None)
+        return cache.get(CatalogoCache.CHAVE_VERSAO)
+
+    @staticmethod
+    async def _aversao():
+        await cache.aadd(CatalogoCache.CHAVE_VERSAO, time.time_ns(), None)
+        return await cache.aget(CatalogoCache.CHAVE_VERSAO)
+
+    @staticmethod
+    def _resumo(request, recurso):
+        """Hash dos parâmetros normalizados, ou None se a requisição não puder usar o cache."""
+        params = getattr(request, 'query_params', request.GET)  # request do DRF ou HttpRequest (views async)
+        if not set(params).issubset(CatalogoCache.PARAMETROS):
+            return None
+        normalizados = sorted((nome, valor) for nome in params for valor in params.getlist(nome) if valor != '')
+        bruto = f'{request.get_host()}|{recurso}|{normalizados}'
+        return hashlib.md5(bruto.encode()).hexdigest()
+
+    @staticmethod
+    def chave(request, recurso):
+        """Chave normalizada da requisição, ou None se ela não puder usar o cache."""
+        resumo = CatalogoCache._resumo(request, recurso)
+        return resumo and f'catalogo:{CatalogoCache._versao()}:{resumo}'
+
+    @staticmethod
+    async def achave(request, recurso):
+        resumo = CatalogoCache._resumo(request, recurso)
+        return resumo and f'catalogo:{await CatalogoCache._aversao()}:{resumo}'
+
+    @staticmethod
+    def obter(chave):
+        dados = cache.get(chave)
+        CatalogoCache._contar(CatalogoCache.CHAVE_FALHAS if dados is None else CatalogoCache.CHAVE_ACERTOS)
+        return dados
+
+    @staticmethod
+    async def aobter(chave):
+        dados = await cache.aget(chave)
+        await CatalogoCache._acontar(CatalogoCache.CHAVE_FALHAS if dados is None else CatalogoCache.CHAVE_ACERTOS)
+        return dados
+
+    @staticmethod
+    def guardar(chave, dados):
+        cache.set(chave, dados, getattr(settings, 'CATALOGO_CACHE_TIMEOUT', 300))
+
+    @staticmethod
+    async def aguardar(chave, dados):
+        await cache.aset(chave, dados, getattr(settings, 'CATALOGO_CACHE_TIMEOUT', 300))
+
+    @staticmethod
+    def invalidar():
+        try:
+            cache.incr(CatalogoCache.CHAVE_VERSAO)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def estatisticas():
+        valores = cache.get_many([CatalogoCache.CHAVE_ACERTOS, CatalogoCache.CHAVE_FALHAS])
+        return {
+            "acertos": valores.get(CatalogoCache.CHAVE_ACERTOS, 0),
+            "falhas": valores.get(CatalogoCache.CHAVE_FALHAS, 0),
+        }
+
+    @staticmethod
+    def _contar(chave):
+        if not cache.add(chave, 1, None):
+            try:
+                cache.incr(chave)
+            except ValueError:
+                cache.set(chave, 1, None)
+
+    @staticmethod
+    async def _acontar(chave):
+        if not await cache.aadd(chave, 1, None):
+            try:
+                await cache.aincr(chave)
+            except ValueError:
+                await cache.aset(chave, 1, None)
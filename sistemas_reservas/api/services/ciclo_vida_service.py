@@ -0,0 +1,79 @@
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from api.models import PontoDeControle, Reserva
+from .reserva_service import ReservaService
+
+
+class CicloDeVidaService:
+    """
+    Encerra reservas cujo horário já passou: aprovadas que terminaram viram
+    CONCLUIDA e pendentes que começaram sem resposta do dono viram REJEITADA.
+    Assim o conjunto ativo (o que a checagem de conflitos percorre) só guarda o futuro.
+
+    O ponto de controle guarda o corte da última varredura; a seguinte só olha
+    reservas cujo horário passou depois dele (menos MARGEM), o que com a tabela
+    particionada por data_inicio descarta as partições antigas. A margem cobre
+    linhas puladas por estarem travadas; `completa` ignora o ponto de controle.
+    """
+    NOME_MARCA = 'ciclo_de_vida'
+    MARGEM = timedelta(days=1)
+    TAMANHO_LOTE = 1000
+    TRANSICOES = (
+        # (nome no resultado, status atual, campo que já passou, novo status)
+        ('concluidas', 'APROVADA', 'data_fim', 'CONCLUIDA'),
+        ('expiradas', 'PENDENTE_APROVACAO', 'data_inicio', 'REJEITADA'),
+    )
+
+    @staticmethod
+    def _transicionar(status, campo, novo_status, agora, tamanho_lote, desde=None):
+        """
+        Percorre as reservas por id em lotes, cada um na sua transação: trava o lote
+        (pulando linhas presas em outra transação, que ficam para a próxima execução)
+        e troca o status com um único UPDATE.
+        """
+        total, ultimo_id = 0, 0
+        periodo = {f'{campo}__lte': agora}
+        if desde is not None:
+            periodo[f'{campo}__gt'] = desde
+        while True:
+            with transaction.atomic():
+                lote = list(
+                    Reserva.objects.select_for_update(skip_locked=True)
+                    .filter(status=status, id__gt=ultimo_id, **periodo)
+                    .order_by('id')
+                    .values_list('id', 'sala_id')[:tamanho_lote]
+                )
+                if not lote:
+                    return total
+                ids = [reserva_id for reserva_id, _ in lote]
+                total += Reserva.objects.filter(id__in=ids).update(status=novo_status, atualizada_em=timezone.now())
+
+                # UPDATE em lote não dispara sinais
+                salas = {sala_id for _, sala_id in lote}
+                for sala_id in salas:
+                    ReservaService.invalidar_caches(sala_id)
+                transaction.on_commit(lambda salas=salas: [ReservaService.invalidar_caches(sala_id) for sala_id in salas])
+            ultimo_id = ids[-1]
+
+    @staticmethod
+    def varrer(tamanho_lote=None, completa=False):
+        """
+        Aplica as transições até o momento da chamada, a partir da última varredura
+        (menos MARGEM) ou desde sempre com `completa`, e grava esse corte no ponto
+        de controle. Retorna quantas reservas mudaram em cada transição.
+        """
+        agora = timezone.now()
+        tamanho_lote = tamanho_lote or CicloDeVidaService.TAMANHO_LOTE
+        anterior = None if completa else CicloDeVidaService.ultima_varredura()
+        desde = anterior - CicloDeVidaService.MARGEM if anterior else None
+        resultado = {
+            nome: CicloDeVidaService._transicionar(status, campo, novo_status, agora, tamanho_lote, desde)
+            for nome, status, campo, novo_status in CicloDeVidaService.TRANSICOES
+        }
+        PontoDeControle.objects.update_or_create(nome=CicloDeVidaService.NOME_MARCA, defaults={'marca': agora})
+        return resultado
+
+    @staticmethod
+    def ultima_varredura():
+        return PontoDeControle.objects.filter(nome=CicloDeVidaService.NOME_MARCA).values_list('marca', flat=True).first()
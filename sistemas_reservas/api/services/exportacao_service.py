@@ -0,0 +1,38 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de guardá-la."""
+    def write(self, valor):
+        return valor
+
+
+class ExportacaoService:
+    """Gera exportações de reservas linha a linha, lendo o banco por cursor."""
+    CAMPOS = (
+        'id', 'sala_id', 'sala__nome', 'solicitante__username',
+        'data_inicio', 'data_fim', 'status', 'forma_pagamento', 'valor_total', 'criado_em',
+    )
+    TAMANHO_LOTE = 2000
+    FORMATOS = {
+        'csv': 'text/csv; charset=utf-8',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    @staticmethod
+    def _linhas(reservas):
+        return reservas.order_by('data_inicio', 'id').values_list(*ExportacaoService.CAMPOS).iterator(chunk_size=ExportacaoService.TAMANHO_LOTE)
+
+    @staticmethod
+    def csv(reservas):
+        escritor = csv.writer(_Eco())
+        yield escritor.writerow(ExportacaoService.CAMPOS)
+        for linha in ExportacaoService._linhas(reservas):
+            yield escritor.writerow(linha)
+
+    @staticmethod
+    def ndjson(reservas):
+        for linha in ExportacaoService._linhas(reservas):
+            yield json.dumps(dict(zip(ExportacaoService.CAMPOS, linha)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
@@ -0,0 +1,105 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from django.conf import settings
+from api.models import Reserva
+
+
+class IntervalosAtivos:
+    """Intervalos ativos de uma sala, ordenados pelo início."""
+    __slots__ = ('ids', 'inicios', 'fins')
+
+    def __init__(self, linhas):
+        self.ids = [linha[0] for linha in linhas]
+        self.inicios = [linha[1] for linha in linhas]
+        self.fins = [linha[2] for linha in linhas]
+
+    def esta_livre(self, inicio, fim, reserva_id_ignorar=None):
+        # A exclusion constraint garante intervalos ativos disjuntos, então os fins
+        # também estão ordenados: basta olhar o último intervalo que começa antes de `fim`.
+        pos = bisect_left(self.inicios, fim) - 1
+        while pos >= 0 and self.ids[pos] == reserva_id_ignorar:
+            pos -= 1
+        return pos < 0 or self.fins[pos] <= inicio
+
+
+class IndiceDisponibilidade:
+    """
+    Índice em memória (por processo) das reservas ativas de cada sala.
+    Mantém no máximo `max_salas` salas, descartando as menos usadas (LRU),
+    e não guarda salas com mais de `max_reservas_por_sala` reservas ativas.
+    Retorna None quando não consegue responder, para o chamador ir ao banco.
+
+    Só é invalidado pelos sinais deste processo e não expira, então pode estar
+    atrasado em relação aos outros: ReservaService o usa apenas na checagem que
+    antecede uma escrita, confia só nas respostas "livre" (a constraint do banco
+    barra o resto) e confirma no banco as "ocupada".
+    """
+
+    def __init__(self, max_salas=1024, max_reservas_por_sala=5000):
+        self.max_salas = max_salas
+        self.max_reservas_por_sala = max_reservas_por_sala
+        self._agendas = OrderedDict()
+        self._lock = threading.Lock()
+        self._geracao = 0
+
+    @property
+    def ativo(self):
+        return getattr(settings, 'INDICE_DISPONIBILIDADE_ATIVO', True)
+
+    def esta_livre(self, sala_id, inicio, fim, reserva_id_ignorar=None):
+        agenda = self._obter(sala_id)
+        if agenda is None:
+            return None
+        return agenda.esta_livre(inicio, fim, reserva_id_ignorar)
+
+    def invalidar(self, sala_id):
+        with self._lock:
+            self._geracao += 1
+            self._agendas.pop(sala_id, None)
+
+    def limpar(self):
+        with self._lock:
+            self._geracao += 1
+            self._agendas.clear()
+
+    def _obter(self, sala_id):
+        agenda, geracao = self._em_memoria(sala_id)
+        if agenda is None:
+            agenda = self._guardar(sala_id, list(self._consulta(sala_id)), geracao)
+        return agenda
+
+    def _em_memoria(self, sala_id):
+        with self._lock:
+            if sala_id in self._agendas:
+                self._agendas.move_to_end(sala_id)
+                return self._agendas[sala_id], self._geracao
+            return None, self._geracao
+
+    def _consulta(self, sala_id):
+        return (
+            Reserva.objects.filter(sala_id=sala_id, status__in=Reserva.STATUS_ATIVOS)
+            .order_by('data_inicio')
+            .values_list('id', 'data_inicio', 'data_fim')[:self.max_reservas_por_sala + 1]
+        )
+
+    def _guardar(self, sala_id, linhas, geracao):
+        if len(linhas) > self.max_reservas_por_sala:
+            return None
+
+        agenda = IntervalosAtivos(linhas)
+        with self._lock:
+            # Alguma invalidação durante a consulta pode ter deixado `linhas` velhas.
+            if geracao != self._geracao:
+                return agenda
+            self._agendas[sala_id] = agenda
+            self._agendas.move_to_end(sala_id)
+            while len(self._agendas) > self.max_salas:
+                self._agendas.popitem(last=False)
+        return agenda
+
+
+indice_disponibilidade = IndiceDisponibilidade(
+    max_salas=getattr(settings, 'INDICE_DISPONIBILIDADE_MAX_SALAS', 1024),
+    max_reservas_por_sala=getattr(settings, 'INDICE_DISPONIBILIDADE_MAX_RESERVAS_POR_SALA', 5000),
+)
@@ -0,0 +1,143 @@
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from api.models import OcupacaoDiaria, PontoDeControle, Reserva, ReservaHistorico, Sala
+
+
+_pendentes = threading.local()
+
+
+class OcupacaoService:
+    """
+    Mantém a tabela OcupacaoDiaria. A atualização incremental usa `atualizada_em`
+    como marca d'água: só os (sala, dia) com reservas alteradas desde a última
+    execução são reagregados. A margem cobre transações que gravaram
+    `atualizada_em` antes da execução anterior, mas só fizeram commit depois.
+    Os agregados são lidos de ReservaHistorico, então os meses movidos para
+    `reservas_arquivo` continuam no rollup, inclusive numa reconstrução completa.
+    """
+    NOME_MARCA = 'ocupacao_diaria'
+    MARGEM = timedelta(minutes=5)
+    TAMANHO_LOTE = 500
+
+    @staticmethod
+    def dia_de(data_hora):
+        return timezone.localtime(data_hora).date()
+
+    @staticmethod
+    def _inicio_do_dia(dia):
+        return timezone.make_aware(datetime.combine(dia, datetime.min.time()))
+
+    @staticmethod
+    def _agregados():
+        confirmadas = Q(status__in=Reserva.STATUS_CONFIRMADOS)
+        duracao = ExpressionWrapper(F('data_fim') - F('data_inicio'), output_field=DurationField())
+        agregados = {'total_reservas': Count('id')}
+        for codigo, _ in Reserva.STATUS_CHOICES:
+            agregados[f'qtd_{codigo.lower()}'] = Count('id', filter=Q(status=codigo))
+        for codigo, _ in Reserva.PAGAMENTO_CHOICES:
+            agregados[f'receita_{codigo.lower()}'] = Coalesce(Sum('valor_total', filter=confirmadas & Q(forma_pagamento=codigo)), Value(Decimal('0.00')))
+        agregados['tempo_reservado'] = Coalesce(Sum(duracao, filter=confirmadas), Value(timedelta()))
+        return agregados
+
+    @staticmethod
+    def _filtro_reservas(pares):
+        filtro = Q()
+        for sala_id, dia in pares:
+            inicio = OcupacaoService._inicio_do_dia(dia)
+            filtro |= Q(sala_id=sala_id, data_inicio__gte=inicio, data_inicio__lt=inicio + timedelta(days=1))
+        return filtro
+
+    @staticmethod
+    def _filtro_rollup(pares):
+        filtro = Q()
+        for sala_id, dia in pares:
+            filtro |= Q(sala_id=sala_id, dia=dia)
+        return filtro
+
+    @staticmethod
+    def recalcular(pares):
+        """Reagrega os (sala_id, dia) informados, em lotes, com upsert na tabela de rollup."""
+        pares = sorted(set(pares))
+        agregados = OcupacaoService._agregados()
+        for n in range(0, len(pares), OcupacaoService.TAMANHO_LOTE):
+            lote = pares[n:n + OcupacaoService.TAMANHO_LOTE]
+            linhas = (
+                ReservaHistorico.objects.filter(OcupacaoService._filtro_reservas(lote))
+                .annotate(dia=TruncDate('data_inicio'))
+                .values('sala_id', 'dia')
+                .annotate(**agregados)
+                .order_by()
+            )
+            novos = [OcupacaoDiaria(**linha) for linha in linhas]
+            vazios = set(lote) - {(o.sala_id, o.dia) for o in novos}
+            with transaction.atomic():
+                if novos:
+                    OcupacaoDiaria.objects.bulk_create(
+                        novos, update_conflicts=True, unique_fields=['sala', 'dia'],
+                        update_fields=list(agregados) + ['atualizado_em'],
+                    )
+                if vazios:
+                    OcupacaoDiaria.objects.filter(OcupacaoService._filtro_rollup(vazios)).delete()
+        return len(pares)
+
+    @staticmethod
+    def recalcular_apos_commit(sala_id, dia):
+        """
+        Agenda o recálculo de um (sala, dia) para o fim da transação. Vários pedidos
+        na mesma transação (ex.: remoção em cascata) viram um único recálculo em lote.
+        """
+        if not hasattr(_pendentes, 'pares'):
+            _pendentes.pares = set()
+        _pendentes.pares.add((sala_id, dia))
+
+        def executar():
+            pares, _pendentes.pares = _pendentes.pares, set()
+            if pares:
+                OcupacaoService.recalcular(pares)
+
+        transaction.on_commit(executar)
+
+    @staticmethod
+    def atualizar(completo=False):
+        """
+        Atualiza o rollup e avança a marca d'água. Retorna quantos (sala, dia) foram
+        reagregados. Com `completo`, descarta o rollup e reconstrói tudo.
+
+        Tudo numa transação: até o commit os relatórios seguem lendo o rollup e a
+        marca antigos, e uma falha no meio não deixa a tabela pela metade.
+        """
+        agora = timezone.now()
+        with transaction.atomic():
+            ponto, _ = PontoDeControle.objects.get_or_create(nome=OcupacaoService.NOME_MARCA)
+
+            if completo or ponto.marca is None:
+                OcupacaoDiaria.objects.all().delete()
+                # Inclui os meses arquivados (que não mudam mais), menos os de salas já apagadas
+                reservas = ReservaHistorico.objects.filter(sala_id__in=Sala.objects.values('id'))
+            else:
+                reservas = Reserva.objects.filter(atualizada_em__gte=ponto.marca - OcupacaoService.MARGEM)
+
+            pares = (
+                reservas.annotate(dia=TruncDate('data_inicio'))
+                .values_list('sala_id', 'dia')
+                .distinct()
+                .order_by()
+            )
+            total = OcupacaoService.recalcular(pares)
+
+            ponto.marca = agora
+            ponto.save()
+        return total
+
+    @staticmethod
+    def cobre(de, ate):
+        """O rollup atende [de, ate) se o período é de dias inteiros e já passou pela marca d'água."""
+        if de != OcupacaoService._inicio_do_dia(OcupacaoService.dia_de(de)) or ate != OcupacaoService._inicio_do_dia(OcupacaoService.dia_de(ate)):
+            return False
+        marca = PontoDeControle.objects.filter(nome=OcupacaoService.NOME_MARCA).values_list('marca', flat=True).first()
+        return marca is not None and ate <= marca
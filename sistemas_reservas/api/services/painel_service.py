@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DurationField, ExpressionWrapper, F, FilteredRelation, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from api.models import Reserva, Sala
+
+
+class PainelService:
+    """
+    Resumo do painel do usuário: as salas dele com aprovações pendentes, reservas
+    por vir, receita e ocupação do mês, e as próximas reservas que ele fez.
+    São duas consultas com agregação condicional, guardadas por usuário por
+    PAINEL_CACHE_SEGUNDOS; as mudanças feitas pelo próprio dono descartam o cache.
+    """
+    CHAVE = 'painel:{}'
+
+    @staticmethod
+    def _inicio_do_mes(agora):
+        local = timezone.localtime(agora)
+        return timezone.make_aware(datetime(local.year, local.month, 1))
+
+    @staticmethod
+    def _salas(usuario_id, agora, inicio_mes, fim_mes):
+        # Tudo o que o painel conta começa neste mês ou depois: o JOIN já nasce restrito
+        # a essa faixa de data_inicio (e às partições correspondentes)
+        recentes = FilteredRelation('reservas_recebidas', condition=Q(reservas_recebidas__data_inicio__gte=inicio_mes))
+        confirmadas_no_mes = Q(recentes__status__in=Reserva.STATUS_CONFIRMADOS, recentes__data_inicio__lt=fim_mes)
+        duracao = ExpressionWrapper(F('recentes__data_fim') - F('recentes__data_inicio'), output_field=DurationField())
+        return list(
+            Sala.objects.filter(dono_id=usuario_id)
+            .annotate(recentes=recentes)
+            .annotate(
+                aprovacoes_pendentes=Count('recentes', filter=Q(recentes__status='PENDENTE_APROVACAO', recentes__data_inicio__gte=agora)),
+                reservas_proximas=Count('recentes', filter=Q(recentes__status__in=Reserva.STATUS_ATIVOS, recentes__data_inicio__gte=agora)),
+                receita_mes=Coalesce(Sum('recentes__valor_total', filter=confirmadas_no_mes), Value(Decimal('0.00'))),
+                tempo_mes=Coalesce(Sum(duracao, filter=confirmadas_no_mes), Value(timedelta())),
+            )
+            .values('id', 'nome', 'aprovacoes_pendentes', 'reservas_proximas', 'receita_mes', 'tempo_mes')
+            .order_by('id')
+        )
+
+    @staticmethod
+    def resumo(usuario_id):
+        agora = timezone.now()
+        inicio_mes = PainelService._inicio_do_mes(agora)
+        fim_mes = PainelService._inicio_do_mes(inicio_mes + timedelta(days=32))
+        horas_mes = Decimal((fim_mes - inicio_mes).total_seconds()) / 3600
+
+        por_sala, receita = [], Decimal('0.00')
+        for sala in PainelService._salas(usuario_id, agora, inicio_mes, fim_mes):
+            horas = Decimal(sala.pop('tempo_mes').total_seconds()) / 3600
+            receita += sala['receita_mes']
+            # Valores monetários e percentuais saem como texto, como nos serializers
+            sala['receita_mes'] = str(sala['receita_mes'])
+            sala['horas_reservadas_mes'] = str(horas.quantize(Decimal('0.01')))
+            sala['ocupacao_percentual_mes'] = str((horas * 100 / horas_mes).quantize(Decimal('0.01')))
+            por_sala.append(sala)
+
+        minhas_proximas = Reserva.objects.filter(
+            solicitante_id=usuario_id, status__in=Reserva.STATUS_ATIVOS, data_inicio__gte=agora,
+        ).count()
+
+        return {
+            'mes': f'{timezone.localtime(inicio_mes):%Y-%m}',
+            'salas': len(por_sala),
+            'aprovacoes_pendentes': sum(s['aprovacoes_pendentes'] for s in por_sala),
+            'reservas_proximas_nas_minhas_salas': sum(s['reservas_proximas'] for s in por_sala),
+            'minhas_reservas_proximas': minhas_proximas,
+            'receita_mes': str(receita),
+            'por_sala': por_sala,
+        }
+
+    @staticmethod
+    def obter(usuario_id):
+        """Resumo do cache ou recalculado; devolve (dados, veio_do_cache)."""
+        chave = PainelService.CHAVE.format(usuario_id)
+        dados = cache.get(chave)
+        if dados is not None:
+            return dados, True
+        dados = PainelService.resumo(usuario_id)
+        cache.set(chave, dados, getattr(settings, 'PAINEL_CACHE_SEGUNDOS', 30))
+        return dados, False
+
+    @staticmethod
+    def invalidar(*usuario_ids):
+        cache.delete_many([PainelService.CHAVE.format(usuario_id) for usuario_id in usuario_ids])
@@ -0,0 +1,125 @@
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import connection, transaction
+from django.utils import timezone
+from api.models import Reserva
+
+
+class ParticionamentoService:
+    """
+    Mantém as partições mensais de `reservas` (ver migração 0009): cria as dos
+    próximos meses e move as antigas para `reservas_arquivo` sem copiar linhas
+    (DETACH + ATTACH). Consultas com faixa de `data_inicio` só leem as partições
+    do período. O que sai para o arquivo deixa de aparecer em Reserva, mas segue
+    em ReservaHistorico (view `reservas_historico`), que relatórios e o rollup
+    OcupacaoDiaria leem.
+    """
+    TABELA = Reserva._meta.db_table
+    PADRAO = 'reservas_padrao'
+    ARQUIVO = 'reservas_arquivo'
+    ARQUIVO_PADRAO = 'reservas_arquivo_padrao'
+    NOME = re.compile(r'^reservas(?:_arquivo)?_p(\d{4})_(\d{2})$')
+
+    @staticmethod
+    def mes(data):
+        """Primeiro instante do mês de `data`, em UTC (as faixas das partições são em UTC)."""
+        return data.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def proximo_mes(mes):
+        return (mes + timedelta(days=32)).replace(day=1)
+
+    @staticmethod
+    def nome(mes, tabela=None):
+        return f'{tabela or ParticionamentoService.TABELA}_p{mes:%Y_%m}'
+
+    @staticmethod
+    def particionada():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass", [ParticionamentoService.TABELA])
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def particoes(tabela=None):
+        """Meses com partição própria em `tabela` (padrão: reservas), em ordem."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+                [tabela or ParticionamentoService.TABELA],
+            )
+            nomes = [ParticionamentoService.NOME.match(nome) for (nome,) in cursor.fetchall()]
+        return sorted(datetime(int(n[1]), int(n[2]), 1, tzinfo=dt_timezone.utc) for n in nomes if n)
+
+    @staticmethod
+    def _mover(cursor, origem, destino, filtro, parametros):
+        cursor.execute(
+            f'WITH movidas AS (DELETE FROM {origem} WHERE {filtro} RETURNING *) INSERT INTO {destino} SELECT * FROM movidas',
+            parametros,
+        )
+        return cursor.rowcount
+
+    @staticmethod
+    def criar_particao(mes):
+        """
+        Cria a partição do mês. Se a partição padrão já recebeu linhas dessa faixa,
+        elas vão antes para a tabela nova, que só então é anexada. Retorna False se
+        a partição já existia; levanta ValueError se o mês já foi arquivado.
+        """
+        mes = ParticionamentoService.mes(mes)
+        if mes in ParticionamentoService.particoes():
+            return False
+        if mes in ParticionamentoService.particoes(ParticionamentoService.ARQUIVO):
+            raise ValueError(f'O mês {mes:%Y-%m} já foi arquivado.')
+        tabela, nome, fim = ParticionamentoService.TABELA, ParticionamentoService.nome(mes), ParticionamentoService.proximo_mes(mes)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {ParticionamentoService.PADRAO} WHERE data_inicio >= %s AND data_inicio < %s)', [mes, fim])
+            if cursor.fetchone()[0]:
+                cursor.execute(f'CREATE TABLE {nome} (LIKE {tabela} INCLUDING DEFAULTS)')
+                ParticionamentoService._mover(cursor, ParticionamentoService.PADRAO, nome, 'data_inicio >= %s AND data_inicio < %s', [mes, fim])
+                cursor.execute(f'ALTER TABLE {tabela} ATTACH PARTITION {nome} FOR VALUES FROM (%s) TO (%s)', [mes, fim])
+            else:
+                cursor.execute(f'CREATE TABLE {nome} PARTITION OF {tabela} FOR VALUES FROM (%s) TO (%s)', [mes, fim])
+        return True
+
+    @staticmethod
+    def garantir_futuras(meses):
+        """Garante partições do mês atual e dos `meses` seguintes. Retorna os nomes das criadas."""
+        mes, criadas = ParticionamentoService.mes(timezone.now()), []
+        for _ in range(meses + 1):
+            if ParticionamentoService.criar_particao(mes):
+                criadas.append(ParticionamentoService.nome(mes))
+            mes = ParticionamentoService.proximo_mes(mes)
+        return criadas
+
+    @staticmethod
+    def arquivar(antes_de):
+        """
+        Move para o arquivo as partições inteiramente anteriores ao mês de `antes_de`
+        e, da partição padrão, as linhas que começam antes dele. As partições mudam
+        de tabela-mãe sem cópia; perdem as FKs, para que apagar uma sala ou usuário
+        não esbarre no histórico. Retorna (partições movidas, linhas da padrão).
+        """
+        limite = ParticionamentoService.mes(antes_de)
+        movidas = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Checagens de FK adiadas pendentes impedem o ALTER TABLE; dispara-as antes
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            for mes in ParticionamentoService.particoes():
+                fim = ParticionamentoService.proximo_mes(mes)
+                if fim > limite:
+                    break
+                nome = ParticionamentoService.nome(mes)
+                cursor.execute(f'ALTER TABLE {ParticionamentoService.TABELA} DETACH PARTITION {nome}')
+                cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [nome])
+                for (chave,) in cursor.fetchall():
+                    cursor.execute(f'ALTER TABLE {nome} DROP CONSTRAINT {chave}')
+                arquivada = ParticionamentoService.nome(mes, ParticionamentoService.ARQUIVO)
+                cursor.execute(f'ALTER TABLE {nome} RENAME TO {arquivada}')
+                # O arquivo não pode ter, na padrão dele, linhas da faixa que vai ser anexada
+                ParticionamentoService._mover(cursor, ParticionamentoService.ARQUIVO_PADRAO, arquivada, 'data_inicio >= %s AND data_inicio < %s', [mes, fim])
+                cursor.execute(f'ALTER TABLE {ParticionamentoService.ARQUIVO} ATTACH PARTITION {arquivada} FOR VALUES FROM (%s) TO (%s)', [mes, fim])
+                movidas.append(arquivada)
+            linhas = ParticionamentoService._mover(cursor, ParticionamentoService.PADRAO, ParticionamentoService.ARQUIVO, 'data_inicio < %s', [limite])
+            cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+        return movidas, linhas
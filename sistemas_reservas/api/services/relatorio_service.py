@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from api.models import OcupacaoDiaria, Reserva, ReservaHistorico
+from .ocupacao_service import OcupacaoService
+
+
+class RelatorioService:
+    """Resumos agregados de reservas, calculados no banco."""
+    AGRUPAMENTOS = {'DIA': TruncDay, 'SEMANA': TruncWeek, 'MES': TruncMonth}
+
+    @staticmethod
+    def _fim_do_periodo(inicio, agrupamento):
+        if agrupamento == 'DIA':
+            return inicio + timedelta(days=1)
+        if agrupamento == 'SEMANA':
+            return inicio + timedelta(weeks=1)
+        return (inicio.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+    @staticmethod
+    def resumo_sala(sala_id, de, ate, agrupamento='DIA'):
+        """
+        Agrupa as reservas da sala com início em [de, ate) por dia, semana ou mês.
+        Contagens por status, receita por forma de pagamento e horas confirmadas
+        saem de uma única consulta com agregação condicional, lida do rollup
+        OcupacaoDiaria quando ele cobre o período e de ReservaHistorico (reservas e
+        arquivo) caso contrário.
+        A ocupação é a razão entre as horas confirmadas e as horas do período
+        (recortado a [de, ate)).
+        """
+        if OcupacaoService.cobre(de, ate):
+            linhas = RelatorioService._linhas_do_rollup(sala_id, de, ate, agrupamento)
+        else:
+            linhas = RelatorioService._linhas_das_reservas(sala_id, de, ate, agrupamento)
+
+        resumo = []
+        for linha in linhas:
+            inicio = linha['periodo']
+            if not isinstance(inicio, datetime):
+                inicio = timezone.make_aware(datetime.combine(inicio, datetime.min.time()))
+            horas_periodo = Decimal((min(RelatorioService._fim_do_periodo(inicio, agrupamento), ate) - max(inicio, de)).total_seconds()) / 3600
+            horas = Decimal((linha['duracao'] or timedelta()).total_seconds()) / 3600
+            resumo.append({
+                'periodo': inicio,
+                'total': linha['total'],
+                'por_status': {codigo: linha[f'status_{codigo}'] for codigo, _ in Reserva.STATUS_CHOICES},
+                'receita_por_pagamento': {codigo: linha[f'receita_{codigo}'] or Decimal('0.00') for codigo, _ in Reserva.PAGAMENTO_CHOICES},
+                'horas_reservadas': horas.quantize(Decimal('0.01')),
+                'ocupacao_percentual': (horas * 100 / horas_periodo).quantize(Decimal('0.01')) if horas_periodo > 0 else Decimal('0.00'),
+            })
+        return resumo
+
+    @staticmethod
+    def _linhas_das_reservas(sala_id, de, ate, agrupamento):
+        truncar = RelatorioService.AGRUPAMENTOS[agrupamento]
+        confirmadas = Q(status__in=Reserva.STATUS_CONFIRMADOS)
+        duracao = ExpressionWrapper(F('data_fim') - F('data_inicio'), output_field=DurationField())
+
+        agregados = {'total': Count('id')}
+        for codigo, _ in Reserva.STATUS_CHOICES:
+            agregados[f'status_{codigo}'] = Count('id', filter=Q(status=codigo))
+        for codigo, _ in Reserva.PAGAMENTO_CHOICES:
+            agregados[f'receita_{codigo}'] = Sum('valor_total', filter=confirmadas & Q(forma_pagamento=codigo))
+        agregados['duracao'] = Sum(duracao, filter=confirmadas)
+
+        return (
+            ReservaHistorico.objects
+            .filter(sala_id=sala_id, data_inicio__gte=de, data_inicio__lt=ate)
+            .annotate(periodo=truncar('data_inicio'))
+            .values('periodo')
+            .annotate(**agregados)
+            .order_by('periodo')
+        )
+
+    @staticmethod
+    def _linhas_do_rollup(sala_id, de, ate, agrupamento):
+        truncar = RelatorioService.AGRUPAMENTOS[agrupamento]
+        agregados = {'total': Sum('total_reservas'), 'duracao': Sum('tempo_reservado')}
+        for codigo, _ in Reserva.STATUS_CHOICES:
+            agregados[f'status_{codigo}'] = Sum(f'qtd_{codigo.lower()}')
+        for codigo, _ in Reserva.PAGAMENTO_CHOICES:
+            agregados[f'receita_{codigo}'] = Sum(f'receita_{codigo.lower()}')
+
+        return (
+            OcupacaoDiaria.objects
+            .filter(sala_id=sala_id, dia__gte=OcupacaoService.dia_de(de), dia__lt=OcupacaoService.dia_de(ate))
+            .annotate(periodo=truncar('dia'))
+            .values('periodo')
+            .annotate(**agregados)
+            .order_by('periodo')
+        )
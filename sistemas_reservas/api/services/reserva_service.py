@@ -1,21 +1,250 @@
-from django.db.models import Q
-from api.models import Reserva
+from contextlib import contextmanager
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from api.models import Reserva, Sala
+from .agenda_service import AgendaService
+from .indice_disponibilidade import IntervalosAtivos, indice_disponibilidade
+from .painel_service import PainelService
+from .tarifa_service import TarifaService
+
+
+class ConflitoDeHorario(Exception):
+    """Levantada quando o banco recusa uma reserva sobreposta a outra ativa."""
+
 
 class ReservaService:
+    CONSTRAINT_SOBREPOSICAO = 'reservas_sem_sobreposicao'
+    MAX_DECISOES = 1000
+    # Estados que o dono controla; CANCELADA e CONCLUIDA não voltam atrás
+    STATUS_RESPONDIVEIS = ['PENDENTE_APROVACAO', 'APROVADA', 'REJEITADA']
+
     @staticmethod
-    def verificar_disponibilidade(sala, data_inicio, data_fim, reserva_id_ignorar=None):
-        """
-        Verifica se a sala está livre. 
-        Reservas REJEITADAS ou CANCELADAS não ocupam espaço.
-        """
+    def _conflitos(sala, data_inicio, data_fim, reserva_id_ignorar=None):
         conflitos = Reserva.objects.filter(
             sala=sala,
-            status__in=['PENDENTE_APROVACAO', 'APROVADA']
+            status__in=Reserva.STATUS_ATIVOS
         ).filter(
             Q(data_inicio__lt=data_fim) & Q(data_fim__gt=data_inicio)
         )
 
         if reserva_id_ignorar:
             conflitos = conflitos.exclude(id=reserva_id_ignorar)
+        return conflitos
+
+    @staticmethod
+    def verificar_disponibilidade(sala, data_inicio, data_fim, reserva_id_ignorar=None):
+        """
+        Verifica se a sala está livre. 
+        Reservas REJEITADAS ou CANCELADAS não ocupam espaço.
+        Consulta primeiro o índice em memória, mas só confia quando ele diz "livre"
+        (uma reserva criada por outro processo ainda esbarra na constraint do banco).
+        "Ocupada" pode vir de um cancelamento que este processo não viu, então é
+        confirmada no banco; se o banco discordar, a sala sai do índice.
+        """
+        sala_id = getattr(sala, 'pk', sala)
+        if indice_disponibilidade.ativo and indice_disponibilidade.esta_livre(sala_id, data_inicio, data_fim, reserva_id_ignorar):
+            return True
+
+        livre = not ReservaService._conflitos(sala, data_inicio, data_fim, reserva_id_ignorar).exists()
+        if livre:
+            indice_disponibilidade.invalidar(sala_id)
+        return livre
+
+    @staticmethod
+    async def averificar_disponibilidade(sala, data_inicio, data_fim, reserva_id_ignorar=None):
+        """
+        Versão assíncrona de verificar_disponibilidade, para a consulta de
+        disponibilidade das views ASGI. Vai sempre ao banco: o "livre" do índice só
+        é seguro antes de uma escrita, que ainda esbarra na constraint; numa leitura
+        uma reserva feita por outro processo ficaria invisível até a sala sair do índice.
+        """
+        return not await ReservaService._conflitos(sala, data_inicio, data_fim, reserva_id_ignorar).aexists()
 
-        return not conflitos.exists()
\ No newline at end of file
+    @staticmethod
+    def visiveis(usuario, papel=None):
+        """
+        Reservas que o usuário fez ou que foram feitas nas salas dele, sem JOIN nem
+        DISTINCT. Com `papel` ('solicitante' ou 'dono') o filtro tem um lado só, e o
+        Postgres percorre o índice (solicitante_id / sala_id, -criado_em) já na ordem
+        da listagem. Sem `papel` os dois lados viram um OR: cada um usa seu índice num
+        BitmapOr, mas as linhas visíveis são ordenadas antes de paginar. Um union()
+        evitaria isso, mas o queryset não aceitaria os filtros nem a paginação por
+        cursor do ReservaViewSet.
+        """
+        como_solicitante = Q(solicitante_id=usuario.pk)
+        como_dono = Q(sala__in=Sala.objects.filter(dono_id=usuario.pk).values('id'))
+
+        if papel == 'solicitante':
+            filtro = como_solicitante
+        elif papel == 'dono':
+            filtro = como_dono
+        elif papel:
+            raise ValueError("Papel inválido. Use 'solicitante' ou 'dono'.")
+        else:
+            filtro = como_solicitante | como_dono
+
+        return Reserva.objects.filter(filtro).select_related('sala', 'solicitante').defer('sala__busca')
+
+    @staticmethod
+    def filtrar_salas_livres(salas, data_inicio, data_fim):
+        """
+        Restringe um queryset de salas às que não têm reserva ativa no período.
+        Vira um único NOT EXISTS (anti-join) no SQL, em vez de uma consulta por sala.
+        """
+        conflitos = Reserva.objects.filter(
+            sala=OuterRef('pk'),
+            status__in=Reserva.STATUS_ATIVOS,
+            data_inicio__lt=data_fim,
+            data_fim__gt=data_inicio,
+        )
+        return salas.filter(~Exists(conflitos))
+
+    @staticmethod
+    def invalidar_caches(sala_id):
+        """Descarta índice e agenda em memória da sala (escritas em lote não disparam sinais)."""
+        indice_disponibilidade.invalidar(sala_id)
+        AgendaService.invalidar(sala_id)
+
+    @staticmethod
+    def criar_serie(sala, solicitante, ocorrencias, forma_pagamento, pular_conflitos=False):
+        """
+        Cria de uma vez as reservas de uma série (lista ordenada de (inicio, fim)).
+        Todas as ocorrências são checadas com uma única consulta por faixa e inseridas
+        com bulk_create numa transação. Retorna (criadas, conflitos); se houver conflito
+        e `pular_conflitos` for falso, nada é criado.
+        """
+        ocupadas = IntervalosAtivos(list(
+            Reserva.objects.filter(
+                sala=sala,
+                status__in=Reserva.STATUS_ATIVOS,
+                data_inicio__lt=ocorrencias[-1][1],
+                data_fim__gt=ocorrencias[0][0],
+            ).order_by('data_inicio').values_list('id', 'data_inicio', 'data_fim')
+        ))
+
+        livres, conflitos = [], []
+        for inicio, fim in ocorrencias:
+            (livres if ocupadas.esta_livre(inicio, fim) else conflitos).append((inicio, fim))
+
+        if not livres or (conflitos and not pular_conflitos):
+            return [], conflitos
+
+        valores = TarifaService.cotar([(sala, inicio, fim) for inicio, fim in livres])
+        novas = [
+            Reserva(
+                sala=sala, solicitante=solicitante,
+                data_inicio=inicio, data_fim=fim,
+                forma_pagamento=forma_pagamento,
+                valor_total=valor,
+            )
+            for (inicio, fim), valor in zip(livres, valores)
+        ]
+        with ReservaService.proteger_sobreposicao():
+            criadas = Reserva.objects.bulk_create(novas)
+        ReservaService.invalidar_caches(sala.id)
+        transaction.on_commit(lambda: ReservaService.invalidar_caches(sala.id))
+        PainelService.invalidar(sala.dono_id, solicitante.pk)
+        transaction.on_commit(lambda: PainelService.invalidar(sala.dono_id, solicitante.pk))
+        return criadas, conflitos
+
+    @staticmethod
+    def responder_lote(dono, decisoes):
+        """
+        Aplica de uma vez as decisões do dono (dict id -> 'APROVAR'/'REJEITAR').
+        Tudo ou nada: as reservas são travadas com um único SELECT ... FOR UPDATE e,
+        se alguma não for de uma sala do dono ou já estiver cancelada/concluída,
+        levanta ValueError sem alterar nada. Os novos status saem em UPDATEs em lote.
+
+        Aprovar uma reserva que estava rejeitada rejeita automaticamente as pendentes
+        sobrepostas a ela; se houver uma aprovada no caminho (ou outra aprovação do
+        mesmo lote), a reserva fica como está e volta em `conflitos`.
+        Retorna dict com as listas de ids aprovadas, rejeitadas,
+        rejeitadas_por_conflito e conflitos.
+        """
+        with transaction.atomic():
+            reservas = list(
+                Reserva.objects.select_for_update(of=('self',))
+                .filter(id__in=decisoes, sala__dono_id=dono.pk)
+                .only('id', 'sala_id', 'solicitante_id', 'data_inicio', 'data_fim', 'status')
+                .order_by('id')
+            )
+            faltando = sorted(set(decisoes) - {r.id for r in reservas})
+            if faltando:
+                raise ValueError(f"Reserva(s) inexistente(s) ou de salas de outro dono: {', '.join(map(str, faltando))}.")
+            encerradas = [r.id for r in reservas if r.status not in ReservaService.STATUS_RESPONDIVEIS]
+            if encerradas:
+                raise ValueError(f"Reserva(s) cancelada(s) ou concluída(s) não podem ser respondidas: {', '.join(map(str, encerradas))}.")
+
+            rejeitadas = [r.id for r in reservas if decisoes[r.id] == 'REJEITAR' and r.status != 'REJEITADA']
+            aprovar = [r for r in reservas if decisoes[r.id] == 'APROVAR' and r.status != 'APROVADA']
+            # Pendentes já ocupam o horário (exclusion constraint); só as reativadas podem colidir
+            reativar = sorted((r for r in aprovar if r.status not in Reserva.STATUS_ATIVOS), key=lambda r: (r.sala_id, r.data_inicio))
+            aprovadas = [r.id for r in aprovar if r.status in Reserva.STATUS_ATIVOS]
+            por_conflito, conflitos = [], []
+
+            if reativar:
+                sobreposicao = Q()
+                for r in reativar:
+                    sobreposicao |= Q(sala_id=r.sala_id, data_inicio__lt=r.data_fim, data_fim__gt=r.data_inicio)
+                ativas = list(
+                    Reserva.objects.select_for_update(of=('self',))
+                    .filter(sobreposicao, status__in=Reserva.STATUS_ATIVOS)
+                    .exclude(id__in=rejeitadas)
+                    .order_by('id')
+                    .values_list('id', 'sala_id', 'data_inicio', 'data_fim', 'status')
+                )
+                saindo = set(rejeitadas)
+                ocupadas = [a for a in ativas if a[0] not in saindo and (a[4] == 'APROVADA' or a[0] in aprovadas)]
+                for r in reativar:
+                    sobrepoe = lambda a: a[1] == r.sala_id and a[2] < r.data_fim and a[3] > r.data_inicio
+                    if any(sobrepoe(a) for a in ocupadas):
+                        conflitos.append(r.id)
+                        continue
+                    derrubadas = [a[0] for a in ativas if sobrepoe(a) and a[0] not in saindo]
+                    por_conflito.extend(derrubadas)
+                    saindo.update(derrubadas)
+                    aprovadas.append(r.id)
+                    ocupadas.append((r.id, r.sala_id, r.data_inicio, r.data_fim, 'APROVADA'))
+
+            # Rejeições antes das aprovações: liberam os horários na exclusion constraint
+            agora = timezone.now()
+            with ReservaService.proteger_sobreposicao():
+                if rejeitadas or por_conflito:
+                    Reserva.objects.filter(id__in=rejeitadas + por_conflito).update(status='REJEITADA', atualizada_em=agora)
+                if aprovadas:
+                    Reserva.objects.filter(id__in=aprovadas).update(status='APROVADA', atualizada_em=agora)
+
+            # UPDATE em lote não dispara sinais
+            salas = {r.sala_id for r in reservas}
+            for sala_id in salas:
+                ReservaService.invalidar_caches(sala_id)
+            transaction.on_commit(lambda: [ReservaService.invalidar_caches(sala_id) for sala_id in salas])
+            # Os solicitantes das rejeitadas por conflito veem o painel atualizado quando o cache expira
+            usuarios = {dono.pk} | {r.solicitante_id for r in reservas}
+            PainelService.invalidar(*usuarios)
+            transaction.on_commit(lambda: PainelService.invalidar(*usuarios))
+
+        return {
+            'aprovadas': sorted(aprovadas),
+            'rejeitadas': sorted(rejeitadas),
+            'rejeitadas_por_conflito': sorted(por_conflito),
+            'conflitos': sorted(conflitos),
+        }
+
+    @staticmethod
+    @contextmanager
+    def proteger_sobreposicao():
+        """
+        Executa a escrita num savepoint e converte a violação da exclusion
+        constraint em ConflitoDeHorario. É a garantia final contra reservas
+        concorrentes que passaram juntas pelo verificar_disponibilidade.
+        """
+        try:
+            with transaction.atomic():
+                yield
+        except IntegrityError as erro:
+            diag = getattr(erro.__cause__, 'diag', None)
+            if getattr(diag, 'constraint_name', None) == ReservaService.CONSTRAINT_SOBREPOSICAO:
+                raise ConflitoDeHorario() from erro
+            raise
@@ -0,0 +1,77 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from api.models import Sala
+
+
+class TarifaService:
+    """
+    Cotação de reservas em Decimal, aplicando as tarifas por faixa de horário
+    (TarifaSala) de cada sala. Preços e tarifas de todas as salas de um lote são
+    carregados juntos, com um número fixo de consultas.
+    """
+    MAX_ITENS = 1000
+    MICROSSEGUNDOS_POR_HORA = 3_600_000_000
+
+    @staticmethod
+    def _instante(dia, hora):
+        return timezone.make_aware(datetime.combine(dia, hora))
+
+    @staticmethod
+    def _horas(delta):
+        return Decimal(delta // timedelta(microseconds=1)) / TarifaService.MICROSSEGUNDOS_POR_HORA
+
+    @staticmethod
+    def carregar_salas(salas):
+        """
+        {id: Sala} com preço e tarifas. Ids viram uma consulta de salas; instâncias já
+        carregadas são reaproveitadas. As tarifas de todas vêm numa consulta só.
+        """
+        carregadas = {sala.pk: sala for sala in salas if isinstance(sala, Sala)}
+        ids = {sala for sala in salas if not isinstance(sala, Sala)} - set(carregadas)
+        if ids:
+            carregadas.update(Sala.objects.filter(pk__in=ids).only('id', 'preco_por_hora').in_bulk())
+        prefetch_related_objects(list(carregadas.values()), 'tarifas')
+        return carregadas
+
+    @staticmethod
+    def valor(sala, data_inicio, data_fim):
+        """
+        Valor de [data_inicio, data_fim) na sala, arredondado para centavos só no fim.
+        O intervalo é cortado nas viradas de dia e nos limites das faixas; cada trecho
+        é cobrado com o maior multiplicador que se aplica a ele (ou 1).
+        """
+        tarifas = list(sala.tarifas.all())
+        if not tarifas:
+            horas = TarifaService._horas(data_fim - data_inicio)
+        else:
+            horas = Decimal('0')
+            cursor = data_inicio
+            while cursor < data_fim:
+                local = timezone.localtime(cursor)
+                dia = local.date()
+                cortes = [data_fim, TarifaService._instante(dia + timedelta(days=1), time(0))]
+                for tarifa in tarifas:
+                    for hora in (tarifa.hora_inicio, tarifa.hora_fim):
+                        corte = TarifaService._instante(dia, hora)
+                        if corte > cursor:
+                            cortes.append(corte)
+                proximo = min(cortes)
+                multiplicador = max((t.multiplicador for t in tarifas if t.aplica_em(local)), default=Decimal('1'))
+                horas += multiplicador * TarifaService._horas(proximo - cursor)
+                cursor = proximo
+        return (Decimal(sala.preco_por_hora) * horas).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    @staticmethod
+    def cotar(pedidos):
+        """
+        Cota vários (sala, inicio, fim) de uma vez; `sala` pode ser id ou instância.
+        Retorna os valores na ordem dos pedidos, com None para sala inexistente.
+        """
+        salas = TarifaService.carregar_salas([sala for sala, _, _ in pedidos])
+        ids = [getattr(sala, 'pk', sala) for sala, _, _ in pedidos]
+        return [
+            TarifaService.valor(salas[sala_id], inicio, fim) if sala_id in salas else None
+            for sala_id, (_, inicio, fim) in zip(ids, pedidos)
+        ]
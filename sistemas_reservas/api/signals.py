@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from api.models import CustomUser, Reserva, Sala
+from api.services import AutenticacaoService, CatalogoCache, OcupacaoService, PainelService, ReservaService
+
+
+@receiver([post_save, post_delete], sender=Reserva)
+def reserva_alterada(sender, instance, **kwargs):
+    """
+    Descarta os dados em cache da sala agora e de novo após o commit; se a
+    reserva mudou de sala, também os da sala de onde ela saiu.
+    """
+    salas = {instance.sala_id, getattr(instance, '_sala_id_carregada', None) or instance.sala_id}
+
+    def invalidar():
+        for sala_id in salas:
+            ReservaService.invalidar_caches(sala_id)
+
+    invalidar()
+    transaction.on_commit(invalidar)
+
+
+@receiver([post_save, post_delete], sender=Reserva)
+def reserva_alterou_painel(sender, instance, **kwargs):
+    """
+    Descarta o painel do solicitante e, se a sala já estiver carregada, o do dono
+    (buscá-la custaria uma consulta por escrita; sem ela o painel expira sozinho).
+    """
+    usuarios = [instance.solicitante_id]
+    if Reserva.sala.is_cached(instance):
+        usuarios.append(instance.sala.dono_id)
+    PainelService.invalidar(*usuarios)
+    transaction.on_commit(lambda: PainelService.invalidar(*usuarios))
+
+
+@receiver(post_save, sender=Reserva)
+def reserva_mudou_de_dia(sender, instance, created, **kwargs):
+    """
+    A marca d'água do rollup só enxerga o (sala, dia) atual; se a reserva mudou
+    de sala ou o início mudou de dia, o (sala, dia) antigo é reagregado ao fim da transação.
+    """
+    inicio_anterior = getattr(instance, '_data_inicio_carregada', None)
+    if inicio_anterior is None:
+        return
+    sala_anterior = getattr(instance, '_sala_id_carregada', None) or instance.sala_id
+    dia_anterior = OcupacaoService.dia_de(inicio_anterior)
+    if (sala_anterior, dia_anterior) != (instance.sala_id, OcupacaoService.dia_de(instance.data_inicio)):
+        OcupacaoService.recalcular_apos_commit(sala_anterior, dia_anterior)
+
+
+@receiver(post_save, sender=Reserva)
+def reserva_salva(sender, instance, **kwargs):
+    """Depois dos receivers acima: o que acabou de ser gravado passa a ser o valor "carregado"."""
+    instance._sala_id_carregada = instance.sala_id
+    instance._data_inicio_carregada = instance.data_inicio
+
+
+@receiver(post_delete, sender=Reserva)
+def reserva_removida(sender, instance, **kwargs):
+    """Remoções não deixam rastro em `atualizada_em`: reagrega o dia da reserva."""
+    OcupacaoService.recalcular_apos_commit(instance.sala_id, OcupacaoService.dia_de(instance.data_inicio))
+
+
+@receiver([post_save, post_delete], sender=Sala)
+def sala_alterada(sender, instance, **kwargs):
+    """Qualquer mudança em sala invalida todas as páginas do catálogo em cache."""
+    CatalogoCache.invalidar()
+    transaction.on_commit(CatalogoCache.invalidar)
+    PainelService.invalidar(instance.dono_id)
+    transaction.on_commit(lambda: PainelService.invalidar(instance.dono_id))
+
+
+@receiver(post_save, sender=CustomUser)
+def usuario_alterado(sender, instance, created, **kwargs):
+    """
+    Descarta a linha e a marca em cache da autenticação e as páginas do catálogo
+    (que mostram o username); troca de senha, desativação ou mudança de is_staff
+    (claim que IsAdminUser confere) também revoga os tokens já emitidos, com a
+    marca gravada no banco.
+    """
+    anterior = getattr(instance, '_is_staff_carregado', None)
+    instance._is_staff_carregado = instance.is_staff
+    AutenticacaoService.esquecer(instance.pk)
+    if created:
+        return
+    # As páginas do catálogo em cache exibem o username do dono
+    CatalogoCache.invalidar()
+    transaction.on_commit(CatalogoCache.invalidar)
+    # set_password guarda a senha nova em _password até o fim do save()
+    staff_mudou = anterior is not None and anterior != instance.is_staff
+    if instance._password is not None or not instance.is_active or staff_mudou:
+        AutenticacaoService.revogar(instance)
+
+
+@receiver(post_delete, sender=CustomUser)
+def usuario_removido(sender, instance, **kwargs):
+    """Sem a linha, a autenticação recusa os tokens; só falta esquecer o cache local."""
+    AutenticacaoService.esquecer(instance.pk)
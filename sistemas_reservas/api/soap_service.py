@@ -1,9 +1,14 @@
-from spyne import Application, rpc, ServiceBase, Integer, Unicode, Array, ComplexModel, DateTime
+from spyne import Application, rpc, ServiceBase, Integer, Unicode, Iterable, Array, ComplexModel, DateTime
+from spyne.error import ArgumentError
 from spyne.protocol.soap import Soap11
-from spyne.server.django import DjangoApplication
+from spyne.server.django import StreamingDjangoApplication
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import F, DurationField, ExpressionWrapper
-from api.models import Reserva
+from django.db.models import F, DecimalField, DurationField, ExpressionWrapper
+from django.db.models.functions import Extract, Round
+from django.utils import timezone
+from datetime import timedelta
+from api.models import ReservaHistorico
+from api.services import RelatorioService
 
 
 class SoapReservaRelatorio(ComplexModel):
@@ -18,52 +23,104 @@ class SoapReservaRelatorio(ComplexModel):
     valor = Unicode
     duracao_horas = Unicode
 
+class SoapTotalPorChave(ComplexModel):
+    """Par chave/valor usado nos resumos (status -> quantidade, pagamento -> receita)"""
+    chave = Unicode
+    valor = Unicode
+
+class SoapResumoPeriodo(ComplexModel):
+    """Totais de um dia/semana/mês de uma sala"""
+    periodo = DateTime
+    total_reservas = Integer
+    reservas_por_status = Array(SoapTotalPorChave)
+    receita_por_pagamento = Array(SoapTotalPorChave)
+    horas_reservadas = Unicode
+    ocupacao_percentual = Unicode
+
 class RelatorioSoapService(ServiceBase):
+    TAMANHO_LOTE = 2000
     
-    @rpc(Integer, Integer, Unicode, _returns=Array(SoapReservaRelatorio))
+    @rpc(Integer, Integer, Unicode, _returns=Iterable(SoapReservaRelatorio))
     def gerar_relatorio_reservas(ctx, sala_id, limite, ordenacao):
         """
         Gera relatório com dados sensíveis do solicitante (CPF/Celular).
+        As linhas são lidas em lotes por cursor no servidor e emitidas uma a uma,
+        então a memória não cresce com o tamanho do relatório. Inclui os meses
+        arquivados (ReservaHistorico).
         """
-        reservas = Reserva.objects.filter(sala_id=sala_id).select_related('solicitante')
+        duracao = ExpressionWrapper(F('data_fim') - F('data_inicio'), output_field=DurationField())
+        reservas = ReservaHistorico.objects.filter(sala_id=sala_id).annotate(
+            duracao=duracao,
+            horas=Round(Extract(duracao, 'epoch') / 3600, 2, output_field=DecimalField(max_digits=12, decimal_places=2)),
+        )
         ordenacao = ordenacao.upper() if ordenacao else 'RECENTES'
 
         if ordenacao == 'ANTIGAS':
             reservas = reservas.order_by('data_inicio')
         elif ordenacao == 'MAIOR_DURACAO':
-            reservas = reservas.annotate(duracao=ExpressionWrapper(F('data_fim') - F('data_inicio'),output_field=DurationField())).order_by('-duracao')
+            reservas = reservas.order_by('-duracao')
         else:
             reservas = reservas.order_by('-data_inicio')
 
         if limite and limite > 0:
             reservas = reservas[:limite]
 
-        resultado = []
-        
-        for r in reservas:
+        linhas = reservas.values_list(
+            'id', 'solicitante__username', 'solicitante__cpf', 'solicitante__celular',
+            'data_inicio', 'data_fim', 'status', 'valor_total', 'horas',
+        )
 
-            total_segundos = (r.data_fim - r.data_inicio).total_seconds()
-            horas = round(total_segundos / 3600, 2)
+        def gerar():
+            for id, nome, cpf, celular, data_inicio, data_fim, status, valor_total, horas in linhas.iterator(chunk_size=RelatorioSoapService.TAMANHO_LOTE):
+                yield SoapReservaRelatorio(
+                    id=id,
+                    solicitante_nome=nome,
+                    solicitante_cpf=cpf,
+                    solicitante_celular=celular,
+                    data_inicio=data_inicio,
+                    data_fim=data_fim,
+                    status=status,
+                    valor=str(valor_total) if valor_total else "0.00",
+                    duracao_horas=f"{float(horas)}h"
+                )
 
-            resultado.append(SoapReservaRelatorio(
-                id=r.id,
-                solicitante_nome=r.solicitante.username,
+        return gerar()
+
+    @rpc(Integer, DateTime, DateTime, Unicode, _returns=Array(SoapResumoPeriodo))
+    def gerar_resumo_sala(ctx, sala_id, de, ate, agrupamento):
+        """
+        Resumo da sala por período (DIA, SEMANA ou MES): reservas por status,
+        receita confirmada por forma de pagamento, horas reservadas e ocupação.
+        Sem datas, considera os últimos 30 dias. Datas sem fuso (o spyne as entrega
+        ingênuas) são lidas no fuso do projeto.
+        """
+        if de is not None and timezone.is_naive(de):
+            de = timezone.make_aware(de)
+        if ate is not None and timezone.is_naive(ate):
+            ate = timezone.make_aware(ate)
+        ate = ate or timezone.now()
+        de = de or ate - timedelta(days=30)
+        if de >= ate:
+            raise ArgumentError("'de' deve ser anterior a 'ate'.")
+        agrupamento = agrupamento.upper() if agrupamento else 'DIA'
+        if agrupamento not in RelatorioService.AGRUPAMENTOS:
+            agrupamento = 'DIA'
 
-                solicitante_cpf=r.solicitante.cpf,        
-                solicitante_celular=r.solicitante.celular,
-                
-                data_inicio=r.data_inicio,
-                data_fim=r.data_fim,
-                status=r.status,
-                valor=str(r.valor_total) if r.valor_total else "0.00",
-                duracao_horas=f"{horas}h"
-            ))
-            
-        return resultado
+        return [
+            SoapResumoPeriodo(
+                periodo=linha['periodo'],
+                total_reservas=linha['total'],
+                reservas_por_status=[SoapTotalPorChave(chave=k, valor=str(v)) for k, v in linha['por_status'].items()],
+                receita_por_pagamento=[SoapTotalPorChave(chave=k, valor=str(v)) for k, v in linha['receita_por_pagamento'].items()],
+                horas_reservadas=str(linha['horas_reservadas']),
+                ocupacao_percentual=str(linha['ocupacao_percentual']),
+            )
+            for linha in RelatorioService.resumo_sala(sala_id, de, ate, agrupamento)
+        ]
 
 soap_app = Application([RelatorioSoapService], tns='sistemas.reservas.soap', in_protocol=Soap11(validator='lxml'), out_protocol=Soap11(), )
 
-django_soap_application = DjangoApplication(soap_app)
+django_soap_application = StreamingDjangoApplication(soap_app)
 
 @csrf_exempt
 def soap_view(request):
@@ -3,9 +3,26 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from api.models import Sala, Reserva
+from api.models import Sala, Reserva, OcupacaoDiaria, PontoDeControle, TarifaSala
+from api.serializers import SalaSerializer
+from api.serializers.reserva_serializer import MENSAGEM_INDISPONIVEL
+from api.filters import SalaFilter
+from api.autenticacao import JWTSemConsulta
+from rest_framework_simplejwt.tokens import AccessToken
 from api.soap_service import RelatorioSoapService
+from spyne.error import ArgumentError
+from api.services import AutenticacaoService, ReservaService, IndiceDisponibilidade, indice_disponibilidade, CatalogoCache, OcupacaoService, RelatorioService, TarifaService, BuscaService, CicloDeVidaService, ParticionamentoService, ConflitoDeHorario, PainelService
+from decimal import Decimal
+from django.core.management import call_command
+from api.benchmark import CENARIOS, executar_cenarios, comparar
+import json
+from io import StringIO
 from datetime import datetime, timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, models, transaction
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 User = get_user_model()
@@ -14,6 +31,8 @@ class SetupTestCase(TestCase):
     """Configuração base para os testes"""
     def setUp(self):
         self.client = APIClient()
+        indice_disponibilidade.limpar()
+        cache.clear()
         
         # Criar Usuários
         self.dono = User.objects.create_user(
@@ -51,6 +70,142 @@ class UserTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(User.objects.count(), 1)
 
+class AutenticacaoTests(SetupTestCase):
+    def autenticar(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+
+    def consultas_a_usuarios(self, contexto):
+        return [q['sql'] for q in contexto.captured_queries if q['sql'].startswith('SELECT "usuarios"')]
+
+    def test_request_user_sai_do_token(self):
+        """Requisições autenticadas não consultam usuarios; id, username e is_staff vêm das claims"""
+        self.autenticar(self.token_dono)
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(reverse('sala-list'), {'minhas': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(self.consultas_a_usuarios(contexto), [])
+
+        usuario = JWTSemConsulta().get_user(AccessToken(self.token_dono))
+        self.assertEqual((usuario.pk, usuario.username, usuario.is_staff), (self.dono.pk, 'dono', False))
+
+    def test_escritas_reaproveitam_usuario_em_cache(self):
+        """A linha completa do usuário para a FK é lida uma vez e reaproveitada pelo cache"""
+        self.autenticar(self.token_solicitante)
+        inicio = timezone.now() + timedelta(days=1)
+        for n in range(2):
+            with CaptureQueriesContext(connection) as contexto:
+                response = self.client.post(reverse('reserva-list'), {
+                    'sala': self.sala.id, 'forma_pagamento': 'PIX',
+                    'data_inicio': inicio + timedelta(hours=2 * n), 'data_fim': inicio + timedelta(hours=2 * n + 1),
+                })
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(self.consultas_a_usuarios(contexto)), 1 - n)
+        self.assertEqual(response.data['solicitante'], self.solicitante.id)
+
+    def test_troca_de_senha_revoga_tokens(self):
+        """Depois de trocar a senha, access e refresh antigos são recusados e um login novo funciona"""
+        refresh = self.client.post(reverse('login'), {'username': 'dono', 'password': 'password123'}).data['refresh']
+        self.dono.set_password('nova-senha-123')
+        self.dono.save()
+
+        self.autenticar(self.token_dono)
+        self.assertEqual(self.client.get(reverse('reserva-list')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        self.assertEqual(self.client.post(reverse('refresh'), {'refresh': refresh}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        novo = self.client.post(reverse('login'), {'username': 'dono', 'password': 'nova-senha-123'}).data
+        renovado = self.client.post(reverse('refresh'), {'refresh': novo['refresh']}).data['access']
+        self.autenticar(renovado)
+        self.assertEqual(self.client.get(reverse('reserva-list')).status_code, status.HTTP_200_OK)
+
+    def test_desativacao_revoga_tokens(self):
+        """Usuário desativado perde o acesso também nas leituras assíncronas"""
+        self.solicitante.is_active = False
+        self.solicitante.save()
+        self.autenticar(self.token_solicitante)
+        self.assertEqual(self.client.get(reverse('reserva-list')).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(reverse('async-reserva-list'), HTTP_AUTHORIZATION='Bearer ' + self.token_solicitante)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revogacao_fica_no_banco(self):
+        """A marca sobrevive ao cache (outro processo, reinício) porque é lida de usuarios"""
+        self.dono.set_password('nova-senha-123')
+        self.dono.save()
+        cache.clear()
+        self.autenticar(self.token_dono)
+        self.assertEqual(self.client.get(reverse('reserva-list')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNotNone(User.objects.get(pk=self.dono.pk).tokens_revogados_em)
+
+    def test_perder_is_staff_revoga_tokens(self):
+        """Tirar is_staff revoga os tokens e a renovação relê as claims do banco"""
+        self.dono.is_staff = True
+        self.dono.save()
+        tokens = self.client.post(reverse('login'), {'username': 'dono', 'password': 'password123'}).data
+        self.assertTrue(AccessToken(tokens['access'])['is_staff'])
+
+        dono = User.objects.get(pk=self.dono.pk)
+        dono.is_staff = False
+        dono.save()
+        self.autenticar(tokens['access'])
+        self.assertEqual(self.client.get(reverse('reserva-list')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        self.assertEqual(self.client.post(reverse('refresh'), {'refresh': tokens['refresh']}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_renovacao_usa_dados_atuais(self):
+        """Mudanças que não revogam (ex.: username) entram no access renovado"""
+        refresh = self.client.post(reverse('login'), {'username': 'dono', 'password': 'password123'}).data['refresh']
+        User.objects.filter(pk=self.dono.pk).update(username='dono_renomeado')
+        access = self.client.post(reverse('refresh'), {'refresh': refresh}).data['access']
+        self.assertEqual(AccessToken(access)['username'], 'dono_renomeado')
+
+    def test_usuario_apagado_recebe_401(self):
+        """Sem a linha do usuário a requisição é recusada com 401, não 500"""
+        User.objects.filter(pk=self.solicitante.pk).delete()
+        self.autenticar(self.token_solicitante)
+        self.assertEqual(self.client.get(reverse('reserva-list')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Mesmo com a marca antiga ainda em cache, a escrita que precisa da linha responde 401
+        cache.set(AutenticacaoService.CHAVE_REVOGACAO.format(self.solicitante.pk), 0, 60)
+        response = self.client.post(reverse('reserva-list'), {
+            'sala': self.sala.id, 'forma_pagamento': 'PIX',
+            'data_inicio': timezone.now() + timedelta(days=1), 'data_fim': timezone.now() + timedelta(days=1, hours=1),
+        })
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class PopularBancoTests(TestCase):
+    def test_gera_dados_em_lote_sem_sobreposicao(self):
+        """O gerador cria a escala pedida, com pagamentos válidos e sem reservas ativas sobrepostas"""
+        call_command('popular_banco', usuarios=5, salas_por_usuario=2, reservas=300, seed=1, lote=100, stdout=mock.MagicMock())
+        self.assertEqual(User.objects.count(), 6)
+        self.assertEqual(Sala.objects.count(), 10)
+        self.assertEqual(Reserva.objects.count(), 300)
+        self.assertFalse(Reserva.objects.exclude(forma_pagamento__in=[c for c, _ in Reserva.PAGAMENTO_CHOICES]).exists())
+        self.assertFalse(Reserva.objects.filter(sala__dono=models.F('solicitante')).exists())
+        self.assertFalse(Reserva.objects.filter(data_fim__lt=timezone.now(), status__in=Reserva.STATUS_ATIVOS).exists())
+
+        call_command('popular_banco', usuarios=2, reservas=10, sem_limpar=True, stdout=mock.MagicMock())
+        self.assertEqual(User.objects.count(), 8)
+        self.assertEqual(Reserva.objects.count(), 310)
+
+class BenchmarkTests(TestCase):
+    def test_cenarios_medidos_e_desfeitos(self):
+        """Todos os cenários rodam, geram métricas comparáveis e não deixam reservas para trás"""
+        call_command('popular_banco', usuarios=3, salas_por_usuario=2, reservas=60, seed=3, stdout=mock.MagicMock())
+        total = Reserva.objects.count()
+
+        resultados = executar_cenarios(list(CENARIOS), iteracoes=3, aquecimento=1, host='testserver')
+
+        self.assertEqual(list(resultados), list(CENARIOS))
+        for metricas in resultados.values():
+            self.assertLessEqual(metricas['p50_ms'], metricas['p95_ms'])
+            self.assertGreater(metricas['requisicoes_por_segundo'], 0)
+        self.assertEqual(resultados['salas_lista_cache']['consultas_por_requisicao'], 0)
+        self.assertEqual(Reserva.objects.count(), total)
+
+        diferenca = comparar({'cenarios': resultados}, {'cenarios': resultados})
+        self.assertEqual(diferenca['reserva_criar']['p50_ms'], 0)
+
 class SalaTests(SetupTestCase):
     def test_criar_sala_autenticado(self):
         """Usuário logado deve conseguir criar sala"""
@@ -71,6 +226,179 @@ class SalaTests(SetupTestCase):
         response = self.client.post(reverse('sala-list'), {})
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+class CatalogoCacheTests(SetupTestCase):
+    def test_segunda_listagem_vem_do_cache(self):
+        """A mesma página (com parâmetros em qualquer ordem) é servida sem consultar o banco"""
+        primeira = self.client.get(reverse('sala-list') + '?cidade=São Paulo&estado=SP')
+        self.assertEqual(primeira['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            segunda = self.client.get(reverse('sala-list') + '?estado=SP&cidade=São Paulo')
+        self.assertEqual(segunda['X-Cache'], 'HIT')
+        self.assertEqual(segunda.data, primeira.data)
+        self.assertEqual(CatalogoCache.estatisticas(), {"acertos": 1, "falhas": 1})
+
+    def test_alteracao_de_sala_invalida(self):
+        """Salvar uma sala muda a versão e a próxima leitura vem atualizada"""
+        url = reverse('sala-detail', kwargs={'pk': self.sala.id})
+        self.client.get(url)
+        self.sala.nome = "Sala Renomeada"
+        self.sala.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['nome'], "Sala Renomeada")
+
+    def test_parametros_fora_da_lista_nao_usam_cache(self):
+        """?minhas=true depende do usuário e sempre vai ao banco"""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_solicitante)
+        response = self.client.get(reverse('sala-list'), {'minhas': 'true'})
+        self.assertEqual(response.data['count'], 0)
+        self.assertNotIn('X-Cache', response)
+
+    def test_estatisticas_apenas_para_admin(self):
+        """Os contadores do cache não são públicos"""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_dono)
+        self.assertEqual(self.client.get(reverse('sala-estatisticas-cache')).status_code, status.HTTP_403_FORBIDDEN)
+
+class BuscaSalasTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('sala-list')
+        base = dict(dono=self.dono, capacidade=10, preco_por_hora=50, rua="R", numero="1", cidade="Natal", estado="RN", cep="59000-000")
+        self.estudio = Sala.objects.create(nome="Estúdio de Gravação", descricao="Podcasts e fotografia.", bairro="Petrópolis", **base)
+        self.reuniao = Sala.objects.create(nome="Sala de Reunião", descricao="Ao lado do estúdio de gravação.", bairro="Tirol", **base)
+        self.auditorio = Sala.objects.create(nome="Auditório Central", descricao="Palestras e eventos.", bairro="Ponta Negra", **base)
+
+    def buscar(self, q):
+        response = self.client.get(self.url, {'q': q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [s['id'] for s in response.data['results']]
+
+    def test_busca_sem_acentos_e_com_radical(self):
+        """Acentos e maiúsculas não importam e o português é reduzido ao radical"""
+        self.assertEqual(self.buscar('auditorios'), [self.auditorio.id])
+        self.assertEqual(self.buscar('REUNIAO'), [self.reuniao.id])
+        self.assertEqual(self.buscar('petropolis'), [self.estudio.id])
+        self.assertEqual(self.buscar('Petrópolis gravação'), [self.estudio.id])
+        self.assertEqual(self.buscar('piscina'), [])
+
+    def test_resultados_por_relevancia(self):
+        """Casar no nome pesa mais que casar na descrição"""
+        self.assertEqual(self.buscar('estudio gravacao'), [self.estudio.id, self.reuniao.id])
+
+    def test_busca_usa_indice_gin(self):
+        """O filtro da busca pode ser resolvido pelo índice GIN da coluna gerada"""
+        consulta = BuscaService.buscar_salas(Sala.objects.all(), 'auditorio')
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plano = consulta.explain()
+        self.assertIn('salas_busca_gin', plano)
+
+    def test_documento_atualizado_no_update_em_massa(self):
+        """A coluna é gerada pelo banco, então até queryset.update() a mantém"""
+        Sala.objects.filter(pk=self.auditorio.pk).update(descricao="Piscina aquecida.")
+        self.assertEqual(self.buscar('piscina'), [self.auditorio.id])
+
+    def test_busca_no_admin(self):
+        """O admin ordena por relevância e ainda acha termos parciais"""
+        admin = User.objects.create_superuser(
+            username='admin', password='password123', email='admin@teste.com',
+            cpf='555.555.555-55', celular='55999999999'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:api_sala_changelist')
+        resultado = lambda q: [s.id for s in self.client.get(url, {'q': q}).context['cl'].result_list]
+        self.assertEqual(resultado('estudio gravacao'), [self.estudio.id, self.reuniao.id])
+        self.assertEqual(resultado('Audit'), [self.auditorio.id])
+
+class FiltrosSalaTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('sala-list')
+        base = dict(dono=self.dono, rua="R", numero="1", cidade="Natal", estado="RN", cep="59000-000", descricao="")
+        self.pequena = Sala.objects.create(nome="Pequena", capacidade=4, preco_por_hora=40, bairro="Tirol", **base)
+        self.media = Sala.objects.create(nome="Média", capacidade=20, preco_por_hora=120, bairro="Tirol", **base)
+        self.grande = Sala.objects.create(nome="Grande", capacidade=150, preco_por_hora=900, bairro="Ponta Negra", **base)
+
+    def ids(self, **params):
+        response = self.client.get(self.url, {'cidade': 'Natal', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [s['id'] for s in response.data['results']]
+
+    def test_faixas_de_capacidade_e_preco(self):
+        """capacidade_min/max e preco_min/max filtram por faixa (limites inclusivos)"""
+        self.assertEqual(self.ids(capacidade_min=10), [self.media.id, self.grande.id])
+        self.assertEqual(self.ids(capacidade_max=20, preco_min=100), [self.media.id])
+        self.assertEqual(self.ids(preco_min='40.00', preco_max=120), [self.pequena.id, self.media.id])
+        self.assertEqual(self.ids(bairro='Ponta Negra'), [self.grande.id])
+
+    def test_ordenacao_por_preco_e_capacidade(self):
+        """`ordenar` aceita preco/capacidade, com '-' para decrescente"""
+        self.assertEqual(self.ids(ordenar='-preco'), [self.grande.id, self.media.id, self.pequena.id])
+        self.assertEqual(self.ids(ordenar='capacidade'), [self.pequena.id, self.media.id, self.grande.id])
+
+    def test_ordenacao_vale_no_modo_cursor(self):
+        """Com ?paginacao=cursor o keyset segue `ordenar`; q + cursor é recusado"""
+        self.assertEqual(self.ids(ordenar='-preco', paginacao='cursor'), [self.grande.id, self.media.id, self.pequena.id])
+        self.assertEqual(self.ids(ordenar='capacidade', paginacao='cursor'), [self.pequena.id, self.media.id, self.grande.id])
+        response = self.client.get(self.url, {'q': 'sala', 'paginacao': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_valor_invalido(self):
+        """Valores não numéricos nas faixas são recusados com 400"""
+        response = self.client.get(self.url, {'preco_min': 'barato'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_faixa_de_preco_usa_indice_composto(self):
+        """Cidade + faixa de preço é resolvida por um dos índices compostos de descoberta"""
+        consulta = SalaFilter({'cidade': 'Natal', 'disponivel': 'true', 'preco_min': 100, 'preco_max': 500}, queryset=Sala.objects.all()).qs
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plano = consulta.explain()
+        # Com poucas linhas o planejador pode preferir qualquer um dos dois; ambos começam por cidade
+        self.assertRegex(plano, r'salas_cidade_(disp_preco|capacidade)')
+
+class SalasDisponiveisTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('sala-disponiveis')
+        self.inicio = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.fim = self.inicio + timedelta(hours=2)
+        self.sala_grande = Sala.objects.create(
+            dono=self.dono, nome="Auditório", capacidade=100, preco_por_hora=300,
+            rua="Rua C", numero="3", bairro="Centro", cidade="São Paulo", estado="SP", cep="00000-000"
+        )
+        Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante,
+            data_inicio=self.inicio, data_fim=self.fim,
+            status='APROVADA', forma_pagamento='PIX'
+        )
+
+    def buscar(self, **params):
+        params.setdefault('inicio', self.inicio.isoformat())
+        params.setdefault('fim', self.fim.isoformat())
+        return self.client.get(self.url, params)
+
+    def test_lista_apenas_salas_livres_em_uma_consulta(self):
+        """Salas ocupadas no período ficam de fora; paginação + busca = 2 queries"""
+        with self.assertNumQueries(2):
+            response = self.buscar()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([s['id'] for s in response.data['results']], [self.sala_grande.id])
+
+        response = self.buscar(inicio=self.fim.isoformat(), fim=(self.fim + timedelta(hours=1)).isoformat())
+        self.assertEqual(response.data['count'], 2)
+
+    def test_filtros_cidade_e_capacidade(self):
+        """Filtros opcionais se somam à checagem de disponibilidade"""
+        self.assertEqual(self.buscar(capacidade_min=50, inicio=(self.fim).isoformat(), fim=(self.fim + timedelta(hours=1)).isoformat()).data['count'], 1)
+        self.assertEqual(self.buscar(cidade='Natal').data['count'], 0)
+
+    def test_parametros_invalidos(self):
+        """Período ausente/invertido ou capacidade não numérica retornam 400"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.buscar(inicio=self.fim.isoformat(), fim=self.inicio.isoformat()).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.buscar(capacidade_min='muitos').status_code, status.HTTP_400_BAD_REQUEST)
+
 class ReservaTests(SetupTestCase):
     def setUp(self):
         super().setUp()
@@ -128,6 +456,450 @@ class ReservaTests(SetupTestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("Sala indisponível", str(response.data))
 
+    def test_constraint_barra_conflito_que_escapou_da_verificacao(self):
+        """Mesmo com a checagem prévia ignorada (corrida), o banco recusa a sobreposição"""
+        Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante,
+            data_inicio=self.inicio, data_fim=self.fim,
+            status='PENDENTE_APROVACAO', forma_pagamento='PIX'
+        )
+        data = {
+            "sala": self.sala.id,
+            "data_inicio": self.inicio + timedelta(minutes=30),
+            "data_fim": self.fim,
+            "forma_pagamento": "PIX"
+        }
+        with mock.patch('api.services.ReservaService.verificar_disponibilidade', return_value=True):
+            response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Sala indisponível", str(response.data))
+        self.assertEqual(Reserva.objects.count(), 1)
+
+    def test_constraint_ignora_reservas_inativas_e_horarios_encostados(self):
+        """Reservas canceladas não bloqueiam e fim == início não é sobreposição"""
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=self.inicio, data_fim=self.fim, status='CANCELADA', forma_pagamento='PIX')
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=self.inicio, data_fim=self.fim, status='APROVADA', forma_pagamento='PIX')
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=self.fim, data_fim=self.fim + timedelta(hours=1), status='APROVADA', forma_pagamento='PIX')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=self.inicio, data_fim=self.fim, status='PENDENTE_APROVACAO', forma_pagamento='PIX')
+
+class AgendaTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dia = timezone.localdate() + timedelta(days=3)
+        self.meia_noite = timezone.make_aware(datetime.combine(self.dia, datetime.min.time()))
+        self.url = reverse('sala-agenda', kwargs={'pk': self.sala.id})
+        Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante,
+            data_inicio=self.meia_noite + timedelta(hours=10), data_fim=self.meia_noite + timedelta(hours=11, minutes=30),
+            status='APROVADA', forma_pagamento='PIX'
+        )
+        Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante,
+            data_inicio=self.meia_noite + timedelta(hours=23, minutes=30), data_fim=self.meia_noite + timedelta(hours=24, minutes=30),
+            status='PENDENTE_APROVACAO', forma_pagamento='PIX'
+        )
+
+    @staticmethod
+    def bitmap(*slots_ocupados, total=24):
+        bits = ''.join('1' if n in slots_ocupados else '0' for n in range(total))
+        return format(int(bits, 2), f'0{total // 4}x')
+
+    def test_bitmap_por_dia(self):
+        """Cada dia vira um bitmap; reservas que cruzam a meia-noite marcam os dois dias"""
+        proximo = self.dia + timedelta(days=1)
+        response = self.client.get(self.url, {'de': self.dia.isoformat(), 'ate': proximo.isoformat(), 'granularidade': '1h'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['slots_por_dia'], 24)
+        self.assertEqual(response.data['dias'], {
+            self.dia.isoformat(): self.bitmap(10, 11, 23),
+            proximo.isoformat(): self.bitmap(0),
+        })
+
+    def test_cache_e_invalidacao(self):
+        """A segunda leitura só busca a sala; uma nova reserva invalida o cache"""
+        params = {'de': self.dia.isoformat(), 'ate': self.dia.isoformat(), 'granularidade': '1h'}
+        self.client.get(self.url, params)
+        with self.assertNumQueries(1):
+            self.client.get(self.url, params)
+
+        Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante,
+            data_inicio=self.meia_noite + timedelta(hours=8), data_fim=self.meia_noite + timedelta(hours=9),
+            status='APROVADA', forma_pagamento='PIX'
+        )
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.data['dias'][self.dia.isoformat()], self.bitmap(8, 10, 11, 23))
+
+    def test_mudanca_de_sala_invalida_as_duas_agendas(self):
+        """Mover uma reserva para outra sala libera o horário na agenda antiga e ocupa na nova"""
+        outra = Sala.objects.create(
+            dono=self.dono, nome="Outra Sala", capacidade=4, preco_por_hora=30, rua="R", numero="9",
+            bairro="Tirol", cidade="Natal", estado="RN", cep="59000-000",
+        )
+        url_outra = reverse('sala-agenda', kwargs={'pk': outra.id})
+        params = {'de': self.dia.isoformat(), 'ate': self.dia.isoformat(), 'granularidade': '1h'}
+        self.client.get(self.url, params)
+        self.client.get(url_outra, params)
+
+        reserva = Reserva.objects.get(sala=self.sala, data_inicio=self.meia_noite + timedelta(hours=10))
+        reserva.sala = outra
+        reserva.save()
+        self.assertEqual(self.client.get(self.url, params).data['dias'][self.dia.isoformat()], self.bitmap(23))
+        self.assertEqual(self.client.get(url_outra, params).data['dias'][self.dia.isoformat()], self.bitmap(10, 11))
+
+    def test_parametros_invalidos(self):
+        """Granularidade desconhecida ou período grande demais retornam 400"""
+        self.assertEqual(self.client.get(self.url, {'granularidade': '7m'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'de': '2025-01-01', 'ate': '2025-12-31'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'de': 'ontem'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+class SerieReservaTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('reserva-serie')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_solicitante)
+        self.inicio = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.dados = {
+            "sala": self.sala.id,
+            "data_inicio": self.inicio,
+            "data_fim": self.inicio + timedelta(hours=2),
+            "forma_pagamento": "PIX",
+            "frequencia": "SEMANAL",
+            "quantidade": 4,
+        }
+
+    def test_cria_serie_em_lote(self):
+        """Checagem, sala, tarifas e inserção das 4 ocorrências em número fixo de queries"""
+        with self.assertNumQueries(7):
+            response = self.client.post(self.url, self.dados)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['criadas']), 4)
+        inicios = sorted(Reserva.objects.values_list('data_inicio', flat=True))
+        self.assertEqual(inicios, [self.inicio + timedelta(weeks=n) for n in range(4)])
+        self.assertTrue(all(r.valor_total == 100 for r in Reserva.objects.all()))
+
+    def test_conflito_bloqueia_serie_inteira(self):
+        """Sem pular_conflitos, uma ocorrência ocupada impede a série toda"""
+        Reserva.objects.create(
+            sala=self.sala, solicitante=self.dono,
+            data_inicio=self.inicio + timedelta(weeks=2, hours=1), data_fim=self.inicio + timedelta(weeks=2, hours=3),
+            status='APROVADA', forma_pagamento='PIX'
+        )
+        response = self.client.post(self.url, self.dados)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['conflitos']), 1)
+        self.assertEqual(Reserva.objects.count(), 1)
+
+        response = self.client.post(self.url, {**self.dados, "pular_conflitos": True})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['criadas']), 3)
+        self.assertEqual(len(response.data['conflitos']), 1)
+
+    def test_serie_por_data_limite(self):
+        """Com 'ate', a série diária para na data informada"""
+        dados = {**self.dados, "frequencia": "DIARIA", "ate": self.inicio + timedelta(days=2, hours=1)}
+        del dados['quantidade']
+        response = self.client.post(self.url, dados)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['criadas']), 3)
+
+    def test_serie_invalida(self):
+        """Ocorrências que se sobrepõem entre si ou regra ambígua são recusadas"""
+        dados = {**self.dados, "frequencia": "DIARIA", "data_fim": self.inicio + timedelta(hours=25)}
+        self.assertEqual(self.client.post(self.url, dados).status_code, status.HTTP_400_BAD_REQUEST)
+        dados = {**self.dados, "ate": self.inicio + timedelta(weeks=3)}
+        self.assertEqual(self.client.post(self.url, dados).status_code, status.HTTP_400_BAD_REQUEST)
+
+class CotacaoTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('reserva-cotacao')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_solicitante)
+        # Segunda-feira; noites (18h-00h) custam 1.5x e o sábado inteiro 2x
+        self.segunda = timezone.make_aware(datetime(2025, 3, 10))
+        TarifaSala.objects.create(sala=self.sala, hora_inicio=datetime.min.time().replace(hour=18), multiplicador=Decimal('1.5'))
+        TarifaSala.objects.create(sala=self.sala, dia_semana=5, multiplicador=Decimal('2'))
+
+    def test_valor_com_faixas_de_horario(self):
+        """O intervalo é dividido nas faixas: 16h-20h = 2h x 50 + 2h x 75"""
+        valor, = TarifaService.cotar([(self.sala.id, self.segunda + timedelta(hours=16), self.segunda + timedelta(hours=20))])
+        self.assertEqual(valor, Decimal('250.00'))
+
+    def test_valor_atravessando_dias_usa_maior_multiplicador(self):
+        """Sexta 23h até sábado 01h: 1h noturna (1.5x) + 1h de sábado (2x vence 1x)"""
+        sexta = self.segunda + timedelta(days=4)
+        valor, = TarifaService.cotar([(self.sala, sexta + timedelta(hours=23), sexta + timedelta(hours=25))])
+        self.assertEqual(valor, Decimal('175.00'))
+
+    def test_valor_em_decimal_sem_erro_de_ponto_flutuante(self):
+        """Preços e frações de hora são somados em Decimal e arredondados só no fim"""
+        self.sala.preco_por_hora = Decimal('33.33')
+        self.sala.save()
+        valor, = TarifaService.cotar([(self.sala.id, self.segunda + timedelta(hours=9), self.segunda + timedelta(hours=9, minutes=20))])
+        self.assertEqual(valor, Decimal('11.11'))
+
+    def test_cotacao_em_lote_com_consultas_fixas(self):
+        """Uma grade inteira de várias salas é cotada com uma consulta de salas e uma de tarifas"""
+        outra = Sala.objects.create(
+            dono=self.dono, nome="Outra", capacidade=5, preco_por_hora=10, rua="R", numero="2",
+            bairro="B", cidade="Natal", estado="RN", cep="59000-000",
+        )
+        itens = [
+            {"sala": sala.id, "data_inicio": self.segunda + timedelta(hours=h), "data_fim": self.segunda + timedelta(hours=h + 1)}
+            for sala in (self.sala, outra) for h in range(24)
+        ]
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(self.url, {"itens": itens}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['itens']), 48)
+        self.assertEqual(response.data['itens'][18]['valor_total'], '75.00')
+        self.assertEqual(response.data['total'], str(Decimal(18 * 50 + 6 * 75 + 24 * 10).quantize(Decimal('0.01'))))
+        self.assertEqual(len([q for q in consultas.captured_queries if 'FROM "salas"' in q['sql'] or 'FROM "tarifas_sala"' in q['sql']]), 2)
+
+    def test_cotacao_sala_inexistente(self):
+        """Sala inexistente em qualquer item recusa o lote com 400"""
+        itens = [{"sala": 999999, "data_inicio": self.segunda, "data_fim": self.segunda + timedelta(hours=1)}]
+        response = self.client.post(self.url, {"itens": itens}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('999999', response.data['erro'])
+
+    def test_criar_reserva_salva_uma_vez_com_tarifa(self):
+        """A reserva já é inserida com o valor da tarifa, sem UPDATE posterior"""
+        dados = {"sala": self.sala.id, "data_inicio": self.segunda + timedelta(hours=17), "data_fim": self.segunda + timedelta(hours=19), "forma_pagamento": "PIX"}
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(reverse('reserva-list'), dados)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['valor_total'], '125.00')
+        self.assertFalse([q for q in consultas.captured_queries if q['sql'].startswith('UPDATE "reservas"')])
+
+    def test_atualizar_so_recota_se_sala_ou_periodo_mudar(self):
+        """PATCH de forma_pagamento mantém o valor combinado; mudar o período recota"""
+        dados = {"sala": self.sala.id, "data_inicio": self.segunda + timedelta(hours=9), "data_fim": self.segunda + timedelta(hours=11), "forma_pagamento": "PIX"}
+        reserva_id = self.client.post(reverse('reserva-list'), dados).data['id']
+        url = reverse('reserva-detail', kwargs={'pk': reserva_id})
+        self.sala.preco_por_hora = Decimal('80.00')
+        self.sala.save()
+
+        response = self.client.patch(url, {"forma_pagamento": "BOLETO"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['valor_total'], '100.00')
+
+        response = self.client.patch(url, {"data_fim": self.segunda + timedelta(hours=10)})
+        self.assertEqual(response.data['valor_total'], '80.00')
+
+class LeituraAsyncTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.inicio = timezone.now() + timedelta(days=1)
+        self.reserva = Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante, data_inicio=self.inicio,
+            data_fim=self.inicio + timedelta(hours=2), forma_pagamento='PIX', valor_total=100,
+        )
+        self.outra = Sala.objects.create(
+            dono=self.solicitante, nome="Sala Natal", capacidade=4, preco_por_hora=30, rua="R", numero="9",
+            bairro="Tirol", cidade="Natal", estado="RN", cep="59000-000", disponivel=False,
+        )
+        self.esperado_sala = SalaSerializer(Sala.objects.select_related('dono').get(pk=self.sala.pk)).data
+
+    async def test_lista_e_detalhe_de_salas(self):
+        """Listagem/detalhe async têm o mesmo formato do DRF e aplicam os filtros"""
+        response = await self.async_client.get(reverse('async-sala-list'))
+        self.assertEqual(response.status_code, 200)
+        dados = response.json()
+        self.assertEqual(dados['count'], 2)
+        self.assertEqual(dados['results'][0], json.loads(json.dumps(self.esperado_sala, default=str)))
+
+        response = await self.async_client.get(reverse('async-sala-list'), {'cidade': 'Natal', 'disponivel': 'false'})
+        self.assertEqual([s['id'] for s in response.json()['results']], [self.outra.id])
+        response = await self.async_client.get(reverse('async-sala-detail', args=[self.outra.id]))
+        self.assertEqual(response.json()['nome'], "Sala Natal")
+        response = await self.async_client.get(reverse('async-sala-detail', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_disponibilidade_pelo_banco(self):
+        """A checagem async responde pelo banco, com ou sem o índice em memória"""
+        url = reverse('async-sala-disponibilidade', args=[self.sala.id])
+        ocupado = {'inicio': (self.inicio + timedelta(hours=1)).isoformat(), 'fim': (self.inicio + timedelta(hours=3)).isoformat()}
+        livre = {'inicio': (self.inicio + timedelta(hours=2)).isoformat(), 'fim': (self.inicio + timedelta(hours=3)).isoformat()}
+        for ativo in (True, False):
+            with self.settings(INDICE_DISPONIBILIDADE_ATIVO=ativo):
+                self.assertFalse((await self.async_client.get(url, ocupado)).json()['disponivel'])
+                self.assertTrue((await self.async_client.get(url, livre)).json()['disponivel'])
+        response = await self.async_client.get(url, {'inicio': 'ontem'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_disponibilidade_nao_usa_o_indice(self):
+        """Uma reserva que o índice deste processo não viu aparece na consulta de disponibilidade"""
+        inicio, fim = self.inicio + timedelta(hours=4), self.inicio + timedelta(hours=5)
+        self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, inicio, fim))
+        # bulk_create não dispara sinais: é como uma reserva gravada por outro processo
+        Reserva.objects.bulk_create([Reserva(
+            sala=self.sala, solicitante=self.solicitante, data_inicio=inicio, data_fim=fim, forma_pagamento='PIX',
+        )])
+        self.assertTrue(indice_disponibilidade.esta_livre(self.sala.id, inicio, fim))
+        url = reverse('async-sala-disponibilidade', args=[self.sala.id])
+        response = self.client.get(url, {'inicio': inicio.isoformat(), 'fim': fim.isoformat()})
+        self.assertFalse(response.json()['disponivel'])
+
+    async def test_reservas_visiveis_com_jwt(self):
+        """Reservas async exigem token e respeitam a visibilidade e o filtro papel"""
+        url = reverse('async-reserva-list')
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+
+        cabecalho = {'Authorization': 'Bearer ' + self.token_dono}
+        response = await self.async_client.get(url, headers=cabecalho)
+        self.assertEqual([r['id'] for r in response.json()['results']], [self.reserva.id])
+        response = await self.async_client.get(url, {'papel': 'solicitante'}, headers=cabecalho)
+        self.assertEqual(response.json()['count'], 0)
+        response = await self.async_client.get(url, {'papel': 'outro'}, headers=cabecalho)
+        self.assertEqual(response.status_code, 400)
+
+class IndiceDisponibilidadeTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.inicio = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.reserva = Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante,
+            data_inicio=self.inicio, data_fim=self.inicio + timedelta(hours=2),
+            status='APROVADA', forma_pagamento='PIX'
+        )
+
+    def test_responde_sem_banco_depois_de_carregar(self):
+        """Após o primeiro acesso, "livre" é respondido só em memória; "ocupada" é confirmada no banco"""
+        self.assertFalse(ReservaService.verificar_disponibilidade(self.sala, self.inicio + timedelta(hours=1), self.inicio + timedelta(hours=3)))
+        with self.assertNumQueries(0):
+            self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, self.inicio + timedelta(hours=2), self.inicio + timedelta(hours=3)))
+            self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, self.inicio - timedelta(hours=1), self.inicio))
+            # Ao editar a própria reserva ela não conta como conflito
+            self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, self.inicio, self.inicio + timedelta(hours=1), self.reserva.id))
+        with self.assertNumQueries(1):
+            self.assertFalse(ReservaService.verificar_disponibilidade(self.sala, self.inicio - timedelta(hours=1), self.inicio + timedelta(minutes=1)))
+
+    def test_ocupada_desatualizada_e_corrigida_pelo_banco(self):
+        """Um cancelamento que o índice não viu (outro processo) não vira "Sala indisponível" """
+        fim = self.inicio + timedelta(hours=1)
+        self.assertFalse(ReservaService.verificar_disponibilidade(self.sala, self.inicio, fim))
+        # UPDATE não dispara sinais, como uma escrita feita em outro processo
+        Reserva.objects.filter(pk=self.reserva.pk).update(status='CANCELADA')
+        self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, self.inicio, fim))
+        # A sala saiu do índice e volta a ser carregada já sem a reserva cancelada
+        self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, self.inicio, fim))
+        with self.assertNumQueries(0):
+            self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, self.inicio, fim))
+
+    def test_sinais_mantem_indice_atualizado(self):
+        """Salvar ou apagar reservas invalida a agenda da sala"""
+        fim = self.inicio + timedelta(hours=5)
+        self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, self.inicio + timedelta(hours=4), fim))
+        nova = Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante,
+            data_inicio=self.inicio + timedelta(hours=4), data_fim=fim,
+            status='PENDENTE_APROVACAO', forma_pagamento='PIX'
+        )
+        self.assertFalse(ReservaService.verificar_disponibilidade(self.sala, self.inicio + timedelta(hours=4), fim))
+        nova.status = 'CANCELADA'
+        nova.save()
+        self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, self.inicio + timedelta(hours=4), fim))
+        self.reserva.delete()
+        self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, self.inicio, fim))
+
+    def test_descarta_sala_menos_usada(self):
+        """Com limite de uma sala, carregar outra expulsa a anterior"""
+        outra = Sala.objects.create(
+            dono=self.dono, nome="Outra", capacidade=5, preco_por_hora=10,
+            rua="Rua B", numero="2", bairro="Centro", cidade="Natal", estado="RN", cep="00000-000"
+        )
+        indice = IndiceDisponibilidade(max_salas=1)
+        fim = self.inicio + timedelta(hours=1)
+        indice.esta_livre(self.sala.id, self.inicio, fim)
+        indice.esta_livre(outra.id, self.inicio, fim)
+        with self.assertNumQueries(1):
+            self.assertFalse(indice.esta_livre(self.sala.id, self.inicio, fim))
+
+    def test_sala_grande_demais_volta_para_o_banco(self):
+        """Acima do limite de reservas por sala o índice não responde"""
+        indice = IndiceDisponibilidade(max_reservas_por_sala=0)
+        self.assertIsNone(indice.esta_livre(self.sala.id, self.inicio, self.inicio + timedelta(hours=1)))
+
+class VisibilidadeReservaTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        inicio = timezone.now() + timedelta(days=1)
+        sala_do_solicitante = Sala.objects.create(
+            dono=self.solicitante, nome="Sala do Solicitante", capacidade=4, preco_por_hora=20,
+            rua="Rua D", numero="4", bairro="Centro", cidade="Natal", estado="RN", cep="00000-000"
+        )
+        self.na_minha_sala = Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=1), forma_pagamento='PIX'
+        )
+        self.feita_por_mim = Reserva.objects.create(
+            sala=sala_do_solicitante, solicitante=self.dono, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=1), forma_pagamento='PIX'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_dono)
+
+    def ids(self, **params):
+        return {r['id'] for r in self.client.get(reverse('reserva-list'), params).data['results']}
+
+    def test_ve_os_dois_lados_sem_distinct(self):
+        """O dono vê as reservas das salas dele e as que fez, sem JOIN/DISTINCT na consulta"""
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.ids(), {self.na_minha_sala.id, self.feita_por_mim.id})
+        self.assertFalse(any('DISTINCT' in q['sql'] for q in consultas.captured_queries))
+
+    def test_filtro_por_papel(self):
+        """?papel= restringe a listagem a um lado da visibilidade"""
+        self.assertEqual(self.ids(papel='dono'), {self.na_minha_sala.id})
+        self.assertEqual(self.ids(papel='solicitante'), {self.feita_por_mim.id})
+        self.assertEqual(self.client.get(reverse('reserva-list'), {'papel': 'admin'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+class ExportacaoReservasTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('reserva-exportar')
+        self.inicio = timezone.make_aware(datetime(2025, 5, 1, 10))
+        for n in range(3):
+            Reserva.objects.create(
+                sala=self.sala, solicitante=self.solicitante, forma_pagamento='PIX', valor_total=100,
+                data_inicio=self.inicio + timedelta(days=n), data_fim=self.inicio + timedelta(days=n, hours=2)
+            )
+        # Reserva de terceiros numa sala de terceiros: não pode aparecer
+        estranho = User.objects.create_user(username='estranho', password='x', email='e@teste.com', cpf='555.555.555-55', celular='5')
+        sala_alheia = Sala.objects.create(
+            dono=estranho, nome="Alheia", capacidade=1, preco_por_hora=1,
+            rua="R", numero="1", bairro="B", cidade="C", estado="RN", cep="0"
+        )
+        Reserva.objects.create(sala=sala_alheia, solicitante=estranho, forma_pagamento='PIX', data_inicio=self.inicio, data_fim=self.inicio + timedelta(hours=1))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_dono)
+
+    def conteudo(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_exporta_csv_com_visibilidade(self):
+        """CSV com cabeçalho e apenas as reservas visíveis ao usuário"""
+        linhas = self.conteudo(self.client.get(self.url)).strip().splitlines()
+        self.assertEqual(linhas[0].split(',')[:3], ['id', 'sala_id', 'sala__nome'])
+        self.assertEqual(len(linhas), 4)
+        self.assertNotIn('estranho', ''.join(linhas))
+
+    def test_exporta_ndjson_filtrado(self):
+        """NDJSON: um objeto por linha, respeitando de/ate"""
+        response = self.client.get(self.url, {'formato': 'ndjson', 'de': '2025-05-02', 'ate': '2025-05-03'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        registros = [json.loads(l) for l in self.conteudo(response).splitlines()]
+        self.assertEqual(len(registros), 1)
+        self.assertEqual(registros[0]['sala__nome'], 'Sala Teste')
+        self.assertEqual(registros[0]['valor_total'], '100.00')
+
+    def test_parametros_invalidos(self):
+        """Formato desconhecido ou datas inválidas retornam 400"""
+        self.assertEqual(self.client.get(self.url, {'formato': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'de': 'ontem'}).status_code, status.HTTP_400_BAD_REQUEST)
+
 class AcoesReservaTests(SetupTestCase):
     def setUp(self):
         super().setUp()
@@ -149,6 +921,22 @@ class AcoesReservaTests(SetupTestCase):
         self.reserva.refresh_from_db()
         self.assertEqual(self.reserva.status, 'APROVADA')
 
+    def test_aprovar_rejeitada_sobreposta_responde_400(self):
+        """Reativar uma reserva rejeitada que colide com outra ativa não vira erro 500"""
+        self.reserva.status = 'REJEITADA'
+        self.reserva.save()
+        Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante,
+            data_inicio=self.reserva.data_inicio, data_fim=self.reserva.data_fim,
+            status='APROVADA', forma_pagamento='PIX'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_dono)
+        response = self.client.post(reverse('reserva-responder', kwargs={'pk': self.reserva.id}), {'acao': 'APROVAR'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['erro'], MENSAGEM_INDISPONIVEL)
+        self.reserva.refresh_from_db()
+        self.assertEqual(self.reserva.status, 'REJEITADA')
+
     def test_solicitante_nao_pode_aprovar(self):
         """O solicitante NÃO pode aprovar a própria reserva"""
         self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_solicitante)
@@ -168,6 +956,667 @@ class AcoesReservaTests(SetupTestCase):
         self.reserva.refresh_from_db()
         self.assertEqual(self.reserva.status, 'CANCELADA')
 
+class RespostaLoteTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('reserva-responder-lote')
+        self.inicio = timezone.now() + timedelta(days=3)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_dono)
+
+    def reserva(self, horas, status='PENDENTE_APROVACAO', duracao=1, sala=None):
+        inicio = self.inicio + timedelta(hours=horas)
+        return Reserva.objects.create(
+            sala=sala or self.sala, solicitante=self.solicitante, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=duracao), status=status, forma_pagamento='PIX'
+        )
+
+    def responder(self, **decisoes):
+        return self.client.post(self.url, {'decisoes': [{'id': int(i), 'acao': a} for i, a in decisoes.items()]}, format='json')
+
+    def status_de(self, *reservas):
+        return [Reserva.objects.get(pk=r.pk).status for r in reservas]
+
+    def test_aprova_e_rejeita_em_lote(self):
+        """Várias decisões são aplicadas numa chamada: 1 SELECT FOR UPDATE, 2 UPDATEs (+ savepoints)"""
+        reservas = [self.reserva(2 * n) for n in range(6)]
+        decisoes = {str(r.id): ('aprovar' if n % 2 else 'REJEITAR') for n, r in enumerate(reservas)}
+        with self.assertNumQueries(7):
+            response = self.responder(**decisoes)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['aprovadas'], [r.id for r in reservas[1::2]])
+        self.assertEqual(response.data['rejeitadas'], [r.id for r in reservas[::2]])
+        self.assertEqual(self.status_de(*reservas), ['REJEITADA', 'APROVADA'] * 3)
+
+    def test_reaprovar_rejeita_pendentes_sobrepostas(self):
+        """Aprovar uma reserva rejeitada derruba as pendentes que ocupam o mesmo horário"""
+        rejeitada = self.reserva(0, status='REJEITADA', duracao=3)
+        pendentes = [self.reserva(0), self.reserva(2)]
+        fora = self.reserva(5)
+        antes = Reserva.objects.get(pk=pendentes[0].pk).atualizada_em
+
+        response = self.responder(**{str(rejeitada.id): 'APROVAR'})
+        self.assertEqual(response.data['aprovadas'], [rejeitada.id])
+        self.assertEqual(response.data['rejeitadas_por_conflito'], [p.id for p in pendentes])
+        self.assertEqual(self.status_de(rejeitada, *pendentes, fora), ['APROVADA', 'REJEITADA', 'REJEITADA', 'PENDENTE_APROVACAO'])
+        self.assertGreater(Reserva.objects.get(pk=pendentes[0].pk).atualizada_em, antes)
+
+    def test_aprovada_no_caminho_vira_conflito(self):
+        """Uma rejeitada que colide com uma aprovada (ou com outra do lote) não é aprovada"""
+        aprovada = self.reserva(0, status='APROVADA')
+        bloqueada = self.reserva(0, status='REJEITADA')
+        primeira = self.reserva(4, status='REJEITADA', duracao=2)
+        segunda = self.reserva(5, status='REJEITADA')
+
+        response = self.responder(**{str(r.id): 'APROVAR' for r in (bloqueada, primeira, segunda)})
+        self.assertEqual(response.data['aprovadas'], [primeira.id])
+        self.assertEqual(response.data['conflitos'], [bloqueada.id, segunda.id])
+        self.assertEqual(self.status_de(aprovada, bloqueada, primeira, segunda), ['APROVADA', 'REJEITADA', 'APROVADA', 'REJEITADA'])
+
+    def test_rejeicao_no_lote_libera_horario(self):
+        """Rejeitar a aprovada e reaprovar a rejeitada do mesmo horário na mesma chamada"""
+        aprovada = self.reserva(0, status='APROVADA')
+        rejeitada = self.reserva(0, status='REJEITADA')
+        response = self.responder(**{str(aprovada.id): 'REJEITAR', str(rejeitada.id): 'APROVAR'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.status_de(aprovada, rejeitada), ['REJEITADA', 'APROVADA'])
+
+    def test_tudo_ou_nada(self):
+        """Reserva de outro dono, encerrada ou inexistente recusa o lote inteiro"""
+        outro = User.objects.create_user(username='outro', password='x', email='o@teste.com', cpf='333.333.333-33', celular='3')
+        alheia = self.reserva(0, sala=Sala.objects.create(
+            dono=outro, nome="Alheia", capacidade=5, preco_por_hora=10,
+            rua="R", numero="1", bairro="B", cidade="C", estado="SP", cep="00000-000"
+        ))
+        minha = self.reserva(0)
+        cancelada = self.reserva(2, status='CANCELADA')
+
+        for decisoes in ({str(minha.id): 'APROVAR', str(alheia.id): 'APROVAR'},
+                         {str(minha.id): 'APROVAR', str(cancelada.id): 'REJEITAR'},
+                         {str(minha.id): 'APROVAR', '999999': 'APROVAR'}):
+            response = self.responder(**decisoes)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.status_de(minha, alheia), ['PENDENTE_APROVACAO', 'PENDENTE_APROVACAO'])
+
+    def test_entrada_invalida(self):
+        """Ação desconhecida, id repetido ou lista vazia são recusados"""
+        reserva = self.reserva(0)
+        for corpo in ({'decisoes': [{'id': reserva.id, 'acao': 'TALVEZ'}]},
+                      {'decisoes': [{'id': reserva.id, 'acao': 'APROVAR'}, {'id': reserva.id, 'acao': 'REJEITAR'}]},
+                      {'decisoes': []}):
+            self.assertEqual(self.client.post(self.url, corpo, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalida_caches_da_sala(self):
+        """O índice em memória não guarda o status antigo depois do UPDATE em lote"""
+        reserva = self.reserva(0)
+        with self.settings(INDICE_DISPONIBILIDADE_ATIVO=True):
+            self.assertFalse(ReservaService.verificar_disponibilidade(self.sala, reserva.data_inicio, reserva.data_fim))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.responder(**{str(reserva.id): 'REJEITAR'})
+            self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, reserva.data_inicio, reserva.data_fim))
+
+class PainelTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('painel')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_dono)
+        self.inicio_mes = PainelService._inicio_do_mes(timezone.now())
+        self.amanha = timezone.now() + timedelta(days=1)
+
+    def reserva(self, inicio, horas=1, status='PENDENTE_APROVACAO', valor=None, sala=None, solicitante=None):
+        return Reserva.objects.create(
+            sala=sala or self.sala, solicitante=solicitante or self.solicitante, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=horas), status=status, forma_pagamento='PIX', valor_total=valor
+        )
+
+    def test_resumo_do_dono(self):
+        """Contagens, receita e ocupação do mês por sala, e os totais do dono"""
+        outra = Sala.objects.create(
+            dono=self.dono, nome="Sala Dois", capacidade=5, preco_por_hora=30,
+            rua="Rua B", numero="2", bairro="Centro", cidade="São Paulo", estado="SP", cep="00000-000"
+        )
+        self.reserva(self.inicio_mes + timedelta(hours=8), horas=3, status='CONCLUIDA', valor=150)
+        self.reserva(self.inicio_mes + timedelta(hours=12), status='CANCELADA', valor=50)
+        self.reserva(self.inicio_mes - timedelta(days=3), horas=2, status='CONCLUIDA', valor=100)
+        self.reserva(self.amanha)
+        # Aprovada, mas já no mês que vem: conta como próxima, não na receita do mês
+        self.reserva(timezone.now() + timedelta(days=40), status='APROVADA', valor=80)
+        self.reserva(self.amanha, sala=outra)
+        self.reserva(self.amanha + timedelta(hours=5), solicitante=self.dono, sala=Sala.objects.create(
+            dono=self.solicitante, nome="Sala Alheia", capacidade=5, preco_por_hora=30,
+            rua="Rua C", numero="3", bairro="Centro", cidade="São Paulo", estado="SP", cep="00000-000"
+        ))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dados = response.json()
+        self.assertEqual(dados['mes'], f'{timezone.localtime(self.inicio_mes):%Y-%m}')
+        self.assertEqual((dados['salas'], dados['aprovacoes_pendentes'], dados['reservas_proximas_nas_minhas_salas']), (2, 2, 3))
+        self.assertEqual(dados['minhas_reservas_proximas'], 1)
+        self.assertEqual(dados['receita_mes'], '150.00')
+
+        sala = dados['por_sala'][0]
+        horas_mes = Decimal((PainelService._inicio_do_mes(self.inicio_mes + timedelta(days=32)) - self.inicio_mes).days * 24)
+        self.assertEqual((sala['id'], sala['aprovacoes_pendentes'], sala['reservas_proximas']), (self.sala.id, 1, 2))
+        self.assertEqual((sala['receita_mes'], sala['horas_reservadas_mes']), ('150.00', '3.00'))
+        self.assertEqual(sala['ocupacao_percentual_mes'], str((300 / horas_mes).quantize(Decimal('0.01'))))
+        self.assertEqual(dados['por_sala'][1]['receita_mes'], '0.00')
+
+    def test_duas_consultas_e_cache(self):
+        """O resumo sai em duas consultas, independente do número de salas; depois vem do cache"""
+        for n in range(3):
+            self.reserva(self.amanha + timedelta(hours=2 * n), sala=Sala.objects.create(
+                dono=self.dono, nome=f"Sala {n}", capacidade=5, preco_por_hora=30,
+                rua="Rua B", numero="2", bairro="Centro", cidade="São Paulo", estado="SP", cep="00000-000"
+            ))
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['salas'], 4)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_cache_por_usuario_e_invalidado_por_escrita(self):
+        """Cada usuário tem o próprio painel; uma reserva nova descarta o do dono e o do solicitante"""
+        self.assertEqual(self.client.get(self.url).json()['aprovacoes_pendentes'], 0)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_solicitante)
+        resumo = self.client.get(self.url).json()
+        self.assertEqual((resumo['salas'], resumo['minhas_reservas_proximas']), (0, 0))
+
+        self.reserva(self.amanha)
+        self.assertEqual(self.client.get(self.url).json()['minhas_reservas_proximas'], 1)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_dono)
+        self.assertEqual(self.client.get(self.url).json()['aprovacoes_pendentes'], 1)
+
+    def test_resposta_em_lote_invalida_painel(self):
+        """Decisões em lote (UPDATE sem sinais) também descartam o painel do dono"""
+        reserva = self.reserva(self.amanha)
+        self.assertEqual(self.client.get(self.url).json()['aprovacoes_pendentes'], 1)
+        ReservaService.responder_lote(self.dono, {reserva.id: 'APROVAR'})
+        self.assertEqual(self.client.get(self.url).json()['aprovacoes_pendentes'], 0)
+
+    def test_exige_autenticacao(self):
+        """Sem token o painel responde 401"""
+        self.client.credentials()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CicloDeVidaTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agora = timezone.now()
+
+    def reserva(self, horas, status, duracao=1):
+        inicio = self.agora + timedelta(hours=horas)
+        return Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=duracao), status=status, forma_pagamento='PIX'
+        )
+
+    def test_encerra_em_lotes(self):
+        """Aprovadas terminadas viram CONCLUIDA e pendentes já iniciadas viram REJEITADA, lote a lote"""
+        terminadas = [self.reserva(-10 + 2 * n, 'APROVADA') for n in range(3)]
+        em_andamento = self.reserva(-1, 'APROVADA', duracao=3)
+        vencida = self.reserva(-4, 'PENDENTE_APROVACAO', duracao=3)
+        futuras = [self.reserva(5, 'APROVADA'), self.reserva(7, 'PENDENTE_APROVACAO')]
+        cancelada = self.reserva(-3, 'CANCELADA')
+
+        resultado = CicloDeVidaService.varrer(tamanho_lote=2)
+        self.assertEqual(resultado, {'concluidas': 3, 'expiradas': 1})
+        status_final = dict(Reserva.objects.values_list('id', 'status'))
+        self.assertEqual({status_final[r.id] for r in terminadas}, {'CONCLUIDA'})
+        self.assertEqual(status_final[vencida.id], 'REJEITADA')
+        self.assertEqual(status_final[em_andamento.id], 'APROVADA')
+        self.assertEqual([status_final[r.id] for r in futuras], ['APROVADA', 'PENDENTE_APROVACAO'])
+        self.assertEqual(status_final[cancelada.id], 'CANCELADA')
+
+        self.assertEqual(CicloDeVidaService.varrer(), {'concluidas': 0, 'expiradas': 0})
+        self.assertIsNotNone(CicloDeVidaService.ultima_varredura())
+
+    def test_retoma_a_partir_do_ponto_de_controle(self):
+        """A varredura seguinte só olha o que venceu desde a anterior (menos a margem); `completa` olha tudo"""
+        CicloDeVidaService.varrer()
+        antiga = self.reserva(-24 * 3, 'APROVADA')
+        recente = self.reserva(-3, 'APROVADA')
+        self.assertEqual(CicloDeVidaService.varrer(), {'concluidas': 1, 'expiradas': 0})
+        recente.refresh_from_db()
+        self.assertEqual(recente.status, 'CONCLUIDA')
+
+        self.assertEqual(CicloDeVidaService.varrer(completa=True), {'concluidas': 1, 'expiradas': 0})
+        antiga.refresh_from_db()
+        self.assertEqual(antiga.status, 'CONCLUIDA')
+
+    def test_rollup_e_caches_enxergam_a_mudanca(self):
+        """O UPDATE em lote grava atualizada_em e descarta o índice em memória da sala"""
+        vencida = self.reserva(-5, 'PENDENTE_APROVACAO', duracao=10)
+        antes = vencida.atualizada_em
+        with self.settings(INDICE_DISPONIBILIDADE_ATIVO=True):
+            self.assertFalse(ReservaService.verificar_disponibilidade(self.sala, vencida.data_inicio, vencida.data_fim))
+            with self.captureOnCommitCallbacks(execute=True):
+                CicloDeVidaService.varrer()
+            self.assertTrue(ReservaService.verificar_disponibilidade(self.sala, vencida.data_inicio, vencida.data_fim))
+        vencida.refresh_from_db()
+        self.assertGreater(vencida.atualizada_em, antes)
+
+    def test_comando(self):
+        """encerrar_reservas informa quantas reservas mudaram"""
+        self.reserva(-3, 'APROVADA')
+        saida = StringIO()
+        call_command('encerrar_reservas', lote=10, stdout=saida)
+        self.assertIn('1 reserva(s) concluída(s), 0 pendente(s) expirada(s)', saida.getvalue())
+
+    def test_checagem_de_conflitos_usa_indice_parcial(self):
+        """A consulta de conflitos percorre só o índice parcial das reservas ativas"""
+        self.reserva(5, 'APROVADA')
+        inicio = timezone.now() + timedelta(hours=4)
+        consulta = ReservaService._conflitos(self.sala, inicio, inicio + timedelta(hours=2))
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plano = consulta.explain()
+        # Nas partições o índice herdado ganha nome gerado (<partição>_sala_id_data_inicio_data_fim_idx)
+        self.assertRegex(plano, r'reservas_ativas_periodo|_sala_id_data_inicio_data_fim_idx')
+        self.assertNotIn('Seq Scan', plano)
+
+class ParticionamentoTests(SetupTestCase):
+    def reserva(self, inicio, horas=1, status='APROVADA'):
+        return Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=horas), status=status, forma_pagamento='PIX'
+        )
+
+    def particao_de(self, reserva):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM reservas WHERE id = %s', [reserva.id])
+            return cursor.fetchone()[0]
+
+    def mes(self, meses):
+        """Primeiro dia do mês a `meses` do atual."""
+        mes = ParticionamentoService.mes(timezone.now())
+        for _ in range(abs(meses)):
+            mes = ParticionamentoService.proximo_mes(mes) if meses > 0 else ParticionamentoService.mes(mes - timedelta(days=1))
+        return mes
+
+    def test_reserva_cai_na_particao_do_mes(self):
+        """A migração deixa partições do mês atual em diante; meses sem partição vão para a padrão"""
+        self.assertTrue(ParticionamentoService.particionada())
+        atual = self.reserva(self.mes(0) + timedelta(days=1))
+        distante = self.reserva(self.mes(20) + timedelta(days=1))
+        self.assertEqual(self.particao_de(atual), ParticionamentoService.nome(self.mes(0)))
+        self.assertEqual(self.particao_de(distante), ParticionamentoService.PADRAO)
+        self.assertEqual(Reserva.objects.filter(id__in=[atual.id, distante.id]).count(), 2)
+
+    def test_criar_particao_traz_linhas_da_padrao(self):
+        """A partição nova recebe o que já estava na padrão e o ORM continua achando a reserva"""
+        mes = self.mes(20)
+        reserva = self.reserva(mes + timedelta(days=3))
+        self.assertTrue(ParticionamentoService.criar_particao(mes))
+        self.assertFalse(ParticionamentoService.criar_particao(mes))
+        self.assertEqual(self.particao_de(reserva), ParticionamentoService.nome(mes))
+        self.assertEqual(Reserva.objects.get(pk=reserva.pk).data_inicio, reserva.data_inicio)
+
+    def test_sobreposicao_entre_particoes(self):
+        """Uma reserva que atravessa a virada do mês bloqueia a que começa no mês seguinte"""
+        virada = self.mes(2)
+        self.reserva(virada - timedelta(hours=2), horas=4)
+        with self.assertRaises(ConflitoDeHorario), ReservaService.proteger_sobreposicao():
+            self.reserva(virada + timedelta(hours=1))
+        self.reserva(virada + timedelta(hours=1), status='CANCELADA')
+
+    def test_estado_dos_modelos_sem_a_constraint(self):
+        """A regra é só do banco (trigger): o estado não tem mais a constraint e clean() valida"""
+        saida = StringIO()
+        call_command('makemigrations', 'api', check=True, dry_run=True, stdout=saida)
+        virada = self.mes(2)
+        self.reserva(virada, horas=2)
+        sobreposta = Reserva(sala=self.sala, solicitante=self.solicitante, data_inicio=virada + timedelta(hours=1),
+                             data_fim=virada + timedelta(hours=3), forma_pagamento='PIX')
+        with self.assertRaises(ValidationError):
+            sobreposta.full_clean()
+        sobreposta.status = 'CANCELADA'
+        sobreposta.full_clean()
+
+    def test_consulta_por_periodo_le_so_a_particao(self):
+        """Filtrar por faixa de data_inicio descarta as outras partições no plano"""
+        mes = self.mes(1)
+        plano = Reserva.objects.filter(data_inicio__gte=mes, data_inicio__lt=ParticionamentoService.proximo_mes(mes)).explain()
+        self.assertIn(ParticionamentoService.nome(mes), plano)
+        self.assertNotIn(ParticionamentoService.nome(self.mes(0)), plano)
+        self.assertNotIn(ParticionamentoService.PADRAO, plano)
+
+    def test_arquivar_move_meses_antigos(self):
+        """Partições antigas e linhas antigas da padrão saem de reservas para reservas_arquivo"""
+        antiga = self.reserva(self.mes(-30) + timedelta(days=2), status='CONCLUIDA')
+        ParticionamentoService.criar_particao(self.mes(-30))
+        solta = self.reserva(self.mes(-40) + timedelta(days=2), status='CONCLUIDA')
+        recente = self.reserva(self.mes(0) + timedelta(days=1))
+
+        movidas, linhas = ParticionamentoService.arquivar(self.mes(-24))
+        self.assertEqual(movidas, [ParticionamentoService.nome(self.mes(-30), ParticionamentoService.ARQUIVO)])
+        self.assertEqual(linhas, 1)
+        self.assertEqual(list(Reserva.objects.values_list('id', flat=True)), [recente.id])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT id FROM reservas_arquivo ORDER BY id')
+            self.assertEqual([linha[0] for linha in cursor.fetchall()], [antiga.id, solta.id])
+        with self.assertRaises(ValueError):
+            ParticionamentoService.criar_particao(self.mes(-30))
+
+        # Sem FK no arquivo: a sala ainda pode ser apagada
+        self.sala.delete()
+
+    def test_relatorios_enxergam_o_arquivo(self):
+        """Relatório SOAP, resumo_sala e a reconstrução do rollup incluem os meses arquivados"""
+        mes = self.mes(-30)
+        antiga = self.reserva(mes + timedelta(days=2, hours=12), horas=2, status='CONCLUIDA')
+        self.reserva(self.mes(0) + timedelta(days=1))
+        ParticionamentoService.criar_particao(mes)
+        ParticionamentoService.arquivar(self.mes(-24))
+        self.assertFalse(Reserva.objects.filter(pk=antiga.pk).exists())
+
+        relatorio = list(RelatorioSoapService.gerar_relatorio_reservas(None, self.sala.id, 0, 'ANTIGAS'))
+        self.assertEqual([linha.id for linha in relatorio][:1], [antiga.id])
+        self.assertEqual(relatorio[0].solicitante_cpf, '222.222.222-22')
+
+        fim = ParticionamentoService.proximo_mes(mes)
+        resumo = RelatorioService.resumo_sala(self.sala.id, mes, fim, 'MES')
+        self.assertEqual([linha['total'] for linha in resumo], [1])
+
+        OcupacaoService.atualizar(completo=True)
+        dia = OcupacaoService.dia_de(antiga.data_inicio)
+        self.assertEqual(OcupacaoDiaria.objects.get(sala=self.sala, dia=dia).qtd_concluida, 1)
+        self.assertEqual(RelatorioService.resumo_sala(self.sala.id, mes, fim, 'MES')[0]['horas_reservadas'], Decimal('2.00'))
+
+        # Sala apagada: o arquivo fica, a reconstrução do rollup não tenta recriá-la
+        self.sala.delete()
+        OcupacaoService.atualizar(completo=True)
+
+    def test_comando(self):
+        """manter_particoes cria as partições que faltam à frente"""
+        saida = StringIO()
+        call_command('manter_particoes', meses_futuros=6, stdout=saida)
+        self.assertIn(ParticionamentoService.nome(self.mes(6)), saida.getvalue())
+        self.assertIn(self.mes(6), ParticionamentoService.particoes())
+
+class QuantidadeConsultasTests(SetupTestCase):
+    """
+    Fixa o número máximo de queries por endpoint, independente do tamanho da página.
+    Se algum destes falhar, provavelmente um relacionamento voltou a ser carregado item a item.
+    Listagens e detalhes incluem a agregação dos validadores de GET condicional.
+    """
+    def setUp(self):
+        super().setUp()
+        outro = User.objects.create_user(
+            username='outro', password='password123', email='outro@teste.com',
+            cpf='444.444.444-44', celular='44999999999'
+        )
+        inicio = timezone.now() + timedelta(days=1)
+        for n in range(5):
+            sala = Sala.objects.create(
+                dono=outro if n % 2 else self.dono, nome=f"Sala {n}", capacidade=10, preco_por_hora=50,
+                rua="Rua A", numero="1", bairro="Centro", cidade="Natal", estado="RN", cep="00000-000"
+            )
+            self.reserva = Reserva.objects.create(
+                sala=sala, solicitante=self.solicitante,
+                data_inicio=inicio, data_fim=inicio + timedelta(hours=1),
+                status='PENDENTE_APROVACAO', forma_pagamento='PIX'
+            )
+        self.reserva_do_dono = Reserva.objects.filter(sala__dono=self.dono).first()
+
+    def autenticar(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token)
+
+    def test_listar_salas(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('sala-list'))
+        self.assertEqual(response.data['count'], 6)
+
+    def test_detalhar_sala(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse('sala-detail', kwargs={'pk': self.sala.id}))
+
+    def test_listar_reservas(self):
+        self.autenticar(self.token_solicitante)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('reserva-list'))
+        self.assertEqual(response.data['count'], 5)
+
+    def test_detalhar_reserva(self):
+        self.autenticar(self.token_solicitante)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('reserva-detail', kwargs={'pk': self.reserva.id}))
+
+    def test_responder(self):
+        self.autenticar(self.token_dono)
+        # SELECT + UPDATE, mais o SAVEPOINT/RELEASE de proteger_sobreposicao (dentro do TestCase)
+        with self.assertNumQueries(4):
+            response = self.client.post(reverse('reserva-responder', kwargs={'pk': self.reserva_do_dono.id}), {'acao': 'APROVAR'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cancelar(self):
+        self.autenticar(self.token_solicitante)
+        with self.assertNumQueries(2):
+            response = self.client.post(reverse('reserva-cancelar', kwargs={'pk': self.reserva.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class RespostaCondicionalTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        inicio = timezone.now() + timedelta(days=1)
+        self.reserva = Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=1), forma_pagamento='PIX'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_solicitante)
+
+    def test_reservas_304_com_if_none_match(self):
+        """Repetir a listagem com o ETag recebido custa só a agregação e volta 304"""
+        url = reverse('reserva-list')
+        primeira = self.client.get(url)
+        self.assertNotIn('Last-Modified', primeira)
+        with self.assertNumQueries(1):
+            segunda = self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(segunda.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(segunda['ETag'], primeira['ETag'])
+
+        self.reserva.forma_pagamento = 'BOLETO'
+        self.reserva.save()
+        terceira = self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(terceira.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(terceira['ETag'], primeira['ETag'])
+
+    def test_detalhe_com_if_modified_since(self):
+        """Detalhe responde 304 por data e 404 continua 404"""
+        url = reverse('reserva-detail', kwargs={'pk': self.reserva.id})
+        primeira = self.client.get(url)
+        segunda = self.client.get(url, HTTP_IF_MODIFIED_SINCE=primeira['Last-Modified'])
+        self.assertEqual(segunda.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get(reverse('reserva-detail', kwargs={'pk': 0})).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_pk_nao_numerico_responde_404(self):
+        """Um pk que nem é número é 404, como no get_object_or_404 do DRF"""
+        self.assertEqual(self.client.get(reverse('reserva-detail', kwargs={'pk': 'abc'})).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse('sala-detail', kwargs={'pk': 'abc'})).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_listagem_nao_usa_if_modified_since(self):
+        """Apagar uma reserva que não é a mais recente não muda o max(): a listagem não tem Last-Modified"""
+        inicio = self.reserva.data_inicio + timedelta(hours=2)
+        outra = Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=1), forma_pagamento='PIX'
+        )
+        url = reverse('reserva-list')
+        self.assertNotIn('Last-Modified', self.client.get(url))
+        self.reserva.delete()
+        segunda = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(segunda.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in segunda.data['results']], [outra.id])
+
+    def test_etag_muda_com_dados_relacionados(self):
+        """Renomear a sala ou o solicitante troca o ETag das reservas que os exibem"""
+        url = reverse('reserva-list')
+        etag = self.client.get(url)['ETag']
+        self.sala.nome = 'Sala Renomeada'
+        self.sala.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['sala_nome'], 'Sala Renomeada')
+
+        self.solicitante.username = 'solicitante_novo'
+        self.solicitante.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, status.HTTP_200_OK)
+
+    def test_cursor_usa_etag_da_pagina(self):
+        """Na paginação por cursor o ETag sai da própria página, sem agregação extra"""
+        url = reverse('reserva-list')
+        primeira = self.client.get(url, {'paginacao': 'cursor'})
+        with self.assertNumQueries(1):
+            segunda = self.client.get(url, {'paginacao': 'cursor'}, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(segunda.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.reserva.forma_pagamento = 'BOLETO'
+        self.reserva.save()
+        terceira = self.client.get(url, {'paginacao': 'cursor'}, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(terceira.status_code, status.HTTP_200_OK)
+
+    def test_sala_em_cache_responde_304_sem_banco(self):
+        """Os validadores ficam no cache do catálogo junto com a resposta"""
+        self.client.credentials()
+        url = reverse('sala-detail', kwargs={'pk': self.sala.id})
+        primeira = self.client.get(url)
+        with self.assertNumQueries(0):
+            segunda = self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(segunda.status_code, status.HTTP_304_NOT_MODIFIED)
+
+class PaginacaoCursorTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        inicio = timezone.now() + timedelta(days=1)
+        Reserva.objects.bulk_create([
+            Reserva(
+                sala=self.sala, solicitante=self.solicitante, forma_pagamento='PIX',
+                data_inicio=inicio + timedelta(hours=n), data_fim=inicio + timedelta(hours=n + 1)
+            )
+            for n in range(23)
+        ])
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token_solicitante)
+
+    def test_percorre_reservas_por_cursor_sem_count(self):
+        """Com ?paginacao=cursor não há COUNT e o próximo link segue pelo cursor"""
+        primeira = self.client.get(reverse('reserva-list'), {'paginacao': 'cursor'})
+        self.assertNotIn('count', primeira.data)
+        self.assertEqual(len(primeira.data['results']), 20)
+
+        # Só a página: sem COUNT nem a agregação dos validadores
+        with self.assertNumQueries(1):
+            segunda = self.client.get(primeira.data['next'])
+        self.assertEqual(len(segunda.data['results']), 3)
+        self.assertIsNone(segunda.data['next'])
+
+        ids = [r['id'] for r in primeira.data['results'] + segunda.data['results']]
+        self.assertEqual(ids, list(Reserva.objects.order_by('-criado_em', '-id').values_list('id', flat=True)))
+
+    def test_paginacao_por_numero_continua_padrao(self):
+        """Clientes antigos continuam recebendo count e ?page="""
+        response = self.client.get(reverse('reserva-list'), {'page': 2})
+        self.assertEqual(response.data['count'], 23)
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_salas_por_cursor(self):
+        """Salas usam o id como chave estável do cursor"""
+        response = self.client.get(reverse('sala-list'), {'paginacao': 'cursor'})
+        self.assertEqual([s['id'] for s in response.data['results']], [self.sala.id])
+
+class OcupacaoDiariaTests(SetupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dia = timezone.make_aware(datetime(2025, 3, 10))
+
+    def reservar(self, horas_inicio, horas_fim, status='APROVADA', valor=100):
+        return Reserva.objects.create(
+            sala=self.sala, solicitante=self.solicitante, status=status, forma_pagamento='PIX', valor_total=valor,
+            data_inicio=self.dia + timedelta(hours=horas_inicio), data_fim=self.dia + timedelta(hours=horas_fim),
+        )
+
+    def test_rollup_igual_ao_resumo_ao_vivo(self):
+        """O resumo lido do rollup coincide com o calculado direto em `reservas`"""
+        self.reservar(8, 12, status='CONCLUIDA', valor=200)
+        self.reservar(14, 16, status='CANCELADA')
+        self.reservar(33, 36)
+        ao_vivo = RelatorioService.resumo_sala(self.sala.id, self.dia, self.dia + timedelta(days=2))
+
+        call_command('atualizar_ocupacao', stdout=mock.MagicMock())
+        self.assertEqual(OcupacaoDiaria.objects.count(), 2)
+        self.assertTrue(OcupacaoService.cobre(self.dia, self.dia + timedelta(days=2)))
+        with mock.patch.object(RelatorioService, '_linhas_das_reservas') as ao_vivo_chamado:
+            do_rollup = RelatorioService.resumo_sala(self.sala.id, self.dia, self.dia + timedelta(days=2))
+        ao_vivo_chamado.assert_not_called()
+        self.assertEqual(do_rollup, ao_vivo)
+
+    def test_atualizacao_incremental_so_reagrega_dias_alterados(self):
+        """Depois da carga inicial, só os (sala, dia) com reservas alteradas são reagregados"""
+        self.reservar(8, 10)
+        self.reservar(32, 34)
+        self.assertEqual(OcupacaoService.atualizar(), 2)
+
+        Reserva.objects.update(atualizada_em=timezone.now() - timedelta(hours=1))
+        self.assertEqual(OcupacaoService.atualizar(), 0)
+
+        self.reservar(11, 12)
+        self.assertEqual(OcupacaoService.atualizar(), 1)
+        self.assertEqual(OcupacaoDiaria.objects.get(dia=self.dia.date()).total_reservas, 2)
+
+    def test_remocao_e_mudanca_de_dia_reagregam_o_dia_antigo(self):
+        """Excluir ou mover a reserva para outro dia corrige o dia antigo no rollup"""
+        movida = self.reservar(8, 10)
+        removida = self.reservar(11, 12)
+        OcupacaoService.atualizar()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            removida.delete()
+        self.assertEqual(OcupacaoDiaria.objects.get(dia=self.dia.date()).total_reservas, 1)
+
+        movida = Reserva.objects.get(pk=movida.pk)
+        movida.data_inicio += timedelta(days=1)
+        movida.data_fim += timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            movida.save()
+        self.assertFalse(OcupacaoDiaria.objects.filter(dia=self.dia.date()).exists())
+
+    def test_reconstrucao_com_falha_mantem_o_rollup(self):
+        """Uma reconstrução completa que falha no meio não deixa o rollup vazio nem a marca avançada"""
+        self.reservar(8, 10)
+        OcupacaoService.atualizar()
+        marca = PontoDeControle.objects.get(nome=OcupacaoService.NOME_MARCA).marca
+
+        with mock.patch.object(OcupacaoDiaria.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                OcupacaoService.atualizar(completo=True)
+        self.assertEqual(OcupacaoDiaria.objects.get(dia=self.dia.date()).total_reservas, 1)
+        self.assertEqual(PontoDeControle.objects.get(nome=OcupacaoService.NOME_MARCA).marca, marca)
+
+    def test_mudanca_de_sala_reagrega_a_sala_antiga(self):
+        """Mover a reserva para outra sala tira a reserva do rollup da sala antiga"""
+        outra = Sala.objects.create(
+            dono=self.dono, nome="Outra Sala", capacidade=4, preco_por_hora=30, rua="R", numero="9",
+            bairro="Tirol", cidade="Natal", estado="RN", cep="59000-000",
+        )
+        movida = self.reservar(8, 10)
+        OcupacaoService.atualizar()
+
+        movida = Reserva.objects.get(pk=movida.pk)
+        movida.sala = outra
+        with self.captureOnCommitCallbacks(execute=True):
+            movida.save()
+        self.assertFalse(OcupacaoDiaria.objects.filter(sala=self.sala, dia=self.dia.date()).exists())
+        OcupacaoService.atualizar()
+        self.assertEqual(OcupacaoDiaria.objects.get(sala=outra, dia=self.dia.date()).total_reservas, 1)
+
+    def test_periodo_alem_da_marca_usa_reservas(self):
+        """Períodos não cobertos pela marca d'água ou fora de dias inteiros são calculados ao vivo"""
+        OcupacaoService.atualizar()
+        agora = timezone.now()
+        self.assertFalse(OcupacaoService.cobre(self.dia, self.dia + timedelta(hours=12)))
+        self.assertFalse(OcupacaoService.cobre(self.dia, agora + timedelta(days=2)))
+
 class SOAPServiceTests(SetupTestCase):
     def test_logica_relatorio_soap(self):
         """Testa diretamente a lógica do serviço SOAP sem precisar de XML"""
@@ -178,7 +1627,7 @@ class SOAPServiceTests(SetupTestCase):
 
         # Chamar o método do serviço
         ctx = None # Contexto fake
-        resultado = RelatorioSoapService.gerar_relatorio_reservas(ctx, self.sala.id, 10, 'RECENTES')
+        resultado = list(RelatorioSoapService.gerar_relatorio_reservas(ctx, self.sala.id, 10, 'RECENTES'))
         
         self.assertEqual(len(resultado), 2)
         # Verifica se o primeiro da lista é o mais recente (ordenação RECENTES)
@@ -186,4 +1635,59 @@ class SOAPServiceTests(SetupTestCase):
         
         # Verifica campos customizados
         self.assertEqual(resultado[0].duracao_horas, "1.0h")
-        self.assertEqual(resultado[0].solicitante_cpf, "222.222.222-22")
\ No newline at end of file
+        self.assertEqual(resultado[0].solicitante_cpf, "222.222.222-22")
+
+    def test_relatorio_soap_via_http_em_streaming(self):
+        """O endpoint SOAP devolve o XML em streaming com a duração calculada no banco"""
+        agora = timezone.now()
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=agora, data_fim=agora+timedelta(hours=1, minutes=30), status='APROVADA', forma_pagamento='PIX', valor_total=75)
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=agora+timedelta(days=1), data_fim=agora+timedelta(days=1, hours=3), status='APROVADA', forma_pagamento='PIX', valor_total=150)
+        envelope = f"""<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:tns="sistemas.reservas.soap">
+           <soapenv:Body>
+              <tns:gerar_relatorio_reservas>
+                 <tns:sala_id>{self.sala.id}</tns:sala_id>
+                 <tns:limite>0</tns:limite>
+                 <tns:ordenacao>MAIOR_DURACAO</tns:ordenacao>
+              </tns:gerar_relatorio_reservas>
+           </soapenv:Body>
+        </soapenv:Envelope>"""
+        response = self.client.post(reverse('soap_service'), envelope, content_type='text/xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        xml = b''.join(response.streaming_content).decode()
+        self.assertLess(xml.index('3.0h'), xml.index('1.5h'))
+
+    def test_resumo_sala_agregado_por_dia(self):
+        """Resumo diário: contagens, receita confirmada, horas e ocupação numa única consulta"""
+        dia = timezone.make_aware(datetime(2025, 3, 10))
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=dia+timedelta(hours=8), data_fim=dia+timedelta(hours=12), status='CONCLUIDA', forma_pagamento='PIX', valor_total=200)
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=dia+timedelta(hours=14), data_fim=dia+timedelta(hours=16), status='APROVADA', forma_pagamento='BOLETO', valor_total=100)
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=dia+timedelta(hours=16), data_fim=dia+timedelta(hours=18), status='CANCELADA', forma_pagamento='PIX', valor_total=100)
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=dia+timedelta(days=1, hours=9), data_fim=dia+timedelta(days=1, hours=15), status='APROVADA', forma_pagamento='PIX', valor_total=300)
+
+        # 1 consulta de agregação + 1 leitura da marca d'água do rollup
+        with self.assertNumQueries(2):
+            resultado = RelatorioSoapService.gerar_resumo_sala(None, self.sala.id, dia, dia + timedelta(days=2), 'dia')
+
+        self.assertEqual([r.total_reservas for r in resultado], [3, 1])
+        primeiro = resultado[0]
+        self.assertEqual(primeiro.periodo, dia)
+        self.assertEqual({t.chave: t.valor for t in primeiro.reservas_por_status}['CANCELADA'], '1')
+        receita = {t.chave: t.valor for t in primeiro.receita_por_pagamento}
+        self.assertEqual((receita['PIX'], receita['BOLETO']), ('200.00', '100.00'))
+        self.assertEqual(primeiro.horas_reservadas, '6.00')
+        self.assertEqual(primeiro.ocupacao_percentual, '25.00')
+
+        mensal = RelatorioSoapService.gerar_resumo_sala(None, self.sala.id, dia, dia + timedelta(days=2), 'MES')
+        self.assertEqual(len(mensal), 1)
+        # O período mensal é recortado às 48h pedidas: 12h confirmadas = 25%
+        self.assertEqual(mensal[0].ocupacao_percentual, '25.00')
+
+    def test_resumo_sala_aceita_datas_sem_fuso(self):
+        """xs:dateTime sem fuso chega ingênuo e é lido no fuso do projeto; de >= ate é recusado"""
+        dia = timezone.make_aware(datetime(2025, 3, 10))
+        Reserva.objects.create(sala=self.sala, solicitante=self.solicitante, data_inicio=dia+timedelta(hours=8), data_fim=dia+timedelta(hours=12), status='CONCLUIDA', forma_pagamento='PIX', valor_total=200)
+        resultado = RelatorioSoapService.gerar_resumo_sala(None, self.sala.id, datetime(2025, 3, 10), datetime(2025, 3, 11), 'DIA')
+        self.assertEqual([r.total_reservas for r in resultado], [1])
+        with self.assertRaises(ArgumentError):
+            RelatorioSoapService.gerar_resumo_sala(None, self.sala.id, datetime(2025, 3, 11), datetime(2025, 3, 10), 'DIA')
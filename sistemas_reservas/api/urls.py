@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from api.views import SalaViewSet, ReservaViewSet, RegisterView
+from api.views import SalaViewSet, ReservaViewSet, RegisterView, PainelView, salas_async, sala_async, disponibilidade_async, reservas_async
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from api.soap_service import soap_view 
 
@@ -14,4 +14,11 @@ urlpatterns = [
     path('auth/login/', TokenObtainPairView.as_view(), name='login'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='refresh'),
     path('soap/', soap_view, name='soap_service'),
+    path('painel/', PainelView.as_view(), name='painel'),
+
+    # Leituras assíncronas (ORM async, para rodar sob ASGI)
+    path('async/salas/', salas_async, name='async-sala-list'),
+    path('async/salas/<int:pk>/', sala_async, name='async-sala-detail'),
+    path('async/salas/<int:pk>/disponibilidade/', disponibilidade_async, name='async-sala-disponibilidade'),
+    path('async/reservas/', reservas_async, name='async-reserva-list'),
 ]
\ No newline at end of file
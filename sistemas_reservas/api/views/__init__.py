@@ -1,3 +1,5 @@
 from .user_viewset import RegisterView
 from .sala_viewset import SalaViewSet
-from .reserva_viewset import ReservaViewSet
\ No newline at end of file
+from .reserva_viewset import ReservaViewSet
+from .leitura_async import salas_async, sala_async, disponibilidade_async, reservas_async
+from .painel_view import PainelView
@@ -0,0 +1,166 @@
+"""
+Versões assíncronas (ASGI) das leituras mais frequentes. O DRF não tem views
+async, então estas são views Django puras que usam o ORM assíncrono (acount,
+aget, aiterator, aexists) e reaproveitam os serializers só para montar o JSON,
+sem consultas extras. Sob ASGI, uma requisição esperando o Postgres não prende
+uma thread do pool; sob WSGI continuam funcionando, apenas sem esse ganho.
+"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.exceptions import InvalidToken
+from api.autenticacao import JWTSemConsulta, UsuarioDoToken
+from api.filters import SalaFilter
+from api.models import Sala
+from api.serializers import SalaSerializer, ReservaSerializer
+from api.services import AutenticacaoService, BuscaService, CatalogoCache, ReservaService
+from .parametros import ler_data_hora
+
+def _json(dados, status=200):
+    return JsonResponse(dados, status=status, encoder=JSONEncoder, safe=False, json_dumps_params={'ensure_ascii': False})
+
+
+def _erro(mensagem, status=400):
+    return _json({"erro": mensagem}, status=status)
+
+
+async def _usuario(request):
+    """
+    Usuário do token JWT (Authorization: Bearer), ou None se ausente/inválido/revogado.
+    A marca de revogação vem do cache ou, quando expira, de uma consulta assíncrona.
+    """
+    autenticacao = JWTSemConsulta()
+    cabecalho = autenticacao.get_header(request)
+    bruto = cabecalho and autenticacao.get_raw_token(cabecalho)
+    if not bruto:
+        return None
+    try:
+        token = autenticacao.get_validated_token(bruto)
+    except InvalidToken:
+        return None
+    if await AutenticacaoService.arevogado(token):
+        return None
+    return UsuarioDoToken(token)
+
+
+async def _paginar(request, queryset, serializer_class):
+    """
+    Mesmo formato do PageNumberPagination do DRF (count/next/previous/results).
+    Os paginadores do DRF contam e fatiam o queryset de forma síncrona, o que
+    bloquearia o event loop, por isso a reimplementação com acount/aiterator.
+    Diferença consciente: não há o modo `?paginacao=cursor` das rotas síncronas.
+    """
+    tamanho = api_settings.PAGE_SIZE
+    pagina = request.GET.get('page', '1')
+    if not pagina.isdigit() or int(pagina) < 1:
+        return None
+    pagina = int(pagina)
+
+    total = await queryset.acount()
+    inicio = (pagina - 1) * tamanho
+    if pagina > 1 and inicio >= total:
+        return None
+    objetos = [obj async for obj in queryset[inicio:inicio + tamanho].aiterator()]
+
+    url = request.build_absolute_uri()
+    anterior = None
+    if pagina == 2:
+        anterior = remove_query_param(url, 'page')
+    elif pagina > 2:
+        anterior = replace_query_param(url, 'page', pagina - 1)
+    return {
+        "count": total,
+        "next": replace_query_param(url, 'page', pagina + 1) if inicio + tamanho < total else None,
+        "previous": anterior,
+        "results": serializer_class(objetos, many=True).data,
+    }
+
+
+@require_GET
+async def salas_async(request):
+    """
+    Listagem de salas com os mesmos filtros de /api/salas/ (SalaFilter, minhas=true
+    e q). Usa o CatalogoCache (em memória) quando possível.
+    """
+    chave = await CatalogoCache.achave(request, 'async:lista')
+    if chave is not None:
+        dados = await CatalogoCache.aobter(chave)
+        if dados is not None:
+            return _json(dados)
+
+    salas = Sala.objects.select_related('dono').defer('busca').order_by('id')
+    if request.GET.get('minhas') == 'true':
+        usuario = await _usuario(request)
+        if usuario:
+            salas = salas.filter(dono_id=usuario.pk)
+    q = request.GET.get('q', '').strip()
+    if q:
+        if len(q) > BuscaService.TAMANHO_MAXIMO:
+            return _erro(f"'q' deve ter no máximo {BuscaService.TAMANHO_MAXIMO} caracteres.")
+        salas = BuscaService.buscar_salas(salas, q)
+
+    # O SalaFilter não consulta o banco para validar, então roda direto no contexto async
+    filtro = SalaFilter(request.GET, queryset=salas)
+    if not filtro.is_valid():
+        return _json(filtro.errors, status=400)
+    salas = filtro.qs
+
+    dados = await _paginar(request, salas, SalaSerializer)
+    if dados is None:
+        return _json({"detail": "Página inválida."}, status=404)
+    if chave is not None:
+        await CatalogoCache.aguardar(chave, dados)
+    return _json(dados)
+
+
+@require_GET
+async def sala_async(request, pk):
+    """Detalhe de uma sala."""
+    chave = await CatalogoCache.achave(request, f'async:sala:{pk}')
+    if chave is not None:
+        dados = await CatalogoCache.aobter(chave)
+        if dados is not None:
+            return _json(dados)
+
+    sala = await Sala.objects.select_related('dono').defer('busca').filter(pk=pk).afirst()
+    if sala is None:
+        return _json({"detail": "Não encontrado."}, status=404)
+    dados = SalaSerializer(sala).data
+    if chave is not None:
+        await CatalogoCache.aguardar(chave, dados)
+    return _json(dados)
+
+
+@require_GET
+async def disponibilidade_async(request, pk):
+    """Se a sala está livre entre `inicio` e `fim` (ISO 8601)."""
+    inicio = ler_data_hora(request.GET.get('inicio'))
+    fim = ler_data_hora(request.GET.get('fim'))
+    if not inicio or not fim:
+        return _erro("Informe 'inicio' e 'fim' no formato ISO 8601.")
+    if inicio >= fim:
+        return _erro("Data de início deve ser anterior ao fim.")
+    if not await Sala.objects.filter(pk=pk).aexists():
+        return _json({"detail": "Não encontrado."}, status=404)
+
+    livre = await ReservaService.averificar_disponibilidade(pk, inicio, fim)
+    return _json({"sala": pk, "inicio": inicio, "fim": fim, "disponivel": livre})
+
+
+@require_GET
+async def reservas_async(request):
+    """Reservas visíveis ao usuário autenticado, com o filtro `papel` de /api/reservas/."""
+    usuario = await _usuario(request)
+    if usuario is None:
+        return _json({"detail": "As credenciais de autenticação não foram fornecidas."}, status=401)
+    try:
+        reservas = ReservaService.visiveis(usuario, request.GET.get('papel')).order_by('-criado_em', '-id')
+    except ValueError as erro:
+        return _erro(str(erro))
+
+    dados = await _paginar(request, reservas, ReservaSerializer)
+    if dados is None:
+        return _json({"detail": "Página inválida."}, status=404)
+    return _json(dados)
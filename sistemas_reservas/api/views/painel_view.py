@@ -0,0 +1,17 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from api.services import PainelService
+
+class PainelView(APIView):
+    """
+    Resumo do painel do usuário logado (salas, aprovações pendentes, reservas por
+    vir, receita e ocupação do mês por sala) numa só chamada, com cache curto.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        dados, do_cache = PainelService.obter(request.user.pk)
+        response = Response(dados)
+        response['X-Cache'] = 'HIT' if do_cache else 'MISS'
+        return response
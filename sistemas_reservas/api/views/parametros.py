@@ -0,0 +1,19 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+def ler_data_hora(valor):
+    """Converte o parâmetro ISO 8601 da query string em datetime com fuso (ou None)."""
+    try:
+        data = parse_datetime(valor or '')
+    except ValueError:
+        return None
+    if data is not None and timezone.is_naive(data):
+        data = timezone.make_aware(data)
+    return data
+
+def ler_data(valor):
+    """Converte o parâmetro AAAA-MM-DD da query string em date (ou None)."""
+    try:
+        return parse_date(valor or '')
+    except ValueError:
+        return None
@@ -1,26 +1,125 @@
-from django.db import models
-from rest_framework import viewsets, permissions, status, decorators
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, permissions, status, decorators, exceptions
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from api.models import Reserva
-from api.serializers import ReservaSerializer
+from api.pagination import PaginacaoReservas
+from api.serializers import ReservaSerializer, ReservaSerieSerializer, CotacaoSerializer, RespostaLoteSerializer
+from api.serializers.reserva_serializer import MENSAGEM_INDISPONIVEL
+from api.services import AutenticacaoService, ReservaService, ConflitoDeHorario, ExportacaoService, TarifaService
+from .parametros import ler_data_hora
+from .resposta_condicional import RespostaCondicionalMixin
 
-class ReservaViewSet(viewsets.ModelViewSet):
+class ReservaViewSet(RespostaCondicionalMixin, viewsets.ModelViewSet):
     serializer_class = ReservaSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
+    pagination_class = PaginacaoReservas
+    campo_atualizacao = 'atualizada_em'
+    # sala_nome e solicitante_nome vêm dessas tabelas
+    campos_relacionados = ('sala__atualizado_em', 'solicitante__atualizado_em')
+    etag_por_usuario = True
     filterset_fields = ['sala', 'solicitante', 'status', 'data_inicio']
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Reserva.objects.filter(models.Q(solicitante=user) | models.Q(sala__dono=user)).distinct()
-        
-        return queryset
+        """Reservas visíveis ao usuário; `?papel=solicitante|dono` restringe a um só lado."""
+        try:
+            return ReservaService.visiveis(self.request.user, self.request.query_params.get('papel'))
+        except ValueError as erro:
+            raise exceptions.ValidationError({"erro": str(erro)})
+
+    def _valor_total(self, serializer):
+        reserva, dados = serializer.instance, serializer.validated_data
+        sala = dados.get('sala') or reserva.sala
+        inicio = dados.get('data_inicio') or reserva.data_inicio
+        fim = dados.get('data_fim') or reserva.data_fim
+        return TarifaService.cotar([(sala, inicio, fim)])[0]
 
     def perform_create(self, serializer):
-        reserva = serializer.save(solicitante=self.request.user)
-        reserva.calcular_valor_total()
-        reserva.save()
+        serializer.save(solicitante=AutenticacaoService.usuario(self.request.user), valor_total=self._valor_total(serializer))
+
+    def perform_update(self, serializer):
+        """Só recota se a sala ou o período mudou; o resto não mexe no preço já combinado."""
+        reserva, dados = serializer.instance, serializer.validated_data
+        if any(campo in dados and dados[campo] != getattr(reserva, campo) for campo in ('sala', 'data_inicio', 'data_fim')):
+            serializer.save(valor_total=self._valor_total(serializer))
+        else:
+            serializer.save()
+
+    @decorators.action(detail=False, methods=['post'])
+    def cotacao(self, request):
+        """
+        Cota em lote vários intervalos (`itens` com sala, data_inicio e data_fim),
+        ex.: uma grade de calendário inteira. Nada é reservado; os preços saem em
+        Decimal com as tarifas por horário de cada sala.
+        """
+        entrada = CotacaoSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        itens = entrada.validated_data['itens']
+
+        valores = TarifaService.cotar([(item['sala'], item['data_inicio'], item['data_fim']) for item in itens])
+        inexistentes = sorted({item['sala'] for item, valor in zip(itens, valores) if valor is None})
+        if inexistentes:
+            return Response({"erro": f"Sala(s) inexistente(s): {', '.join(map(str, inexistentes))}."}, status=400)
+
+        resposta = entrada.data['itens']
+        for item, valor in zip(resposta, valores):
+            item['valor_total'] = str(valor)
+        return Response({"itens": resposta, "total": str(sum(valores))})
+
+    @decorators.action(detail=False, methods=['post'])
+    def serie(self, request):
+        """
+        Cria uma série recorrente (DIARIA/SEMANAL, por `quantidade` ou `ate`)
+        com uma checagem de conflitos e uma inserção em lote para todas as ocorrências.
+        """
+        entrada = ReservaSerieSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        dados = entrada.validated_data
+
+        try:
+            criadas, conflitos = ReservaService.criar_serie(
+                dados['sala'], AutenticacaoService.usuario(request.user), dados['ocorrencias'],
+                dados['forma_pagamento'], dados['pular_conflitos'],
+            )
+        except ConflitoDeHorario:
+            return Response({"erro": MENSAGEM_INDISPONIVEL}, status=400)
+
+        conflitos = [{"data_inicio": inicio, "data_fim": fim} for inicio, fim in conflitos]
+        if not criadas:
+            return Response({"erro": MENSAGEM_INDISPONIVEL, "conflitos": conflitos}, status=400)
+
+        return Response({
+            "criadas": ReservaSerializer(criadas, many=True).data,
+            "conflitos": conflitos,
+        }, status=status.HTTP_201_CREATED)
+
+    @decorators.action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta as reservas visíveis ao usuário em CSV ou NDJSON (`formato`), com
+        filtros opcionais `de`/`ate` (início da reserva) e `sala`. A resposta é
+        gerada em streaming a partir de um cursor no servidor, com memória constante.
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in ExportacaoService.FORMATOS:
+            return Response({"erro": "Formato deve ser 'csv' ou 'ndjson'."}, status=400)
+
+        reservas = self.get_queryset()
+        for nome, lookup in (('de', 'data_inicio__gte'), ('ate', 'data_inicio__lt')):
+            if nome in request.query_params:
+                valor = ler_data_hora(request.query_params[nome])
+                if not valor:
+                    return Response({"erro": f"'{nome}' deve estar no formato ISO 8601."}, status=400)
+                reservas = reservas.filter(**{lookup: valor})
+        sala = request.query_params.get('sala')
+        if sala:
+            if not sala.isdigit():
+                return Response({"erro": "'sala' deve ser um id numérico."}, status=400)
+            reservas = reservas.filter(sala_id=int(sala))
+
+        response = StreamingHttpResponse(getattr(ExportacaoService, formato)(reservas), content_type=ExportacaoService.FORMATOS[formato])
+        response['Content-Disposition'] = f'attachment; filename="reservas.{formato}"'
+        return response
 
     @decorators.action(detail=True, methods=['post'])
     def responder(self, request, pk=None):
@@ -28,27 +127,48 @@ class ReservaViewSet(viewsets.ModelViewSet):
         Endpoint para o DONO da sala ACEITAR ou REJEITAR a reserva.
         """
         reserva = self.get_object()
-        if request.user != reserva.sala.dono:
+        if reserva.sala.dono_id != request.user.id:
             return Response({"erro": "Apenas o dono da sala pode aprovar/rejeitar."}, status=403)
         
         acao = request.data.get('acao', '').upper()
         if acao == 'APROVAR': reserva.status = 'APROVADA'
         elif acao == 'REJEITAR': reserva.status = 'REJEITADA'
         else: return Response({"erro": "Ação inválida."}, status=400)
-            
-        reserva.save()
+
+        # Aprovar uma reserva rejeitada/cancelada pode colidir com outra ativa
+        try:
+            with ReservaService.proteger_sobreposicao():
+                reserva.save(update_fields=['status', 'atualizada_em'])
+        except ConflitoDeHorario:
+            return Response({"erro": MENSAGEM_INDISPONIVEL}, status=400)
         return Response({"status": f"Reserva {reserva.status.lower()} com sucesso."})
 
+    @decorators.action(detail=False, methods=['post'], url_path='responder-lote')
+    def responder_lote(self, request):
+        """
+        O DONO aprova/rejeita várias reservas numa transação (`decisoes` com id e acao).
+        Aprovar uma reserva rejeitada rejeita as pendentes que se sobrepõem a ela.
+        """
+        entrada = RespostaLoteSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        try:
+            resultado = ReservaService.responder_lote(request.user, entrada.validated_data['decisoes'])
+        except ValueError as erro:
+            return Response({"erro": str(erro)}, status=400)
+        except ConflitoDeHorario:
+            return Response({"erro": MENSAGEM_INDISPONIVEL}, status=400)
+        return Response(resultado)
+
     @decorators.action(detail=True, methods=['post'])
     def cancelar(self, request, pk=None):
         """
         Endpoint para o SOLICITANTE cancelar sua própria reserva.
         """
         reserva = self.get_object()
-        if request.user != reserva.solicitante:
+        if reserva.solicitante_id != request.user.id:
             return Response({"erro": "Apenas o solicitante pode cancelar."}, status=403)
         if reserva.status in ['REJEITADA', 'CANCELADA', 'CONCLUIDA']:
              return Response({"erro": "Não é possível cancelar."}, status=400)
         reserva.status = 'CANCELADA'
-        reserva.save()
+        reserva.save(update_fields=['status', 'atualizada_em'])
         return Response({"status": "Reserva cancelada."})
\ No newline at end of file
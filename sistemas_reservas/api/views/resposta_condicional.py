@@ -0,0 +1,93 @@
+import hashlib
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from rest_framework.renderers import JSONRenderer
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def aplicar_validadores(response, etag, modificado):
+    response['ETag'] = etag
+    if modificado is not None:
+        response['Last-Modified'] = http_date(modificado)
+    return response
+
+
+def resposta_nao_modificada(request, etag, modificado):
+    """Retorna a resposta 304/412 se as pré-condições da requisição pedirem, senão None."""
+    resposta = get_conditional_response(request._request, etag=etag, last_modified=modificado)
+    if resposta is not None:
+        aplicar_validadores(resposta, etag, modificado)
+    return resposta
+
+
+class RespostaCondicionalMixin:
+    """
+    GET condicional (ETag / Last-Modified) para listagem e detalhe.
+    Os validadores saem de uma única agregação (max(campo_atualizacao) + count)
+    sobre o mesmo queryset da resposta, então um 304 é devolvido sem serializar nada.
+    Listagens só enviam ETag: remover uma linha que não é a mais recente não muda
+    o max(), então um Last-Modified ali devolveria 304 com dados velhos.
+    `campos_relacionados` entram no max para que mudanças em dados exibidos de
+    outras tabelas (ex.: nome da sala) também troquem o ETag.
+
+    Na paginação por cursor a agregação sobre o queryset inteiro traria de volta o
+    COUNT que o cursor evita; ali o ETag é o hash da página já serializada.
+    """
+    campo_atualizacao = 'atualizado_em'
+    campos_relacionados = ()
+    etag_por_usuario = False
+
+    def _etag(self, *partes):
+        partes = [self.request.path, self.request.META.get('QUERY_STRING', ''), *partes]
+        if self.etag_por_usuario:
+            partes.append(str(self.request.user.pk))
+        return quote_etag(hashlib.md5('|'.join(partes).encode()).hexdigest())
+
+    def calcular_validadores(self, queryset):
+        campos = (self.campo_atualizacao, *self.campos_relacionados)
+        resumo = queryset.order_by().aggregate(total=Count('pk'), **{f'ultima_{n}': Max(campo) for n, campo in enumerate(campos)})
+        ultima = max((valor for nome, valor in resumo.items() if nome != 'total' and valor), default=None)
+        etag = self._etag(str(resumo['total']), ultima.isoformat() if ultima else '')
+        return etag, (int(ultima.timestamp()) if ultima else None), resumo['total']
+
+    def responder_condicional(self, queryset, gerar, detalhe=False):
+        etag, modificado, total = self.calcular_validadores(queryset)
+        if not detalhe:
+            modificado = None
+        # No detalhe, sem resultado é 404: deixa a view original responder.
+        if total or not detalhe:
+            nao_modificada = resposta_nao_modificada(self.request, etag, modificado)
+            if nao_modificada is not None:
+                return nao_modificada
+
+        response = gerar()
+        if response.status_code == 200:
+            aplicar_validadores(response, etag, modificado)
+        return response
+
+    def responder_pela_pagina(self, gerar):
+        """Gera a página e tira o ETag do seu conteúdo; o 304 poupa só a transferência."""
+        response = gerar()
+        if response.status_code != 200:
+            return response
+        etag = self._etag(hashlib.md5(JSONRenderer().render(response.data)).hexdigest())
+        return resposta_nao_modificada(self.request, etag, None) or aplicar_validadores(response, etag, None)
+
+    def list(self, request, *args, **kwargs):
+        gerar = lambda: super(RespostaCondicionalMixin, self).list(request, *args, **kwargs)
+        usa_cursor = getattr(self.paginator, 'usa_cursor', None)
+        if usa_cursor and usa_cursor(request):
+            return self.responder_pela_pagina(gerar)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.responder_condicional(queryset, gerar)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        # Mesmo tratamento do get_object_or_404 do DRF: pk malformado é 404, não 500
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup]})
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        return self.responder_condicional(queryset, lambda: super(RespostaCondicionalMixin, self).retrieve(request, *args, **kwargs), detalhe=True)
@@ -1,22 +1,131 @@
-from rest_framework import viewsets, permissions
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.http import parse_http_date_safe
+from rest_framework import viewsets, permissions, decorators, exceptions
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from api.filters import SalaFilter
+from api.pagination import PaginacaoSalas
 from api.models import Sala
 from api.serializers import SalaSerializer
+from api.services import AgendaService, AutenticacaoService, BuscaService, CatalogoCache, ReservaService
+from .parametros import ler_data, ler_data_hora
+from .resposta_condicional import RespostaCondicionalMixin, aplicar_validadores, resposta_nao_modificada
 
-class SalaViewSet(viewsets.ModelViewSet):
+class SalaViewSet(RespostaCondicionalMixin, viewsets.ModelViewSet):
     serializer_class = SalaSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['dono', 'disponivel', 'cidade', 'estado']
+    pagination_class = PaginacaoSalas
+    filterset_class = SalaFilter
+    # dono_nome vem de usuarios
+    campos_relacionados = ('dono__atualizado_em',)
 
     def get_queryset(self):
-        queryset = Sala.objects.all()
+        queryset = Sala.objects.select_related('dono').defer('busca').order_by('id')
     
         minhas = self.request.query_params.get('minhas')
         if minhas == 'true' and self.request.user.is_authenticated:
-            queryset = queryset.filter(dono=self.request.user)
+            queryset = queryset.filter(dono_id=self.request.user.pk)
+
+        # Busca textual: filtra e ordena por relevância
+        q = self.request.query_params.get('q', '').strip()
+        if q:
+            if len(q) > BuscaService.TAMANHO_MAXIMO:
+                raise exceptions.ValidationError({"erro": f"'q' deve ter no máximo {BuscaService.TAMANHO_MAXIMO} caracteres."})
+            if self.paginator is not None and self.paginator.usa_cursor(self.request):
+                raise exceptions.ValidationError({"erro": "A busca por 'q' é ordenada por relevância e não aceita paginação por cursor; use ?page=."})
+            queryset = BuscaService.buscar_salas(queryset, q)
             
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(dono=self.request.user)
\ No newline at end of file
+        serializer.save(dono=AutenticacaoService.usuario(self.request.user))
+
+    def _responder_com_cache(self, recurso, gerar):
+        """
+        Serve do CatalogoCache junto com os validadores HTTP guardados, de modo que
+        tanto o 304 quanto o 200 de um acerto não tocam no banco.
+        """
+        chave = CatalogoCache.chave(self.request, recurso)
+        if chave is None:
+            return gerar()
+
+        em_cache = CatalogoCache.obter(chave)
+        if em_cache is not None:
+            dados, etag, modificado = em_cache
+            response = resposta_nao_modificada(self.request, etag, modificado) or aplicar_validadores(Response(dados), etag, modificado)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = gerar()
+        if response.status_code == 200:
+            modificado = parse_http_date_safe(response.get('Last-Modified', ''))
+            CatalogoCache.guardar(chave, (response.data, response['ETag'], modificado))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._responder_com_cache('lista', lambda: super(SalaViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._responder_com_cache(f"sala:{kwargs.get('pk')}", lambda: super(SalaViewSet, self).retrieve(request, *args, **kwargs))
+
+    @decorators.action(detail=False, methods=['get'], url_path='cache', permission_classes=[permissions.IsAdminUser])
+    def estatisticas_cache(self, request):
+        """Contadores de acertos/falhas do cache do catálogo (apenas administradores)."""
+        return Response(CatalogoCache.estatisticas())
+
+    @decorators.action(detail=False, methods=['get'])
+    def disponiveis(self, request):
+        """
+        Lista as salas livres entre `inicio` e `fim` (opcionalmente por `cidade`
+        e `capacidade_min`), resolvendo a disponibilidade numa única consulta.
+        """
+        inicio = ler_data_hora(request.query_params.get('inicio'))
+        fim = ler_data_hora(request.query_params.get('fim'))
+        if not inicio or not fim:
+            return Response({"erro": "Informe 'inicio' e 'fim' no formato ISO 8601."}, status=400)
+        if inicio >= fim:
+            return Response({"erro": "Data de início deve ser anterior ao fim."}, status=400)
+
+        salas = Sala.objects.filter(disponivel=True).select_related('dono').defer('busca')
+        cidade = request.query_params.get('cidade')
+        if cidade:
+            salas = salas.filter(cidade=cidade)
+        capacidade_min = request.query_params.get('capacidade_min')
+        if capacidade_min:
+            if not capacidade_min.isdigit():
+                return Response({"erro": "'capacidade_min' deve ser um número inteiro."}, status=400)
+            salas = salas.filter(capacidade__gte=int(capacidade_min))
+
+        salas = ReservaService.filtrar_salas_livres(salas, inicio, fim).order_by('id')
+
+        pagina = self.paginate_queryset(salas)
+        serializer = self.get_serializer(pagina, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @decorators.action(detail=True, methods=['get'])
+    def agenda(self, request, pk=None):
+        """
+        Ocupação da sala entre `de` e `ate` (padrão: 7 dias a partir de hoje)
+        como bitmap hexadecimal por dia, em slots de `granularidade` (5m, 15m, 30m, 1h).
+        """
+        sala = self.get_object()
+        granularidade = request.query_params.get('granularidade', '15m')
+        if granularidade not in AgendaService.GRANULARIDADES:
+            return Response({"erro": f"Granularidade deve ser uma de: {', '.join(AgendaService.GRANULARIDADES)}."}, status=400)
+
+        de = ler_data(request.query_params.get('de')) if 'de' in request.query_params else timezone.localdate()
+        ate = ler_data(request.query_params.get('ate')) if 'ate' in request.query_params else (de and de + timedelta(days=6))
+        if not de or not ate:
+            return Response({"erro": "Informe 'de' e 'ate' no formato AAAA-MM-DD."}, status=400)
+        if de > ate or (ate - de).days >= 62:
+            return Response({"erro": "Período inválido (máximo de 62 dias)."}, status=400)
+
+        return Response({
+            "sala": sala.id,
+            "granularidade": granularidade,
+            "slots_por_dia": 24 * 60 // AgendaService.GRANULARIDADES[granularidade],
+            "dias": AgendaService.montar(sala.id, de, ate, granularidade),
+        })
@@ -135,7 +135,8 @@ AUTH_USER_MODEL = 'api.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Monta request.user com as claims do token, sem consultar usuarios
+        'api.autenticacao.JWTSemConsulta',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -148,4 +149,32 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-}
\ No newline at end of file
+    'TOKEN_OBTAIN_SERIALIZER': 'api.serializers.TokenComDadosSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.serializers.RenovacaoTokenSerializer',
+}
+
+# Segundos que a linha completa do usuário fica em cache para as escritas (0 desliga)
+AUTENTICACAO_CACHE_USUARIO = 60
+# Segundos que a marca de revogação (usuarios.tokens_revogados_em) fica em cache por processo:
+# é o atraso máximo para outro processo recusar os tokens de um usuário revogado (0 desliga)
+AUTENTICACAO_CACHE_REVOGACAO = 30
+
+# Segundos que o resumo de GET /api/painel/ fica em cache por usuário
+PAINEL_CACHE_SEGUNDOS = 30
+
+# Índice em memória das reservas ativas por sala (api.services.indice_disponibilidade).
+# É por processo e sem expiração: só serve à checagem antes de gravar uma reserva, onde as
+# respostas "livre" são usadas direto e "ocupada" é confirmada no banco. Consultas de
+# disponibilidade (ex.: /api/async/.../disponibilidade/) vão sempre ao banco.
+INDICE_DISPONIBILIDADE_ATIVO = True
+INDICE_DISPONIBILIDADE_MAX_SALAS = 1024
+INDICE_DISPONIBILIDADE_MAX_RESERVAS_POR_SALA = 5000
+
+# Cache do Django (catálogo de salas, agenda). Troque o BACKEND (ex.: Redis) para compartilhar entre processos.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sistemas-reservas',
+    }
+}
+CATALOGO_CACHE_TIMEOUT = 300